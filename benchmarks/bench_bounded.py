@@ -0,0 +1,178 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(REPO_ROOT), str(REPO_ROOT / "sentiment")]
+
+from eu_snapshot import (TICKER_FILE, build_snapshot, iter_snapshot_chunks, iter_universe, load_universe,
+                         save_snapshot, save_snapshot_chunks)
+from eu_prices import fetch_close_panel
+from merge_sentiment import run_merge
+
+# Peak RSS of the EU snapshot + merge on synthetic universes of growing size,
+# in memory (the default) and in the memory-bounded mode (eu_snapshot
+# --chunk-size, merge_sentiment --bounded). Every run is a fresh process, as
+# the peak RSS is a high-water mark; what is compared is the peak above the
+# process's RSS once everything is imported. Also checks that both modes
+# produce the same records.
+
+DAYS = 16
+SECTORS = ("Technology", "Industrials", "Financials", "Health Care", "Energy")
+
+
+def synthetic_fetcher(tickers, period, start=None):
+    # Closes that depend on the ticker only, so any chunking gives the same panel.
+    failing = [t for t in tickers if zlib.crc32(t.encode()) % 97 == 0]
+    tickers = [t for t in tickers if t not in failing]
+    keys = np.array([zlib.crc32(t.encode()) for t in tickers], dtype=float)
+    steps = np.arange(DAYS, dtype=float)[:, None]
+    closes = 20 + keys % 500 / 5 + np.sin(steps * (1 + keys % 7) / 3) * (1 + keys % 11)
+    index = pd.bdate_range("2025-06-02", periods=DAYS)
+    return pd.DataFrame(closes, index=index, columns=tickers), {t: "No data found" for t in failing}
+
+
+def write_inputs(directory, tickers):
+    # eu_tickers.csv with `tickers` rows (a few listed twice), a TradingView
+    # stockdata.json overlapping it and a sentiment file overlapping both.
+    directory = Path(directory)
+    (directory / "sentiment").mkdir(parents=True, exist_ok=True)
+    eu = [f"E{i:06d}.DE" for i in range(tickers)]
+    with open(directory / TICKER_FILE, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ticker", "name", "country", "sector"])
+        for i, ticker in enumerate(eu):
+            writer.writerow([ticker, f"Company {i}", "Germany", SECTORS[i % len(SECTORS)]])
+        for i in range(0, tickers, 997):
+            writer.writerow([eu[i], f"Company {i} SE", "Germany", "Other"])
+
+    row = lambda ticker, i: {"name": ticker, "description": f"Company {i}", "close": 10.0 + i % 300, "change": -1.5,
+                             "volume": 1000 * i, "RSI": None if i % 9 == 0 else 20.0 + i % 60,
+                             "price_earnings_ttm": 18.0, "sector": "Finance", "dividends_yield_current": 1.2}
+    warren = {
+        "america": {"large_cap": [row(f"W{i:06d}", i) for i in range(tickers // 2)],
+                    "losers": [row(f"W{i:06d}", i) for i in range(0, tickers // 2, 10)] + [None]},
+        "germany": {"large_cap": [row(eu[i], i) for i in range(0, tickers, 4)]},
+    }
+    (directory / "stockdata.json").write_text(json.dumps(warren))
+    sentiment = [{"ticker": f"W{i:06d}", "mentions": i % 700, "sentiment": "bullish"} for i in range(0, tickers // 2, 3)]
+    sentiment += [{"ticker": eu[i], "mentions": 2} for i in range(0, tickers, 5)]
+    (directory / "sentiment" / "swaggystocks_sentiment.json").write_text(
+        json.dumps({"wallstreetbets_sentiment": sentiment}))
+
+
+def _proc_status_mb(field):
+    # VmHWM/VmRSS in MB, Linux only (None elsewhere).
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+
+def peak_rss_mb():
+    # VmHWM starts over at exec; ru_maxrss on Linux keeps the parent's peak from before the fork.
+    peak = _proc_status_mb("VmHWM")
+    if peak is not None:
+        return peak
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def current_rss_mb():
+    # Elsewhere than Linux the peak so far stands in for it.
+    rss = _proc_status_mb("VmRSS")
+    return peak_rss_mb() if rss is None else rss
+
+
+def run_child(mode, directory, chunk_size, run_size):
+    os.chdir(directory)
+    base = current_rss_mb()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if mode == "bounded":
+            items = iter_snapshot_chunks(iter_universe(TICKER_FILE, chunk_size), use_cache=False,
+                                         fetcher=synthetic_fetcher)
+            save_snapshot_chunks(items, history=False)
+            run_merge(history=False, screens=False, bounded=True, run_size=run_size)
+        else:
+            universe = load_universe()
+            panel, failed = fetch_close_panel(universe["ticker"], period="21d", fetcher=synthetic_fetcher)
+            save_snapshot(build_snapshot(universe, panel, failed), history=False)
+            run_merge(history=False, screens=False)
+    print(json.dumps({"base_mb": base, "peak_mb": peak_rss_mb(), "seconds": time.perf_counter() - started}))
+
+
+def measure(mode, directory, chunk_size, run_size):
+    output = subprocess.run([sys.executable, __file__, "--child", mode, str(directory), "--chunk-size", str(chunk_size),
+                             "--run-size", str(run_size)], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _outputs(directory):
+    snapshot = json.loads((directory / "sentiment" / "eu_snapshot.json").read_text())
+    snapshot.pop("_date")
+    return snapshot, json.loads((directory / "combined_output.json").read_text())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Peak RSS of the EU snapshot + merge, in memory and bounded.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--run-size", type=int, default=5000)
+    parser.add_argument("--tolerance-mb", type=float, default=15.0,
+                        help="Most the bounded peak may grow from the smallest to the largest size.")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], args.chunk_size, args.run_size)
+        sys.exit(0)
+
+    problems = []
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            for mode in ("memory", "bounded"):
+                directory = Path(tmp) / f"{size}-{mode}"
+                write_inputs(directory, size)
+                results[size, mode] = measure(mode, directory, args.chunk_size, args.run_size)
+            memory_snapshot, memory_combined = _outputs(Path(tmp) / f"{size}-memory")
+            bounded_snapshot, bounded_combined = _outputs(Path(tmp) / f"{size}-bounded")
+            if bounded_snapshot != memory_snapshot:
+                problems.append(f"{size} tickers: EU snapshots differ")
+            if bounded_combined != memory_combined:
+                problems.append(f"{size} tickers: merged outputs differ")
+            if list(bounded_combined) != sorted(bounded_combined):
+                problems.append(f"{size} tickers: bounded merge output is not in ticker order")
+
+    growth = lambda size, mode: results[size, mode]["peak_mb"] - results[size, mode]["base_mb"]
+    smallest, largest = min(args.sizes), max(args.sizes)
+    if growth(largest, "bounded") - growth(smallest, "bounded") > args.tolerance_mb:
+        problems.append(f"bounded peak grew {growth(largest, 'bounded') - growth(smallest, 'bounded'):.0f} MB "
+                        f"from {smallest} to {largest} tickers (tolerance {args.tolerance_mb:.0f} MB)")
+    print(f"Bounded mode checks: {len(problems)} problems.")
+    for problem in problems:
+        print(f"  {problem}")
+
+    print(f"\nPeak RSS above the imports (chunk size {args.chunk_size}, run size {args.run_size}):")
+    print(f"  {'tickers':>8}  {'in memory':>28}  {'bounded':>28}")
+    for size in args.sizes:
+        cells = [f"{growth(size, mode):6.1f} MB (peak {results[size, mode]['peak_mb']:4.0f}) "
+                 f"{results[size, mode]['seconds']:5.1f}s" for mode in ("memory", "bounded")]
+        print(f"  {size:>8}  {cells[0]:>28}  {cells[1]:>28}")
+    sys.exit(1 if problems else 0)
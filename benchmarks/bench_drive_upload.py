@@ -0,0 +1,145 @@
+import argparse
+import contextlib
+import gzip
+import io
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from fake_drive import FakeDrive, FakeHttpError, FakeMedia
+import parquet_io
+import upload_to_drive
+from upload_to_drive import CHUNK_ALIGNMENT, DriveUploader, make_upload
+
+# Runs the uploader against fake_drive.FakeDrive: batch create, skip when
+# unchanged, update in place with and without the id cache, resumption after
+# failed chunks, recreate after a remote delete, gzip and Parquet payloads.
+
+OUTPUTS = ("warrensoutputfile.json", "combined_output.json", "sentiment/eu_snapshot.json")
+
+
+def _uploader(drive, chunk_size):
+    return DriveUploader(drive, folder_id="folder", chunk_size=chunk_size, backoff_s=0, media_factory=FakeMedia,
+                         sleep=lambda s: None)
+
+
+def _quiet(fn):
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        result = fn()
+    return result, out.getvalue()
+
+
+def _stored(drive, name):
+    return [entry for entry in drive.stored.values() if entry["name"] == name]
+
+
+def run_checks(workdir, chunk_size):
+    problems = []
+    for name in OUTPUTS:
+        (workdir / name).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(REPO_ROOT / name, workdir / name)
+    uploads = [make_upload(name) for name in OUTPUTS]
+
+    drive = FakeDrive()
+    results, _ = _quiet(lambda: _uploader(drive, chunk_size).upload_all(uploads))
+    if [r.status for r in results] != ["created"] * 3 or len(drive.stored) != 3:
+        problems.append(f"batch create: {[r.status for r in results]}, {len(drive.stored)} files")
+    for name in OUTPUTS:
+        if _stored(drive, Path(name).name)[0]["content"] != (workdir / name).read_bytes():
+            problems.append(f"batch create: {name} content differs")
+
+    results, _ = _quiet(lambda: _uploader(drive, chunk_size).upload_all(uploads))
+    if [r.status for r in results] != ["unchanged"] * 3 or drive.create_calls + drive.update_calls != 3:
+        problems.append(f"unchanged rerun: {[r.status for r in results]}")
+
+    # Changed content, then again without the id cache (a fresh CI runner).
+    with open(workdir / OUTPUTS[0], "a") as f:
+        f.write("\n")
+    for drop_cache in (False, True):
+        if drop_cache:
+            os.remove(upload_to_drive.UPLOAD_STATE_FILE)
+            with open(workdir / OUTPUTS[0], "a") as f:
+                f.write("\n")
+        lists = drive.list_calls
+        results, _ = _quiet(lambda: _uploader(drive, chunk_size).upload_all(uploads[:1]))
+        if results[0].status != "updated" or len(_stored(drive, OUTPUTS[0])) != 1:
+            problems.append(f"update in place (cache dropped: {drop_cache}): {results[0]}")
+        if (drive.list_calls > lists) != drop_cache:
+            problems.append(f"name lookup (cache dropped: {drop_cache}): {drive.list_calls - lists} list calls")
+        if _stored(drive, OUTPUTS[0])[0]["content"] != (workdir / OUTPUTS[0]).read_bytes():
+            problems.append(f"update in place (cache dropped: {drop_cache}): content differs")
+
+    # Failed chunks: a 503 and a dropped connection in the middle of a file
+    # several chunks long.
+    big = workdir / "history_export.json"
+    big.write_bytes(b"[" + b",".join(b'{"ticker": "T%05d", "mentions": %d}' % (i, i) for i in range(60000)) + b"]")
+    size = big.stat().st_size
+    _quiet(lambda: _uploader(drive, chunk_size).upload(make_upload(big.name)))
+    drive.faults = {drive.chunk_calls + 2: FakeHttpError(503), drive.chunk_calls + 4: ConnectionError("reset")}
+    sent = drive.bytes_sent
+    result, _ = _quiet(lambda: _uploader(drive, chunk_size).upload(make_upload(big.name), force=True))
+    resent = drive.bytes_sent - sent - size
+    if result.status != "updated" or _stored(drive, big.name)[0]["content"] != big.read_bytes():
+        problems.append(f"resumed upload: {result}")
+    if resent > 2 * chunk_size:
+        problems.append(f"resumed upload: re-sent {resent} bytes for two failed chunks")
+    print(f"  {size / 1024:.0f} KB in {chunk_size // 1024} KB chunks with 2 failed chunks: {resent / 1024:.0f} KB re-sent "
+          f"(a non-resumable upload would have re-sent {2 * size / 1024:.0f} KB)")
+
+    drive.faults = {drive.chunk_calls + 1: FakeHttpError(403)}
+    calls = drive.chunk_calls
+    try:
+        _quiet(lambda: _uploader(drive, chunk_size).upload(make_upload(big.name), force=True))
+        problems.append("non-retryable error: upload reported success")
+    except FakeHttpError:
+        if drive.chunk_calls != calls + 1:
+            problems.append(f"non-retryable error was retried ({drive.chunk_calls - calls} chunk calls)")
+
+    # Deleted on Drive since the id was cached.
+    _quiet(lambda: _uploader(drive, chunk_size).upload(make_upload(OUTPUTS[2]), force=True))
+    del drive.stored[upload_to_drive.load_json(upload_to_drive.UPLOAD_STATE_FILE)["eu_snapshot.json"]["id"]]
+    result, _ = _quiet(lambda: _uploader(drive, chunk_size).upload(make_upload(OUTPUTS[2]), force=True))
+    if result.status != "created" or len(_stored(drive, "eu_snapshot.json")) != 1:
+        problems.append(f"recreate after remote delete: {result}")
+
+    size = (workdir / OUTPUTS[1]).stat().st_size
+    result, _ = _quiet(lambda: _uploader(drive, chunk_size).upload(make_upload(OUTPUTS[1], "gzip")))
+    stored = _stored(drive, "combined_output.json.gz")
+    if result.status != "created" or gzip.decompress(stored[0]["content"]) != (workdir / OUTPUTS[1]).read_bytes():
+        problems.append(f"gzip payload: {result}")
+    else:
+        print(f"  gzip payload: {size / 1024:.0f} KB -> {len(stored[0]['content']) / 1024:.0f} KB")
+
+    if parquet_io.pa is not None:
+        import pyarrow.parquet as pq
+        result, _ = _quiet(lambda: _uploader(drive, chunk_size).upload(make_upload(OUTPUTS[1], "parquet")))
+        stored = _stored(drive, "combined_output.parquet")
+        expected = len(upload_to_drive.load_json(workdir / OUTPUTS[1]))
+        if result.status != "created" or pq.read_table(io.BytesIO(stored[0]["content"])).num_rows != expected:
+            problems.append(f"parquet payload: {result}")
+        else:
+            print(f"  parquet payload: {size / 1024:.0f} KB -> {len(stored[0]['content']) / 1024:.0f} KB")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check upload_to_drive.py against an in-memory Drive API.")
+    parser.add_argument("--chunk-size-kb", type=int, default=CHUNK_ALIGNMENT // 1024)
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            problems = run_checks(Path(tmp), args.chunk_size_kb * 1024)
+        finally:
+            os.chdir(cwd)
+    print(f"Drive upload checks: {len(problems)} problems.")
+    for problem in problems:
+        print(f"  {problem}")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,113 @@
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "sentiment"))
+
+from eu_prices import fetch_close_panel
+
+UNIVERSE_CSV = Path(__file__).resolve().parent.parent / "sentiment" / "eu_tickers.csv"
+
+
+# Offline stand-in for Yahoo: deterministic closes per ticker, one simulated
+# round trip per request, some tickers that always fail and chunks that fail
+# transiently the first time they are requested.
+class StubYahoo:
+    def __init__(self, latency_s=0.05, bad_tickers=(), empty_tickers=(), flaky_calls=(0,), days=15):
+        self.latency_s = latency_s
+        self.bad_tickers = set(bad_tickers)
+        self.empty_tickers = set(empty_tickers)
+        self.flaky_calls = set(flaky_calls)
+        self.days = days
+        self.calls = 0
+
+    def closes(self, ticker):
+        rng = np.random.default_rng(sum(map(ord, ticker)))
+        # .CO tickers trade on a different calendar: a gap mid-window.
+        index = pd.bdate_range("2025-03-03", periods=self.days + 1, tz="Europe/Berlin")
+        values = 100 + np.cumsum(rng.normal(size=self.days + 1))
+        series = pd.Series(values, index=index)
+        return series.drop(index[5]) if ticker.endswith(".CO") else series.iloc[1:]
+
+    def history(self, ticker):
+        # Old path: one request per ticker.
+        time.sleep(self.latency_s)
+        if ticker in self.bad_tickers:
+            raise RuntimeError(f"{ticker}: No data found, symbol may be delisted")
+        if ticker in self.empty_tickers:
+            return pd.Series(dtype=float)
+        return self.closes(ticker)
+
+    def fetcher(self, tickers, period, start=None):
+        # New path: one request per chunk.
+        call = self.calls
+        self.calls += 1
+        time.sleep(self.latency_s)
+        if call in self.flaky_calls:
+            raise ConnectionError("simulated network error")
+        closes = {t: self.closes(t) for t in tickers if t not in self.bad_tickers | self.empty_tickers}
+        errors = {t: f"{t}: No data found, symbol may be delisted" for t in tickers if t in self.bad_tickers}
+        frame = pd.DataFrame(closes)
+        frame.index = frame.index.tz_localize(None)
+        return frame, errors
+
+
+def sequential_reference(stub, tickers):
+    closes, failed = {}, {}
+    for ticker in tickers:
+        try:
+            closes[ticker] = stub.history(ticker)
+        except Exception as e:
+            failed[ticker] = str(e)
+    return closes, failed
+
+
+def check(panel, failures, closes, failed):
+    problems = []
+    if set(failures) != set(failed):
+        problems.append(f"failures differ: batched {sorted(failures)}, sequential {sorted(failed)}")
+    for ticker, series in closes.items():
+        expected = series.tolist()
+        actual = panel[ticker].dropna().tolist() if ticker in panel.columns else []
+        if expected != actual:
+            problems.append(f"{ticker}: closes differ")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline check and timing of the batched EU price fetch.")
+    parser.add_argument("--tickers", type=int, default=0, help="Synthetic universe size (default: eu_tickers.csv).")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Simulated round-trip time per request.")
+    parser.add_argument("--chunk-size", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.tickers:
+        tickers = [f"T{i:05d}.DE" if i % 7 else f"T{i:05d}.CO" for i in range(args.tickers)]
+    else:
+        tickers = list(dict.fromkeys(pd.read_csv(UNIVERSE_CSV)["ticker"]))
+    stub = StubYahoo(latency_s=args.latency_ms / 1000, bad_tickers=tickers[3::29], empty_tickers=tickers[5::31])
+
+    started = time.perf_counter()
+    closes, failed = sequential_reference(stub, tickers)
+    sequential_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        panel, failures = fetch_close_panel(tickers, chunk_size=args.chunk_size, backoff_s=0.0, fetcher=stub.fetcher)
+    batched_s = time.perf_counter() - started
+
+    problems = check(panel, failures, closes, failed)
+    print(f"{len(tickers)} tickers, {len(failed)} failing, {args.latency_ms:.0f} ms per request, "
+          f"first chunk fails once: {len(problems)} mismatches.")
+    for problem in problems[:20]:
+        print(f"  {problem}")
+    print(f"  one history() per ticker   {sequential_s * 1000:8.1f} ms")
+    print(f"  chunked download           {batched_s * 1000:8.1f} ms ({stub.calls} requests)")
+
+    sys.exit(1 if problems else 0)
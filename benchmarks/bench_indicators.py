@@ -0,0 +1,114 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "sentiment"))
+
+from indicators import calculate_rsi, compute_indicators, last_valid, rsi
+
+
+def synthetic_panel(tickers, days, seed=7, gap_rate=0.03):
+    # Random-walk closes on a shared business-day index, with per-ticker
+    # holiday gaps and late listings like an aligned multi-exchange download.
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2024-01-01", periods=days)
+    steps = rng.normal(0, 0.015, size=(days, tickers))
+    closes = 100 * np.exp(np.cumsum(steps, axis=0))
+    closes[rng.random((days, tickers)) < gap_rate] = np.nan
+    listed = rng.integers(0, days, size=tickers)
+    late = rng.random(tickers) < 0.1
+    for col in np.flatnonzero(late):
+        closes[:listed[col], col] = np.nan
+    closes[:, 0] = np.round(closes[:, 0])  # flat stretches: zero deltas
+    return pd.DataFrame(closes, index=index, columns=[f"T{i:05d}" for i in range(tickers)])
+
+
+def rsi_parity(panel, period=14, full_series_columns=20):
+    # Latest RSI for every ticker, and the whole series for a few, must match
+    # calculate_rsi() on that ticker's own price list.
+    problems = []
+    latest = last_valid(rsi(panel, period))
+    for ticker in panel.columns:
+        prices = panel[ticker].dropna().tolist()
+        expected = calculate_rsi(prices, period) if len(prices) >= period + 1 else None
+        actual = latest[ticker]
+        actual = None if np.isnan(actual) else round(float(actual), 2)
+        if expected != actual:
+            problems.append(f"{ticker} latest: scalar {expected}, vectorized {actual}")
+
+    series = rsi(panel[panel.columns[:full_series_columns]], period)
+    for ticker in series.columns:
+        valid = panel[ticker].dropna()
+        values = series[ticker].loc[valid.index].tolist()
+        prices = valid.tolist()
+        for end in range(len(prices)):
+            expected = calculate_rsi(prices[:end + 1], period) if end >= period else None
+            actual = None if np.isnan(values[end]) else round(values[end], 2)
+            if expected != actual:
+                problems.append(f"{ticker} @ {valid.index[end].date()}: scalar {expected}, vectorized {actual}")
+    return problems
+
+
+def pandas_reference(close):
+    # Straightforward per-ticker pandas versions of the other indicators.
+    out = {"Mom": {}, "MACD.macd": {}, "MACD.signal": {}, "CCI20": {}}
+    for ticker in close.columns:
+        prices = close[ticker].dropna()
+        macd_line = prices.ewm(span=12, adjust=False).mean() - prices.ewm(span=26, adjust=False).mean()
+        sma = prices.rolling(20).mean()
+        mean_dev = prices.rolling(20).apply(lambda w: np.abs(w - w.mean()).mean(), raw=True)
+        out["Mom"][ticker] = prices - prices.shift(10)
+        out["MACD.macd"][ticker] = macd_line
+        out["MACD.signal"][ticker] = macd_line.ewm(span=9, adjust=False).mean()
+        out["CCI20"][ticker] = (prices - sma) / (0.015 * mean_dev)
+    return {name: pd.DataFrame(columns).reindex(close.index) for name, columns in out.items()}
+
+
+def other_parity(panel):
+    problems = []
+    indicators = compute_indicators(panel)
+    for name, expected in pandas_reference(panel).items():
+        actual = indicators[name][expected.columns]
+        if not np.allclose(actual.to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-9, equal_nan=True):
+            problems.append(f"{name} differs from the per-ticker pandas reference")
+    return problems
+
+
+def _best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parity check and benchmark for the vectorized indicators.")
+    parser.add_argument("--tickers", type=int, default=2000, help="Tickers in the benchmark panel.")
+    parser.add_argument("--days", type=int, default=21, help="Trading days per ticker (the snapshot uses 21).")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    check_panel = synthetic_panel(300, 120)
+    problems = rsi_parity(check_panel) + other_parity(check_panel.iloc[:, :50])
+    print(f"Parity check on {check_panel.shape[1]} tickers x {check_panel.shape[0]} days: {len(problems)} mismatches.")
+    for problem in problems[:20]:
+        print(f"  {problem}")
+
+    panel = synthetic_panel(args.tickers, args.days)
+    lists = [panel[t].dropna().tolist() for t in panel.columns]
+    scalar = _best_of(lambda: [calculate_rsi(p) for p in lists if len(p) >= 15], args.repeat)
+    vectorized = _best_of(lambda: last_valid(rsi(panel)), args.repeat)
+    everything = _best_of(lambda: compute_indicators(panel), args.repeat)
+    print(f"\nLatest RSI for {args.tickers} tickers x {args.days} days (best of {args.repeat}):")
+    print(f"  calculate_rsi per ticker   {scalar * 1000:8.1f} ms")
+    print(f"  rsi() on the panel         {vectorized * 1000:8.1f} ms")
+    print(f"  all indicators, full series {everything * 1000:7.1f} ms")
+
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,92 @@
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import json_io
+
+# Each mode runs in its own interpreter so peak RSS (ru_maxrss) is its own.
+# "write" modes produce the file the matching "read" modes consume.
+
+
+def option_records(rows):
+    # Options-activity shaped records, generated one at a time.
+    for i in range(rows):
+        yield {
+            "ticker": f"T{i % 5000:04d}", "shares_closed_at_price": 100.0 + i % 97, "side": "call" if i % 2 else "put",
+            "expiration": "12-19-2025", "dte": i % 60, "updated": "06-27-2025", "strike": 95.0 + i % 50,
+            "last": 1.25, "bid": 1.2, "ask": 1.3, "volume": 1000 + i, "oi": 50 + i % 700, "iv_(percent)": 31.5,
+            "delta": 0.42, "otm_(percent)": 3.1, "est._total_premium": 125000.0 + i,
+        }
+
+
+def run_mode(mode, path, rows):
+    if mode == "baseline":
+        return 0
+    if mode == "json.dump":
+        records = list(option_records(rows))
+        with open(path, "w") as f:
+            json.dump(records, f, indent=2)
+        return len(records)
+    if mode in ("json_io.write_records", "json_io.write_records ndjson"):
+        return json_io.write_records(path, option_records(rows))
+    if mode == "json.load":
+        with open(path) as f:
+            return len(json.load(f))
+    if mode in ("json_io.iter_records", "json_io.iter_records ndjson"):
+        return sum(1 for _ in json_io.iter_records(path))
+    raise ValueError(mode)
+
+
+MODES = (
+    ("baseline", None),
+    ("json.dump", "legacy.json"),
+    ("json_io.write_records", "streamed.json"),
+    ("json_io.write_records ndjson", "streamed.ndjson"),
+    ("json.load", "legacy.json"),
+    ("json_io.iter_records", "streamed.json"),
+    ("json_io.iter_records ndjson", "streamed.ndjson"),
+)
+
+
+def _child(mode, path, rows):
+    started = time.perf_counter()
+    count = run_mode(mode, path, rows)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"count": count, "seconds": elapsed, "peak_kb": peak_kb}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Peak RSS and wall time: json.dump/json.load vs json_io.")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child[0], args.child[1], args.rows)
+        sys.exit(0)
+
+    print(f"orjson: {'yes' if json_io.orjson else 'no'}, ijson: {json_io.ijson.backend if json_io.ijson else 'no'}")
+    print(f"{args.rows} option records\n")
+    print(f"  {'mode':30s} {'wall':>9s} {'peak RSS':>10s} {'file':>9s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline_kb = None
+        for mode, name in MODES:
+            path = str(Path(tmp) / name) if name else ""
+            out = subprocess.run([sys.executable, __file__, "--rows", str(args.rows), "--child", mode, path],
+                                 capture_output=True, text=True, check=True)
+            result = json.loads(out.stdout)
+            if mode == "baseline":
+                baseline_kb = result["peak_kb"]
+                print(f"  {'interpreter + imports':30s} {'':>9s} {baseline_kb / 1024:8.1f}MB")
+                continue
+            size = Path(path).stat().st_size / 1024 / 1024
+            print(f"  {mode:30s} {result['seconds']:8.2f}s {result['peak_kb'] / 1024:8.1f}MB {size:7.1f}MB")
@@ -0,0 +1,184 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from merge_engine import WARREN_SOURCE, SourceAdapter, merge_sorted, merge_sources, swaggy_rows, swaggy_stream
+
+EU_SNAPSHOT_JSON = REPO_ROOT / "sentiment" / "eu_snapshot.json"
+SENTIMENT_JSON = REPO_ROOT / "sentiment" / "swaggystocks_sentiment.json"
+
+
+def legacy_merge(warren_data, swaggy_data, eu_snapshot):
+    # The three loops merge_sentiment.py ran before merge_engine.py, kept as
+    # the reference for the layouts they understood (flat Warren list with
+    # "ticker", sentiment list with "symbol").
+    combined = {}
+    for stock in warren_data:
+        ticker = stock.get("ticker")
+        if not ticker:
+            continue
+        combined[ticker] = {
+            "ticker": ticker,
+            "name": stock.get("name"),
+            "price": stock.get("price"),
+            "percentChange": stock.get("percentChange"),
+            "volume": stock.get("volume"),
+            "rsi": stock.get("rsi"),
+            "pe": stock.get("pe"),
+            "sector": stock.get("sector"),
+            "dividendYield": stock.get("dividendYield"),
+            "source": "warren",
+        }
+    for entry in swaggy_data:
+        if not isinstance(entry, dict):
+            continue
+        ticker = entry.get("symbol")
+        if not ticker:
+            continue
+        if ticker not in combined:
+            combined[ticker] = {"ticker": ticker}
+        combined[ticker]["swaggy_mentions"] = entry.get("mentions")
+        combined[ticker]["swaggy_sentiment"] = entry.get("sentiment")
+    for ticker, data in eu_snapshot.items():
+        if not isinstance(data, dict):
+            continue
+        if ticker not in combined:
+            combined[ticker] = {"ticker": ticker}
+        for key in ["price", "percentChange", "rsi", "oversold", "country", "inPortfolio", "sector"]:
+            if key not in combined[ticker] or combined[ticker][key] is None:
+                combined[ticker][key] = data.get(key)
+        combined[ticker]["source"] = combined[ticker].get("source", "eu_snapshot")
+    return combined
+
+
+def legacy_inputs(tickers):
+    eu_snapshot = json.loads(EU_SNAPSHOT_JSON.read_text())
+    eu_tickers = [t for t in eu_snapshot if not t.startswith("_")]
+    warren = [
+        {"ticker": f"W{i:05d}", "name": f"Company {i}", "price": 10.0 + i, "percentChange": (i % 13) - 6.0,
+         "volume": 1000 * i, "rsi": None if i % 4 == 0 else 30.0 + i % 40, "pe": None, "sector": "Tech",
+         "dividendYield": None}
+        for i in range(tickers)
+    ]
+    # Some EU tickers are also Warren rows with gaps the snapshot fills.
+    warren += [{"ticker": t, "name": t, "price": None, "rsi": None, "sector": None} for t in eu_tickers[::3]]
+    sentiment = [{"symbol": f"W{i:05d}", "mentions": i % 500, "sentiment": "bullish"} for i in range(0, tickers, 7)]
+    sentiment += [{"symbol": t, "mentions": 3} for t in eu_tickers[1::5]]
+    sentiment += ["garbage", {"mentions": 4}]
+    # Repeated tickers: the old loops kept the last row.
+    warren += [dict(stock, price=stock["price"] + 1, rsi=None) for stock in warren[:tickers:50]]
+    sentiment += [{"symbol": f"W{i:05d}", "mentions": 1, "sentiment": "bearish"} for i in range(0, tickers, 70)]
+    return warren, sentiment, eu_snapshot
+
+
+def fill_duplicates_check():
+    # A "fill" source's later row replaces what its earlier row filled, never
+    # what an earlier source set.
+    extra = SourceAdapter("extra", "extra.json", swaggy_rows, swaggy_stream, ticker_keys=("symbol",),
+                          fields={"price": ("price",), "sector": ("sector",)})
+    loaded = {
+        "warren": [{"ticker": "A", "price": 10.0}, {"ticker": "B", "price": None}],
+        "extra": [{"symbol": "A", "price": 1.0, "sector": "Tech"}, {"symbol": "B", "price": 1.0},
+                  {"symbol": "A", "price": 2.0, "sector": "Energy"}, {"symbol": "B", "price": 2.0}],
+    }
+    sources = (WARREN_SOURCE, extra)
+    expected = {"A": (10.0, "Energy"), "B": (2.0, None)}
+    problems = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        combined, _ = merge_sources(sources, loaded)
+        records, _ = merge_sorted(sources, loaded)
+        streamed = dict(records)
+    for label, result in (("merge_sources", combined), ("merge_sorted", streamed)):
+        got = {ticker: (record.get("price"), record.get("sector")) for ticker, record in result.items()}
+        if got != expected:
+            problems.append(f"fill duplicates ({label}): got {got}, expected {expected}")
+    return problems
+
+
+def tradingview_inputs(tickers):
+    # scrapeRSI.js layout with the swaggy_scraper.py output.
+    row = lambda i, preset: {"category": preset, "name": f"T{i:05d}", "description": f"Company {i}", "close": 10.0 + i,
+                             "change": -1.5, "volume": 1000 * i, "RSI": 41.2, "price_earnings_ttm": 18.0,
+                             "sector": "Finance", "dividends_yield_current": 1.2}
+    warren = {
+        "america": {"large_cap": [row(i, "large_cap") for i in range(tickers)],
+                    "losers": [row(i, "losers") for i in range(0, tickers, 10)] + [None]},
+        "germany": {"large_cap": [row(tickers + i, "large_cap") for i in range(100)]},
+    }
+    swaggy = json.loads(SENTIMENT_JSON.read_text())
+    return warren, swaggy
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn()
+    return result, time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parity check and scaling benchmark for merge_engine.py.")
+    parser.add_argument("--tickers", type=int, default=50000)
+    args = parser.parse_args()
+
+    problems = []
+    warren, sentiment, eu_snapshot = legacy_inputs(2000)
+    expected = legacy_merge(warren, sentiment, eu_snapshot)
+    combined, report = merge_sources(loaded={"warren": warren, "swaggy": sentiment, "eu_snapshot": eu_snapshot})
+    if combined != expected:
+        differing = [t for t in expected if combined.get(t) != expected[t]] + [t for t in combined if t not in expected]
+        problems.append(f"legacy layouts: {len(differing)} tickers differ from the old merge, e.g. {differing[:5]}")
+    if report.sources["swaggy"]["malformed"] != 2:
+        problems.append(f"legacy layouts: expected 2 malformed sentiment rows, got {report.sources['swaggy']['malformed']}")
+
+    problems += fill_duplicates_check()
+
+    warren, swaggy = tradingview_inputs(2000)
+    combined, report = merge_sources(loaded={"warren": warren, "swaggy": swaggy, "eu_snapshot": eu_snapshot})
+    first = combined.get("T00000", {})
+    if (first.get("name"), first.get("price"), first.get("rsi"), first.get("source")) != ("Company 0", 10.0, 41.2, "warren"):
+        problems.append(f"TradingView layout: unexpected T00000 record {first}")
+    stats = report.sources["warren"]
+    if (stats["rows"], stats["duplicates"], stats["malformed"]) != (2301, 200, 1):
+        problems.append(f"TradingView layout: unexpected warren stats {stats}")
+    tsla = combined.get("TSLA", {})
+    if tsla.get("swaggy_mentions") is None:
+        problems.append("swaggy_scraper.py layout: TSLA mentions not merged")
+
+    # Same inputs through the streaming readers (files in a scratch directory).
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            os.mkdir("sentiment")
+            for path, data in (("stockdata.json", warren), ("sentiment/swaggystocks_sentiment.json", swaggy),
+                               ("sentiment/eu_snapshot.json", eu_snapshot)):
+                with open(path, "w") as f:
+                    json.dump(data, f)
+            streamed, streamed_report = merge_sources()
+        finally:
+            os.chdir(cwd)
+    if streamed != combined or streamed_report.as_dict() != report.as_dict():
+        problems.append("streamed inputs merge differently from parsed inputs")
+
+    print(f"Merge checks: {len(problems)} problems.")
+    for problem in problems:
+        print(f"  {problem}")
+
+    warren, sentiment, eu_snapshot = legacy_inputs(args.tickers)
+    _, legacy_s = _timed(lambda: legacy_merge(warren, sentiment, eu_snapshot))
+    _, engine_s = _timed(lambda: merge_sources(loaded={"warren": warren, "swaggy": sentiment, "eu_snapshot": eu_snapshot}))
+    print(f"\nMerging {len(warren)} Warren rows, {len(sentiment)} sentiment rows, {len(eu_snapshot)} EU rows:")
+    print(f"  legacy loops        {legacy_s * 1000:8.1f} ms")
+    print(f"  merge_engine        {engine_s * 1000:8.1f} ms")
+
+    sys.exit(1 if problems else 0)
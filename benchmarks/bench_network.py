@@ -0,0 +1,90 @@
+import argparse
+import contextlib
+import io
+import math
+import sys
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "sentiment"))
+
+import fixtures
+from options_index import CONTRACT_FIELDS
+from swaggy_network import (RECORDED_PAGE_NAME, option_records_from_payload, records_from_recordings,
+                            sentiment_records_from_payload)
+from swaggy_scraper import _parse_options_html, _parse_sentiment_html
+
+# Checks the API field mapping of swaggy_network.py on recorded sessions: the
+# records mapped from a session's responses must equal the DOM parse of the
+# page recorded in the same session. Record one per dashboard with
+#
+#   python sentiment/swaggy_scraper.py --record-responses benchmarks/recorded/network/<session>
+#
+# Until a recording passes, --network stays experimental. Numbers may differ
+# by the page's display rounding ("$6.65K" for 6652.4).
+
+DISPLAY_TOLERANCE = 0.01
+KINDS = {
+    "sentiment": (sentiment_records_from_payload, _parse_sentiment_html, ("ticker",)),
+    "options": (option_records_from_payload, _parse_options_html, CONTRACT_FIELDS),
+}
+
+
+def _same(a, b):
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)) and not isinstance(a, bool):
+        return math.isclose(a, b, rel_tol=DISPLAY_TOLERANCE, abs_tol=DISPLAY_TOLERANCE)
+    return a == b
+
+
+def compare(mapped, parsed, key_fields):
+    # Problems, plus how many DOM values each output field got wrong.
+    key = lambda record: tuple(str(record.get(field)).upper() for field in key_fields)
+    by_key = {}
+    for record in mapped:
+        by_key.setdefault(key(record), []).append(record)
+    problems, wrong_fields = [], Counter()
+    missing = 0
+    for record in parsed:
+        candidates = by_key.get(key(record))
+        if not candidates:
+            missing += 1
+            continue
+        api = candidates.pop(0)
+        for field, value in record.items():
+            if not _same(api.get(field), value):
+                wrong_fields[field] += 1
+    if missing:
+        problems.append(f"{missing} of {len(parsed)} rendered rows have no API record")
+    extra = sum(len(rest) for rest in by_key.values())
+    if extra:
+        problems.append(f"{extra} API records are not on the page")
+    problems += [f"{field}: {wrong} of {len(parsed)} values differ from the page" for field, wrong in wrong_fields.items()]
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the API field mapping against recorded sessions.")
+    parser.add_argument("--kind", choices=sorted(KINDS), nargs="+", default=sorted(KINDS))
+    args = parser.parse_args()
+
+    problems = []
+    sessions = 0
+    for kind in args.kind:
+        mapper, parse_html, key_fields = KINDS[kind]
+        for directory in fixtures.recorded_network_sessions(kind):
+            sessions += 1
+            with contextlib.redirect_stdout(io.StringIO()):
+                mapped = records_from_recordings(directory, mapper)
+                parsed = parse_html((directory / RECORDED_PAGE_NAME).read_text(encoding="utf-8"))
+            found = compare(mapped, parsed, key_fields)
+            print(f"{kind} {directory.parent.name}: {len(mapped)} API records, {len(parsed)} rendered rows, "
+                  f"{len(found)} problems.")
+            problems += [f"{kind} {directory.parent.name}: {problem}" for problem in found]
+
+    print(f"API mapping checks on {sessions} recorded sessions: {len(problems)} problems.")
+    for problem in problems:
+        print(f"  {problem}")
+    if not sessions:
+        print(f"  No recordings under {fixtures.RECORDED_DIR / 'network'}: the mapping is unverified "
+              "and --network stays experimental.")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,123 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "sentiment"))
+
+import fixtures
+from options_index import RowKeyIndex
+from options_schema import OptionRowSchema
+from swaggy_scraper import (HARVEST_BATCH_JS, HARVEST_OBSERVER_JS, HARVEST_RESET_JS, POLL_COLUMN_ENDS_JS,
+                            PREDEFINED_OPTION_HEADERS, PlaywrightTimeout, _parse_option_row_batch, _poll_new_rows)
+
+# Offline check of the intraday poll's stop rule (swaggy_scraper._poll_new_rows)
+# on a fake options page. "Updated" shows only a date, so the rows of one day
+# tie on the sort key and the table may list new rows of the newest day below
+# ones the poller already has. Every new row must be picked up, and reading
+# should stop at the first row of an older day.
+
+OLD_DAY, DAY, NEXT_DAY = "06-26-2025", "06-27-2025", "06-30-2025"
+
+
+# The page calls _poll_new_rows makes, over a table sorted newest day first
+# that shows page_size more rows per scroll.
+class FakeOptionsPage:
+    def __init__(self, records, page_size):
+        self.html = [fixtures.option_row_html(record) for record in records]
+        self.updated = [record["updated"] for record in records]
+        self.page_size = page_size
+        self.loaded = self.harvested = 0
+
+    @property
+    def first(self):
+        return self
+
+    def locator(self, selector, has_text=None):
+        return self
+
+    async def click(self, timeout=None):
+        pass
+
+    async def reload(self, timeout=None):
+        self.loaded = min(self.page_size, len(self.html))
+        self.harvested = 0
+
+    async def wait_for_selector(self, selector, state=None, timeout=None):
+        pass
+
+    async def wait_for_load_state(self, state=None, timeout=None):
+        pass
+
+    async def wait_for_function(self, script, arg=None, timeout=None):
+        if self.loaded <= arg:
+            raise PlaywrightTimeout("no more rows")
+
+    async def evaluate(self, script, arg=None):
+        if script == HARVEST_RESET_JS:
+            self.harvested = 0
+        elif script == HARVEST_BATCH_JS:
+            batch, self.harvested = self.html[self.harvested:self.loaded], self.loaded
+            return batch
+        elif script == POLL_COLUMN_ENDS_JS:
+            return [self.updated[0], self.updated[self.loaded - 1]]
+        elif script.startswith("window.scrollTo"):
+            self.loaded = min(len(self.html), self.loaded + self.page_size)
+        elif script == HARVEST_OBSERVER_JS or "__warrenHarvest.count" in script:
+            return self.loaded
+        else:
+            raise ValueError(f"Unexpected script: {script[:60]}")
+
+
+def contracts(base, day, count, first_strike):
+    return [dict(record, updated=day, strike=float(first_strike + i), expiration="12-19-2025")
+            for i, record in enumerate(base[:count])]
+
+
+def run_poll(known, table, page_size):
+    # (new rows, rows read) of one poll after `known` was ingested.
+    schema = OptionRowSchema(PREDEFINED_OPTION_HEADERS)
+    with contextlib.redirect_stdout(io.StringIO()):
+        index = RowKeyIndex(_parse_option_row_batch([fixtures.option_row_html(r) for r in known], schema))
+        return asyncio.run(_poll_new_rows(FakeOptionsPage(table, page_size), schema, index))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline check of the options poll's stop rule.")
+    parser.add_argument("--page-size", type=int, default=10, help="Rows the fake table shows per scroll.")
+    args = parser.parse_args()
+
+    base = fixtures.load_option_records(200)
+    older = contracts(base, OLD_DAY, 60, 1000)
+    known_today = contracts(base, DAY, 25, 2000)
+    new_today = contracts(base[100:], DAY, 7, 3000)
+    new_next_day = contracts(base[150:], NEXT_DAY, 4, 4000)
+    known = known_today + older
+
+    # name: (table as sorted by the site, rows the poll must return)
+    cases = {
+        "nothing new": (known_today + older, []),
+        "new rows of the same day below known ones": (known_today + new_today + older, new_today),
+        "new rows of the same day above known ones": (new_today + known_today + older, new_today),
+        "a new day on top, more of the same day below": (new_next_day + known_today + new_today + older,
+                                                         new_next_day + new_today),
+    }
+    problems = []
+    print(f"{'case':<48} {'new':>5} {'read':>6} {'of':>5}")
+    for name, (table, expected) in cases.items():
+        new_rows, read = run_poll(known, table, args.page_size)
+        got = [(row["ticker"], row["strike"], row["updated"]) for row in new_rows]
+        want = [(row["ticker"], row["strike"], row["updated"]) for row in expected]
+        if got != want:
+            problems.append(f"{name}: {len(got)} new rows, expected {len(want)}")
+        # Reading goes on to the first older row, and no more than a page past it.
+        first_older = next(i for i, row in enumerate(table) if row["updated"] == OLD_DAY)
+        if read > first_older + args.page_size:
+            problems.append(f"{name}: read {read} rows, the older day starts at row {first_older}")
+        print(f"{name:<48} {len(got):>5} {read:>6} {len(table):>5}")
+    print(f"Poll stop rule checks: {len(problems)} problems.")
+    for problem in problems:
+        print(f"  {problem}")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,145 @@
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "sentiment"))
+
+import fixtures
+from options_schema import OptionRowSchema, parse_number, to_float, to_int
+from swaggy_parsers import get_parser_backend
+from swaggy_scraper import _parse_option_rows
+
+COLUMN_HEADERS = ["Ticker"] + fixtures.OPTION_HEADERS
+
+
+def legacy_convert_rows(table_rows, column_headers):
+    # The per-cell loop the scraper used before options_schema.py, kept as the
+    # baseline (including its K/M/B handling).
+    options_data = []
+    for ticker_text, cells in table_rows:
+        row_data = {"ticker": ticker_text}
+        for col_idx, value in enumerate(cells):
+            header = column_headers[1 + col_idx]
+            if header in ["Shares Closed @ Price", "Strike", "Last", "Bid", "Ask", "IV (%)", "Delta", "OTM (%)"]:
+                value = value.replace('$', '').replace('%', '').strip()
+                try:
+                    value = float(value)
+                except ValueError:
+                    pass
+            elif header in ["Volume", "OI", "DTE", "Est. Total Premium"]:
+                value = value.replace('K', '000').replace('M', '000000').replace('B', '000000000').replace('$', '').replace(',', '').strip()
+                try:
+                    value = float(value)
+                    if header in ["Volume", "OI", "DTE"]:
+                        value = int(value)
+                except ValueError:
+                    pass
+            row_data[header.lower().replace(' ', '_').replace('@', 'at').replace('%', 'percent')] = value
+        options_data.append(row_data)
+    return options_data
+
+
+# Cell text as the live table shows it, with the value it must convert to.
+# The saved JSON cannot cover these: it holds what the legacy loop made of
+# the cells, so a premium shown as "$6.65K" is saved as 6.65.
+CELL_CASES = [
+    (to_float, "1.5K", 1500.0),
+    (to_float, "$6.65K", 6650.0),
+    (to_float, "$1.08K", 1080.0),
+    (to_float, "2.5M", 2500000.0),
+    (to_float, "-2.5M", -2500000.0),
+    (to_float, "1.2B", 1200000000.0),
+    (to_float, "12.3%", 12.3),
+    (to_float, "$604.27", 604.27),
+    (to_int, "1,234", 1234),
+    (to_int, "1.5K", 1500),
+    (to_int, "-196", -196),
+    (to_float, "N/A", "N/A"),
+    (to_float, "-", "-"),
+    (to_float, "", ""),
+    (to_float, "K", "K"),
+    (to_float, "nan", "nan"),
+    (to_float, "inf", "inf"),
+    (to_float, "-Infinity", "-Infinity"),
+    (to_int, "NaN", "NaN"),
+    (to_float, "infK", "infK"),
+]
+
+
+def cell_check():
+    problems = []
+    for convert, text, expected in CELL_CASES:
+        actual = convert(text)
+        if actual != expected or type(actual) is not type(expected):
+            problems.append(f"{convert.__name__}({text!r}): {actual!r}, expected {expected!r}")
+    return problems
+
+
+def round_trip_check(records, parsed):
+    # The saved JSON re-rendered as cells and parsed again. It was written by
+    # the legacy loop, so this only guards against regressions on the values
+    # it got right (CELL_CASES covers the suffixes it got wrong). The allowed
+    # differences are suffixed numbers it left as strings ("1.08K"), which
+    # must now come out scaled.
+    problems = []
+    fixed = 0
+    for i, (expected, actual) in enumerate(zip(records, parsed)):
+        for key, old in expected.items():
+            new = actual.get(key)
+            if new == old:
+                continue
+            if isinstance(old, str) and parse_number(old) is not None and new == parse_number(old):
+                fixed += 1
+                continue
+            problems.append(f"row {i} {key}: saved {old!r}, parsed {new!r}")
+    if len(records) != len(parsed):
+        problems.append(f"row count: saved {len(records)}, parsed {len(parsed)}")
+    return problems, fixed
+
+
+def _best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Conversion checks and microbenchmark for the options cell converters.")
+    parser.add_argument("--rows", type=int, default=50000, help="Rows for the microbenchmark.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    backend = get_parser_backend()
+
+    problems = cell_check()
+    print(f"Cell conversion: {len(CELL_CASES)} cases, {len(problems)} mismatches.")
+    for problem in problems:
+        print(f"  {problem}")
+
+    records = fixtures.load_option_records()
+    table = backend.option_rows("".join(fixtures.option_row_html(r) for r in records))
+    with contextlib.redirect_stdout(io.StringIO()):
+        parsed = _parse_option_rows(table, OptionRowSchema(COLUMN_HEADERS))
+    round_trip, fixed = round_trip_check(records, parsed)
+    problems += round_trip
+    print(f"Round trip vs {fixtures.OPTIONS_JSON.name}: {len(parsed)} rows, "
+          f"{fixed} suffixed values now parsed, {len(round_trip)} mismatches.")
+    for problem in round_trip[:20]:
+        print(f"  {problem}")
+
+    rows = [table[i % len(table)] for i in range(args.rows)]
+    legacy = _best_of(lambda: legacy_convert_rows(rows, COLUMN_HEADERS), args.repeat)
+    schema = _best_of(lambda: _parse_option_rows(rows, OptionRowSchema(COLUMN_HEADERS)), args.repeat)
+    print(f"\nConverting {args.rows} rows (best of {args.repeat}):")
+    print(f"  legacy per-cell loop   {legacy * 1000:8.1f} ms")
+    print(f"  options_schema         {schema * 1000:8.1f} ms")
+
+    sys.exit(1 if problems else 0)
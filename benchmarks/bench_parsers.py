@@ -0,0 +1,60 @@
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "sentiment"))
+
+import fixtures
+from swaggy_parsers import PARSER_BACKENDS, get_parser_backend
+from swaggy_scraper import _parse_options_html, _parse_sentiment_html
+
+
+def _time(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_page(label, html, parse, backends, repeat):
+    print(f"\n{label} ({len(html) / 1024:.0f} KB)")
+    reference = None
+    for name in backends:
+        get_parser_backend(name)  # compile selectors outside the timed region
+        best, result = _time(lambda: parse(html, name), repeat)
+        if reference is None:
+            reference = result
+        same = "same output" if result == reference else "OUTPUT DIFFERS"
+        print(f"  {name:<10} {best * 1000:9.1f} ms  {len(result):>7} records  {same}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare HTML parser backends on options/sentiment pages.")
+    parser.add_argument("--html", action="append", default=[], metavar="FILE",
+                        help="Recorded options page, e.g. options/debug/<run>/full_options_html.html (repeatable).")
+    parser.add_argument("--rows", type=int, action="append", default=[],
+                        help="Synthetic options page size (repeatable, default: saved JSON size and 10000).")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--backend", action="append", choices=sorted(PARSER_BACKENDS), default=[],
+                        help="Backends to compare (default: all); the first one is the reference output.")
+    args = parser.parse_args()
+
+    backends = args.backend or ["soup", "lxml"]
+
+    for path in args.html:
+        bench_page(f"Recorded page {path}", Path(path).read_text(encoding="utf-8"), _parse_options_html, backends, args.repeat)
+
+    for rows in args.rows or [len(fixtures.load_option_records()), 10000]:
+        html = fixtures.options_page_html(fixtures.load_option_records(rows))
+        bench_page(f"Synthetic options page, {rows} rows", html, _parse_options_html, backends, args.repeat)
+
+    html = fixtures.sentiment_page_html(fixtures.load_sentiment_records())
+    bench_page("Synthetic sentiment page", html, _parse_sentiment_html, backends, args.repeat)
@@ -0,0 +1,106 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from pipeline import Stage, dependencies, run_pipeline
+
+# Runs pipeline.run_pipeline() on stand-in stages (short Python commands in a
+# scratch directory) shaped like the real graph: three independent producers
+# feeding one merge. Checks parallelism, skipping on unchanged inputs,
+# timeouts, retries and blocking downstream of a failure.
+
+
+def _write(path, text, sleep_s):
+    return [sys.executable, "-c", f"import time, pathlib; time.sleep({sleep_s}); pathlib.Path({path!r}).write_text({text!r})"]
+
+
+def _stages(sleep_s, producer_text="v1", eu_command=None, timeout_s=None, retries=0):
+    return [
+        Stage("warren", command=_write("stockdata.json", producer_text, sleep_s), outputs=("stockdata.json",),
+              external=True),
+        Stage("swaggy", command=_write("sentiment.json", "s", sleep_s), outputs=("sentiment.json",), external=True),
+        Stage("eu_snapshot", command=eu_command or _write("eu.json", "e", sleep_s), outputs=("eu.json",),
+              external=True, timeout_s=timeout_s, retries=retries),
+        Stage("merge", command=[sys.executable, "-c", "import pathlib; pathlib.Path('combined.json').write_text("
+                                "''.join(pathlib.Path(p).read_text() for p in ('stockdata.json', 'sentiment.json', 'eu.json')))"],
+              inputs=("stockdata.json", "sentiment.json", "eu.json"), outputs=("combined.json",)),
+    ]
+
+
+def _run(stages, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return run_pipeline(stages, backoff_s=0, **kwargs)
+
+
+def _statuses(report):
+    return {name: result["status"] for name, result in report["stages"].items()}
+
+
+def run_checks(sleep_s):
+    problems = []
+    graph = dependencies(_stages(sleep_s))
+    if graph["merge"] != {"warren", "swaggy", "eu_snapshot"} or graph["warren"]:
+        problems.append(f"graph: {graph}")
+    try:
+        dependencies([Stage("a", command=["true"], inputs=("b",), outputs=("a",)),
+                      Stage("b", command=["true"], inputs=("a",), outputs=("b",))])
+        problems.append("cycle not rejected")
+    except ValueError:
+        pass
+
+    report = _run(_stages(sleep_s))
+    serial = 3 * sleep_s
+    if _statuses(report) != dict.fromkeys(("warren", "swaggy", "eu_snapshot", "merge"), "ok"):
+        problems.append(f"first run: {_statuses(report)}")
+    if report["seconds"] >= serial:
+        problems.append(f"producers did not overlap: {report['seconds']:.2f}s for three {sleep_s}s stages")
+    print(f"  three {sleep_s}s producers + merge: {report['seconds']:.2f}s (serial: over {serial:.1f}s)")
+
+    report = _run(_stages(sleep_s))
+    if report["stages"]["merge"]["status"] != "skipped":
+        problems.append(f"unchanged inputs: merge {report['stages']['merge']['status']}")
+    report = _run(_stages(sleep_s, producer_text="v2"))
+    if report["stages"]["merge"]["status"] != "ok" or Path("combined.json").read_text() != "v2se":
+        problems.append(f"changed input: merge {report['stages']['merge']['status']}")
+    report = _run(_stages(sleep_s, producer_text="v2"), force=True)
+    if report["stages"]["merge"]["status"] != "ok":
+        problems.append("force: merge was skipped")
+
+    report = _run(_stages(sleep_s, eu_command=[sys.executable, "-c", "import time; time.sleep(30)"], timeout_s=sleep_s))
+    eu, merge = report["stages"]["eu_snapshot"], report["stages"]["merge"]
+    if eu["status"] != "timeout" or eu["seconds"] > sleep_s + 2 or merge["status"] != "blocked" or report["ok"]:
+        problems.append(f"timeout: eu_snapshot {eu}, merge {merge}")
+
+    # Fails on the first attempt, succeeds on the second.
+    flaky = [sys.executable, "-c", "import pathlib, sys; p = pathlib.Path('attempted'); "
+                                   "sys.exit(0) if p.exists() else (p.touch(), sys.exit(3))"]
+    report = _run(_stages(sleep_s, eu_command=flaky, retries=1))
+    eu = report["stages"]["eu_snapshot"]
+    if (eu["status"], eu["attempts"]) != ("ok", 2):
+        problems.append(f"retry: eu_snapshot {eu}")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check pipeline.py scheduling on stand-in stages.")
+    parser.add_argument("--sleep", type=float, default=0.5, help="Seconds each producer stage takes.")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            problems = run_checks(args.sleep)
+        finally:
+            os.chdir(cwd)
+    print(f"Pipeline checks: {len(problems)} problems.")
+    for problem in problems:
+        print(f"  {problem}")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,103 @@
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "sentiment"))
+
+from eu_prices import fetch_close_panel
+from indicators import last_valid, rsi
+from price_cache import PriceCache
+
+UNIVERSE_CSV = Path(__file__).resolve().parent.parent / "sentiment" / "eu_tickers.csv"
+
+
+# Offline market: a fixed close per ticker and business day. The fetcher
+# returns what Yahoo would for period / start as of `today`, and counts the
+# bars it sends.
+class StubMarket:
+    def __init__(self, tickers, first_day="2024-06-03", days=400):
+        rng = np.random.default_rng(11)
+        index = pd.bdate_range(first_day, periods=days)
+        self.closes = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.015, (days, len(tickers))), axis=0)),
+                                   index=index, columns=tickers)
+        self.today = index[0].date()
+        self.requests = 0
+        self.bars_sent = 0
+
+    def fetcher(self, tickers, period, start=None):
+        self.requests += 1
+        first = start if start is not None else self.today - timedelta(days=int(period.rstrip("d")))
+        window = self.closes.loc[str(first):str(self.today), list(tickers)]
+        self.bars_sent += int(window.count().sum())
+        return window, {}
+
+
+    def adjust(self, ticker, before, factor):
+        # A split or dividend: Yahoo rescales every close before the ex-date.
+        self.closes.loc[self.closes.index < pd.Timestamp(before), ticker] *= factor
+
+
+def snapshot_values(panel):
+    return last_valid(panel).round(2), last_valid(rsi(panel)).round(2)
+
+
+def compare(cache, cached, uncached, tickers, now, lookback_days):
+    # Refreshes the cache as of `now` and compares its window with a full
+    # download: the snapshot values and every close.
+    cached.today = uncached.today = now.date()
+    since = now.date() - timedelta(days=lookback_days)
+    with contextlib.redirect_stdout(io.StringIO()):
+        failed = cache.refresh(tickers, lookback_days=lookback_days, now=now, fetcher=cached.fetcher)
+        from_cache = cache.load_panel(tickers, since)
+        direct, _ = fetch_close_panel(tickers, period=f"{lookback_days}d", fetcher=uncached.fetcher)
+    problems = [f"{now.date()}: unexpected failures {failed}"] if failed else []
+    for name, a, b in zip(("price", "rsi"), snapshot_values(from_cache), snapshot_values(direct)):
+        if not a.equals(b):
+            problems.append(f"{now.date()}: {name} from cache differs from a full download")
+    if from_cache.shape != direct.shape or not np.allclose(from_cache, direct, equal_nan=True):
+        problems.append(f"{now.date()}, {lookback_days}-day lookback: cached closes differ from a full download")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline check and traffic count for the EU price cache.")
+    parser.add_argument("--days", type=int, default=20, help="Consecutive daily runs to simulate.")
+    parser.add_argument("--lookback-days", type=int, default=21)
+    args = parser.parse_args()
+
+    tickers = list(dict.fromkeys(pd.read_csv(UNIVERSE_CSV)["ticker"]))
+    cached, uncached = StubMarket(tickers), StubMarket(tickers)
+    run_day = datetime(2025, 3, 3, 7, 0)
+    problems = []
+
+    with tempfile.TemporaryDirectory() as tmp, PriceCache(str(Path(tmp) / "cache.sqlite")) as cache:
+        for day in range(args.days):
+            problems += compare(cache, cached, uncached, tickers, run_day + timedelta(days=day), args.lookback_days)
+        bars_sent, requests = (cached.bars_sent, uncached.bars_sent), (cached.requests, uncached.requests)
+
+        # A dividend on one ticker and a split on another, effective today:
+        # the cached history of both is stale and must be downloaded again.
+        now = run_day + timedelta(days=args.days)
+        for market in (cached, uncached):
+            market.adjust(tickers[0], now.date(), 0.98)
+            market.adjust(tickers[1], now.date(), 0.5)
+        problems += compare(cache, cached, uncached, tickers, now, args.lookback_days)
+        # A longer lookback the same day backfills every ticker.
+        problems += compare(cache, cached, uncached, tickers, now, 3 * args.lookback_days)
+
+    print(f"{len(tickers)} tickers, {args.days} daily runs, {args.lookback_days}-day lookback, then a re-adjustment "
+          f"and a longer lookback: {len(problems)} mismatches.")
+    for problem in problems[:20]:
+        print(f"  {problem}")
+    print(f"  full window every run   {bars_sent[1]:8d} bars in {requests[1]} requests")
+    print(f"  incremental cache       {bars_sent[0]:8d} bars in {requests[0]} requests "
+          f"({bars_sent[1] / max(bars_sent[0], 1):.1f}x fewer bars)")
+
+    sys.exit(1 if problems else 0)
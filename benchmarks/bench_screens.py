@@ -0,0 +1,114 @@
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from screening import OVERSOLD_RSI, Screens, build_screens
+
+# Checks every screen in screening.Screens against a linear scan over the
+# merged records and options rows it was built from, then times both on a
+# synthetic universe.
+
+
+def synthetic_inputs(tickers, option_rows, seed=11):
+    rng = np.random.default_rng(seed)
+    merged = []
+    for i in range(tickers):
+        record = {"ticker": f"T{i:06d}", "rsi": round(float(rng.uniform(5, 95)), 2),
+                  "percentChange": round(float(rng.normal(0, 4)), 2), "inPortfolio": i % 250 == 0}
+        if i % 3 == 0:
+            record["swaggy_mentions"] = int(rng.integers(0, 2000))
+        if i % 17 == 0:
+            record["rsi"] = None
+        merged.append((record["ticker"], record))
+    options = [{"ticker": f"T{int(t):06d}", "side": "call" if c else "put", "strike": float(k * 5),
+                "expiration": "12-19-2025", "updated": f"06-{d:02d}-2025", "volume": int(v),
+                "est._total_premium": float(p), "iv_(percent)": float(iv)}
+               for t, c, k, d, v, p, iv in zip(rng.integers(0, tickers, option_rows), rng.random(option_rows) < 0.6,
+                                               rng.integers(1, 40, option_rows), rng.integers(23, 28, option_rows),
+                                               rng.integers(1, 5000, option_rows), rng.exponential(50000, option_rows),
+                                               rng.uniform(0.1, 3, option_rows))]
+    # Poll-mode re-observations: the same contract with newer figures, some on the same date.
+    for i in range(0, option_rows, 7):
+        row = options[i]
+        options.append(dict(row, updated="06-27-2025" if i % 2 else row["updated"], volume=row["volume"] + 100,
+                            **{"est._total_premium": row["est._total_premium"] * 1.5}))
+    return merged, options
+
+
+def _updated_key(value):
+    month, day, year = value.split("-")
+    return year, month, day
+
+
+def scan_screens(merged, options, n, min_mentions):
+    # The linear scans consumers ran before the indexes, on the newest
+    # observation of each contract (a stable sort by date, the last row wins).
+    records = dict(merged)
+    latest = {}
+    for row in sorted(options, key=lambda r: _updated_key(r["updated"])):
+        latest[row["ticker"], row["side"], row["expiration"], row["strike"]] = row
+    calls, puts, portfolio = {}, {}, set()
+    for row in latest.values():
+        (calls if row["side"] == "call" else puts).setdefault(row["ticker"], []).append(row)
+    premium = lambda rows: sum(r["est._total_premium"] for r in rows)
+    call_premium = {t: premium(rows) for t, rows in calls.items()}
+    top_calls = sorted(call_premium, key=lambda t: (call_premium[t], t), reverse=True)[:n]
+    oversold = sorted((t for t, r in records.items() if r.get("rsi") is not None and r["rsi"] < OVERSOLD_RSI
+                       and r.get("swaggy_mentions") is not None and r["swaggy_mentions"] > min_mentions))
+    unusual = set(calls) | set(puts)
+    portfolio = sorted(t for t, r in records.items() if r.get("inPortfolio") and t in unusual)
+    return top_calls, oversold, portfolio
+
+
+def index_screens(screens, n, min_mentions):
+    return ([t for t, _, _ in screens.top_premium_calls(n)], sorted(screens.oversold(min_mentions)),
+            sorted(screens.portfolio_unusual()))
+
+
+def _best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parity check and timing of the screening indexes.")
+    parser.add_argument("--tickers", type=int, default=100000)
+    parser.add_argument("--option-rows", type=int, default=200000)
+    parser.add_argument("--min-mentions", type=int, default=100)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    merged, options = synthetic_inputs(args.tickers, args.option_rows)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        screens = Screens(build_screens(merged, options))
+    build_s = time.perf_counter() - started
+
+    expected = scan_screens(merged, options, args.top, args.min_mentions)
+    actual = index_screens(screens, args.top, args.min_mentions)
+    problems = [f"{name}: scan {len(e)} tickers, index {len(a)}"
+                for name, e, a in zip(("top calls", "oversold", "portfolio"), expected, actual) if e != a]
+    print(f"Screens on {args.tickers} tickers, {args.option_rows} option rows: {len(problems)} problems.")
+    for problem in problems:
+        print(f"  {problem}")
+
+    scan_s = _best_of(lambda: scan_screens(merged, options, args.top, args.min_mentions), args.repeat)
+    index_s = _best_of(lambda: index_screens(screens, args.top, args.min_mentions), args.repeat)
+    print(f"  build aggregates + indexes  {build_s * 1000:9.1f} ms (once per merge)")
+    print(f"  three screens, linear scan  {scan_s * 1000:9.1f} ms")
+    print(f"  three screens, indexes      {index_s * 1000:9.1f} ms")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,372 @@
+import argparse
+import contextlib
+import copy
+import io
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+sys.path[:0] = [str(REPO_ROOT), str(REPO_ROOT / "sentiment")]
+
+import fixtures
+import json_io
+from bench_eu_fetch import StubYahoo
+from bench_indicators import synthetic_panel
+from change_detection import write_output
+from eu_prices import fetch_close_panel, yfinance_fetcher
+from eu_snapshot import build_snapshot, load_universe
+from indicators import calculate_rsi, last_valid, rsi
+from merge_engine import DEFAULT_SOURCES, merge_index, merge_sorted
+from options_schema import OptionRowSchema
+from swaggy_parsers import get_parser_backend
+from swaggy_scraper import _parse_option_rows, _parse_options_html, _parse_sentiment_html
+
+# Offline benchmark suite, stage by stage, on saved fixtures:
+#
+#   sentiment    card parser on recorded pages and a synthetic page
+#   options      whole-page parse and the row parser alone, recorded pages and
+#                synthetic 10k/100k-row pages
+#   eu_snapshot  chunked fetch replayed from recorded yfinance frames (or a
+#                stub), calculate_rsi per ticker, rsi() on the panel, build_snapshot
+#   merge        merge_index on warrensoutputfile.json + sentiment + eu_snapshot.json,
+#                and merge_index / merge_sorted on a synthetic universe
+#   json         write_records / write_mapping / write_json / write_output
+#
+# Every run is saved to RESULTS_DIR as <timestamp>.json (commit, Python and
+# library versions, and per case the best and median time over --repeat runs)
+# and compared with the previous saved run. `compare` compares any two. Times
+# only compare on one machine, so RESULTS_DIR is kept out of git.
+#
+#   python benchmarks/bench_suite.py run [--stage options merge] [--memory]
+#   python benchmarks/bench_suite.py compare [BASE.json [NEW.json]] [--threshold 0.1]
+#   python benchmarks/bench_suite.py record --options-html options/debug/<run>/full_options_html.html
+#   python benchmarks/bench_suite.py record --yfinance        # needs network, once
+#
+# "fixture" in the results says whether a case ran on a recording or on
+# synthetic data; only cases with the same stage, name and fixture are compared.
+
+RESULTS_DIR = BENCH_DIR / "results"
+STAGES = ("sentiment", "options", "eu_snapshot", "merge", "json")
+DEFAULT_ROWS = (10000, 100000)
+DEFAULT_MERGE_TICKERS = 10000
+DEFAULT_RSI_TICKERS = 2000
+DEFAULT_THRESHOLD = 0.10
+LIBRARIES = ("pandas", "numpy", "lxml", "bs4", "orjson", "ijson", "pyarrow")
+
+# items: what one run processes (rows, tickers, records), for per-item rates.
+Case = namedtuple("Case", "stage name fixture items fn")
+
+
+def _quiet(fn):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn()
+
+
+def _label(rows):
+    return f"{rows // 1000}k" if rows % 1000 == 0 else str(rows)
+
+
+def _with_path(adapter, path):
+    adapter = copy.copy(adapter)
+    adapter.path = str(path)
+    return adapter
+
+
+# === Cases per stage ===
+def sentiment_cases(args, scratch):
+    for path in fixtures.recorded_pages("sentiment"):
+        html = path.read_text(encoding="utf-8")
+        yield Case("sentiment", f"cards.parse[{path.name}]", "recorded", None, lambda html=html: _parse_sentiment_html(html))
+    records = fixtures.load_sentiment_records()
+    html = fixtures.sentiment_page_html(records)
+    yield Case("sentiment", f"cards.parse[{len(records)}]", "synthetic", len(records), lambda: _parse_sentiment_html(html))
+    records = [records[i % len(records)] for i in range(1000)]
+    html = fixtures.sentiment_page_html(records)
+    yield Case("sentiment", "cards.parse[1k]", "synthetic", len(records), lambda: _parse_sentiment_html(html))
+
+
+def _row_parser_case(name, fixture, html):
+    # The row parser alone: cells already extracted by the backend.
+    table = _quiet(lambda: get_parser_backend().option_table(html))
+    if table is None:
+        return None
+    headers, rows = table
+    schema = OptionRowSchema(headers)
+    return Case("options", name, fixture, len(rows), lambda: _parse_option_rows(rows, schema))
+
+
+def options_cases(args, scratch):
+    for path in fixtures.recorded_pages("options"):
+        html = path.read_text(encoding="utf-8")
+        yield Case("options", f"page.parse[{path.name}]", "recorded", None, lambda html=html: _parse_options_html(html))
+        case = _row_parser_case(f"rows.parse[{path.name}]", "recorded", html)
+        if case:
+            yield case
+    for rows in args.rows:
+        html = fixtures.options_page_html(fixtures.load_option_records(rows))
+        yield Case("options", f"page.parse[{_label(rows)}]", "synthetic", rows, lambda html=html: _parse_options_html(html))
+        case = _row_parser_case(f"rows.parse[{_label(rows)}]", "synthetic", html)
+        if case:
+            yield case
+
+
+def eu_snapshot_cases(args, scratch):
+    universe = load_universe(str(fixtures.EU_TICKERS_CSV))
+    tickers = list(dict.fromkeys(universe["ticker"]))
+    fetcher, fixture = fixtures.recorded_fetcher(), "recorded"
+    if fetcher is None:
+        fetcher, fixture = StubYahoo(latency_s=0, flaky_calls=(), days=21).fetcher, "synthetic"
+    panel, failed = _quiet(lambda: fetch_close_panel(tickers, backoff_s=0, fetcher=fetcher))
+
+    yield Case("eu_snapshot", "fetch_close_panel[replay]", fixture, len(tickers),
+               lambda: fetch_close_panel(tickers, backoff_s=0, fetcher=fetcher))
+    prices = [panel[t].dropna().tolist() for t in panel.columns]
+    prices = [p for p in prices if len(p) >= 15]
+    yield Case("eu_snapshot", "calculate_rsi[universe]", fixture, len(prices), lambda: [calculate_rsi(p) for p in prices])
+    yield Case("eu_snapshot", "rsi[universe]", fixture, panel.shape[1], lambda: last_valid(rsi(panel)))
+    yield Case("eu_snapshot", "build_snapshot[universe]", fixture, len(universe),
+               lambda: build_snapshot(universe, panel, failed))
+
+    wide = synthetic_panel(args.rsi_tickers, 21)
+    wide_prices = [p for p in (wide[t].dropna().tolist() for t in wide.columns) if len(p) >= 15]
+    label = _label(args.rsi_tickers)
+    yield Case("eu_snapshot", f"calculate_rsi[{label}]", "synthetic", len(wide_prices),
+               lambda: [calculate_rsi(p) for p in wide_prices])
+    yield Case("eu_snapshot", f"rsi[{label}]", "synthetic", wide.shape[1], lambda: last_valid(rsi(wide)))
+
+
+def _synthetic_merge_inputs(tickers, directory):
+    # Warren rows for every ticker, sentiment for every 10th and an EU
+    # snapshot overlapping a quarter of them, in the files' real layouts.
+    directory.mkdir(parents=True, exist_ok=True)
+    warren = ({"ticker": f"T{i:06d}", "name": f"Company {i}", "price": 10.0 + i % 500, "percentChange": (i % 21) - 10.0,
+               "volume": 1000.0 * i, "rsi14": 20.0 + i % 60, "peRatio": 5.0 + i % 40, "sector": "Technology",
+               "divYieldTTM": None} for i in range(tickers))
+    sentiment = {"wallstreetbets_sentiment": [{"ticker": f"T{i:06d}", "mentions": i % 300}
+                                              for i in range(0, tickers, 10)]}
+    snapshot = ((f"T{i:06d}", {"name": f"Company {i}", "country": "DE", "sector": "Industrials", "price": 20.0,
+                               "percentChange": 0.5, "rsi": 45.0, "oversold": False, "inPortfolio": i % 97 == 0})
+                for i in range(0, tickers, 4))
+    paths = directory / "warren.json", directory / "sentiment.json", directory / "eu_snapshot.json"
+    json_io.write_records(paths[0], warren)
+    json_io.write_json(paths[1], sentiment)
+    json_io.write_mapping(paths[2], snapshot)
+    return paths
+
+
+def merge_cases(args, scratch):
+    recorded = [_with_path(adapter, path) for adapter, path in
+                zip(DEFAULT_SOURCES, (fixtures.WARREN_JSON, fixtures.SENTIMENT_JSON, fixtures.EU_SNAPSHOT_JSON))]
+    index, _ = merge_index(recorded)
+    yield Case("merge", "merge_index[saved outputs]", "recorded", len(index), lambda: merge_index(recorded))
+
+    paths = _synthetic_merge_inputs(args.merge_tickers, scratch / "merge")
+    synthetic = [_with_path(adapter, path) for adapter, path in zip(DEFAULT_SOURCES, paths)]
+    yield Case("merge", f"merge_index[{_label(args.merge_tickers)}]", "synthetic", args.merge_tickers,
+               lambda: merge_index(synthetic))
+    # The memory-bounded join (merge_sentiment --bounded), runs spilled to the scratch directory.
+    yield Case("merge", f"merge_sorted[{_label(args.merge_tickers)}]", "synthetic", args.merge_tickers,
+               lambda: sum(1 for _ in merge_sorted(synthetic, directory=scratch / "merge")[0]))
+
+
+def json_cases(args, scratch):
+    out = scratch / "json"
+    out.mkdir(parents=True, exist_ok=True)
+    rows = args.rows[0]
+    records = fixtures.load_option_records(rows)
+    yield Case("json", f"write_records[options {_label(rows)}]", "synthetic", rows,
+               lambda: json_io.write_records(out / "options.json", records))
+    yield Case("json", f"write_records[options {_label(rows)}, ndjson]", "synthetic", rows,
+               lambda: json_io.write_records(out / "options.ndjson", records))
+
+    sources = [_with_path(adapter, path) for adapter, path in
+               zip(DEFAULT_SOURCES, (fixtures.WARREN_JSON, fixtures.SENTIMENT_JSON, fixtures.EU_SNAPSHOT_JSON))]
+    index, _ = merge_index(sources)
+    yield Case("json", "write_mapping[merged]", "recorded", len(index),
+               lambda: json_io.write_mapping(out / "combined.json", index.iter_records()))
+    snapshot = json_io.load_json(fixtures.EU_SNAPSHOT_JSON)
+    yield Case("json", "write_json[eu_snapshot]", "recorded", len(snapshot),
+               lambda: json_io.write_json(out / "eu_snapshot.json", snapshot))
+    # After the first run the content matches: this times the hash-and-skip path.
+    yield Case("json", "write_output[merged, unchanged]", "recorded", len(index),
+               lambda: write_output(out / "combined_output.json", "mapping", index.iter_records, delta=True))
+
+
+CASES = {
+    "sentiment": sentiment_cases,
+    "options": options_cases,
+    "eu_snapshot": eu_snapshot_cases,
+    "merge": merge_cases,
+    "json": json_cases,
+}
+
+
+# === Running and storing ===
+def _size(result):
+    if isinstance(result, tuple):
+        result = result[0]
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+def measure(case, repeat, memory=False):
+    times, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = _quiet(case.fn)
+        times.append(time.perf_counter() - started)
+    entry = {"stage": case.stage, "name": case.name, "fixture": case.fixture,
+             "items": case.items if case.items is not None else _size(result),
+             "best_s": round(min(times), 6), "median_s": round(statistics.median(times), 6), "runs": repeat}
+    if memory:
+        # A separate run: tracemalloc slows the code it traces.
+        tracemalloc.start()
+        _quiet(case.fn)
+        entry["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return entry
+
+
+def _git(*argv):
+    try:
+        return subprocess.run(["git", *argv], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _versions():
+    versions = {}
+    for name in LIBRARIES:
+        try:
+            versions[name] = getattr(__import__(name), "__version__", "?")
+        except ImportError:
+            versions[name] = None
+    return versions
+
+
+def run_suite(stages, args):
+    run = {
+        "run": datetime.utcnow().strftime("%Y%m%dT%H%M%S"),
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "libraries": _versions(),
+        "repeat": args.repeat,
+        "cases": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for stage_name in stages:
+            print(f"\n▶️ {stage_name}")
+            for case in CASES[stage_name](args, Path(tmp)):
+                entry = measure(case, args.repeat, args.memory)
+                run["cases"].append(entry)
+                memory = f"  {entry['peak_bytes'] / 1024 / 1024:7.1f} MB" if "peak_bytes" in entry else ""
+                items = f"{entry['items']:>8}" if entry["items"] is not None else " " * 8
+                print(f"  {entry['best_s'] * 1000:10.1f} ms  {items}  {entry['fixture']:<9}  {entry['name']}{memory}")
+    return run
+
+
+def saved_runs():
+    return sorted(RESULTS_DIR.glob("*.json"))
+
+
+def compare(base, new, threshold=DEFAULT_THRESHOLD):
+    # Prints new vs base per case; returns the cases slower by more than threshold.
+    print(f"\n📋 {new['run']} ({new['commit']}) vs {base['run']} ({base['commit']})")
+    before = {(c["stage"], c["name"], c["fixture"]): c for c in base["cases"]}
+    regressions = []
+    for case in new["cases"]:
+        old = before.get((case["stage"], case["name"], case["fixture"]))
+        if old is None or not old["best_s"]:
+            print(f"  {'new':>8}   {case['stage']}/{case['name']}")
+            continue
+        ratio = case["best_s"] / old["best_s"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  ⚠️ slower"
+            regressions.append(f"{case['stage']}/{case['name']}: {ratio:.2f}x")
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(f"  {ratio:7.2f}x  {case['stage']}/{case['name']}  "
+              f"{old['best_s'] * 1000:.1f} -> {case['best_s'] * 1000:.1f} ms{flag}")
+    return regressions
+
+
+def record(args):
+    for path in args.options_html:
+        print(f"✅ Recorded {fixtures.record_page('options', path)}")
+    for path in args.sentiment_html:
+        print(f"✅ Recorded {fixtures.record_page('sentiment', path)}")
+    if args.yfinance:
+        tickers = list(dict.fromkeys(load_universe(str(fixtures.EU_TICKERS_CSV))["ticker"]))
+        recorder = fixtures.RecordingFetcher(yfinance_fetcher)
+        panel, failed = fetch_close_panel(tickers, fetcher=recorder)
+        print(f"✅ Recorded {recorder.chunks} yfinance chunks ({panel.shape[1]} tickers, {len(failed)} failed) "
+              f"to {recorder.directory}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline, stage-by-stage benchmarks with stored, comparable results.")
+    commands = parser.add_subparsers(dest="command")
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks (the default).")
+    run_parser.add_argument("--stage", nargs="+", choices=STAGES, default=list(STAGES))
+    run_parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS),
+                            help="Synthetic options page sizes; the first is also used for the JSON writers.")
+    run_parser.add_argument("--merge-tickers", type=int, default=DEFAULT_MERGE_TICKERS)
+    run_parser.add_argument("--rsi-tickers", type=int, default=DEFAULT_RSI_TICKERS)
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--memory", action="store_true", help="Also record tracemalloc peak memory per case.")
+    run_parser.add_argument("--no-save", action="store_true", help=f"Do not store the results in {RESULTS_DIR}.")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    compare_parser = commands.add_parser("compare", help="Compare two stored runs (default: the last two).")
+    compare_parser.add_argument("runs", nargs="*", metavar="RUN.json", help="BASE [NEW]; NEW defaults to the latest.")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="Relative slowdown reported as a regression.")
+    compare_parser.add_argument("--fail-on-regression", action="store_true")
+
+    record_parser = commands.add_parser("record", help="Save fixtures for offline replay.")
+    record_parser.add_argument("--options-html", nargs="+", default=[], metavar="FILE")
+    record_parser.add_argument("--sentiment-html", nargs="+", default=[], metavar="FILE")
+    record_parser.add_argument("--yfinance", action="store_true",
+                               help="Download the EU universe once and save every chunk (needs network).")
+
+    args = parser.parse_args(sys.argv[1:] or ["run"])
+
+    if args.command == "record":
+        record(args)
+        sys.exit(0)
+
+    if args.command == "compare":
+        runs = [Path(p) for p in args.runs]
+        stored = saved_runs()
+        if len(runs) < 2:
+            runs = (runs or stored[-2:-1]) + stored[-1:]
+        if len(runs) < 2:
+            print("⚠️ Need two stored runs to compare.")
+            sys.exit(1)
+        regressions = compare(json_io.load_json(runs[0]), json_io.load_json(runs[1]), args.threshold)
+        print(f"\n{len(regressions)} regressions over {args.threshold:.0%}.")
+        sys.exit(1 if regressions and args.fail_on_regression else 0)
+
+    previous = saved_runs()
+    run = run_suite(args.stage, args)
+    if not args.no_save:
+        path = RESULTS_DIR / f"{run['run']}.json"
+        json_io.write_json(path, run)
+        print(f"\n🗄️ Results saved to {path}")
+    if previous:
+        compare(json_io.load_json(previous[-1]), run, args.threshold)
@@ -0,0 +1,103 @@
+import itertools
+import re
+
+# In-memory stand-in for the parts of the Drive v3 API upload_to_drive.py
+# uses: files().list/create/update with resumable chunked media. Faults can
+# be injected per chunk to exercise retries and resumption.
+
+
+class FakeHttpError(Exception):
+    # Shaped like googleapiclient.errors.HttpError: error.resp.status.
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.resp = type("Response", (), {"status": status})()
+
+
+class FakeMedia:
+    def __init__(self, path, mimetype, chunksize):
+        self.path = path
+        self.mimetype = mimetype
+        self.chunksize = chunksize
+
+
+class _Progress:
+    def __init__(self, sent, total):
+        self.sent = sent
+        self.total = total
+
+    def progress(self):
+        return self.sent / self.total if self.total else 1.0
+
+
+class _Request:
+    def __init__(self, execute):
+        self.execute = execute
+
+
+class _UploadRequest:
+    def __init__(self, drive, media, finish):
+        self.drive = drive
+        self.media = media
+        self.finish = finish
+        with open(media.path, "rb") as f:
+            self.content = f.read()
+        self.offset = 0
+
+    def next_chunk(self):
+        self.drive.chunk_calls += 1
+        fault = self.drive.faults.pop(self.drive.chunk_calls, None)
+        end = min(self.offset + self.media.chunksize, len(self.content))
+        if fault is not None:
+            # The chunk went out but was not acknowledged.
+            self.drive.bytes_sent += end - self.offset
+            raise fault
+        self.drive.bytes_sent += end - self.offset
+        self.offset = end
+        if self.offset < len(self.content):
+            return _Progress(self.offset, len(self.content)), None
+        return None, {"id": self.finish(self.content)}
+
+
+class FakeFiles:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def list(self, q, **kwargs):
+        self.drive.list_calls += 1
+        name = re.search(r"name = '((?:[^'\\]|\\.)*)'", q).group(1).replace("\\'", "'").replace("\\\\", "\\")
+        folder = re.search(r"'([^']*)' in parents", q).group(1)
+        matches = [{"id": file_id, "name": entry["name"]} for file_id, entry in self.drive.stored.items()
+                   if entry["name"] == name and folder in entry["parents"]]
+        return _Request(lambda: {"files": list(reversed(matches))[:kwargs.get("pageSize", 100)]})
+
+    def create(self, body, media_body, fields=None):
+        def finish(content):
+            self.drive.create_calls += 1
+            file_id = f"file{next(self.drive.ids)}"
+            self.drive.stored[file_id] = {"name": body["name"], "parents": body.get("parents", []),
+                                         "mimetype": media_body.mimetype, "content": content}
+            return file_id
+        return _UploadRequest(self.drive, media_body, finish)
+
+    def update(self, fileId, media_body, fields=None):
+        if fileId not in self.drive.stored:
+            raise FakeHttpError(404)
+
+        def finish(content):
+            self.drive.update_calls += 1
+            self.drive.stored[fileId].update(content=content, mimetype=media_body.mimetype)
+            return fileId
+        return _UploadRequest(self.drive, media_body, finish)
+
+
+class FakeDrive:
+    # Drop-in for the service returned by upload_to_drive.build_service().
+    # faults: {n: exception} raised on the n-th next_chunk() call overall.
+    def __init__(self, faults=None):
+        self.stored = {}
+        self.faults = dict(faults or {})
+        self.ids = itertools.count(1)
+        self.list_calls = self.create_calls = self.update_calls = self.chunk_calls = self.bytes_sent = 0
+
+    def files(self):
+        return FakeFiles(self)
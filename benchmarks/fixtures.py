@@ -0,0 +1,152 @@
+import json
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+# Synthetic SwaggyStocks pages in the same markup the scrapers see, rebuilt
+# from the saved JSON outputs. Useful wherever a recorded page
+# (--debug-artifacts always) isn't at hand.
+#
+# Recorded fixtures live under RECORDED_DIR and are replayed offline:
+#   recorded/options/*.html     options pages (options/debug/<run>/full_options_html.html)
+#   recorded/sentiment/*.html   sentiment pages
+#   recorded/yfinance/chunk-NNN.csv (+ .errors.json)   one yfinance download per chunk
+#   recorded/network/<session>/{sentiment,options}/    API responses + page.html
+#       (swaggy_scraper.py --record-responses recorded/network/<session>)
+# bench_suite.py record fills them; without them the suite uses synthetic data.
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RECORDED_DIR = Path(__file__).resolve().parent / "recorded"
+OPTIONS_JSON = REPO_ROOT / "options" / "unusual_options_activity.json"
+SENTIMENT_JSON = REPO_ROOT / "sentiment" / "swaggystocks_sentiment.json"
+WARREN_JSON = REPO_ROOT / "warrensoutputfile.json"
+EU_SNAPSHOT_JSON = REPO_ROOT / "sentiment" / "eu_snapshot.json"
+EU_TICKERS_CSV = REPO_ROOT / "sentiment" / "eu_tickers.csv"
+
+OPTION_HEADERS = [
+    "Shares Closed @ Price", "Side", "Expiration", "DTE", "Updated", "Strike", "Last", "Bid", "Ask",
+    "Volume", "OI", "IV (%)", "Delta", "OTM (%)", "Est. Total Premium"
+]
+
+
+def _cell(text):
+    return f'<div class="styles_info__8BsWp"><p class="styles_value__Qx1pZ">{text}</p></div>'
+
+
+def option_row_html(record):
+    values = [
+        f"${record['shares_closed_at_price']}", record["side"], record["expiration"], record["dte"],
+        record["updated"], f"${record['strike']}", f"${record['last']}", f"${record['bid']}", f"${record['ask']}",
+        record["volume"], record["oi"], f"{record['iv_(percent)']}%", record["delta"],
+        f"{record['otm_(percent)']}%", f"${record['est._total_premium']}",
+    ]
+    return ('<div class="styles_container__IuRgX styles_path__ng9lW">'
+            f'<div class="styles_sticky__Wn0aC"><p class="styles_name__M_BGb">{record["ticker"]}</p></div>'
+            + "".join(_cell(v) for v in values) + "</div>")
+
+
+def options_page_html(records):
+    header = ('<div class="styles_container__IuRgX styles_header__XI6EA styles_sortable__3o7wg">'
+              '<div class="styles_sticky__Wn0aC"><p class="styles_name__M_BGb">Ticker</p></div>'
+              + "".join(_cell(h) for h in OPTION_HEADERS) + "</div>")
+    rows = "".join(option_row_html(r) for r in records)
+    return ('<html><head><title>Unusual Options Activity</title></head><body>'
+            '<div class="styles_content__uVpvM"><div class="styles_entries__dTOx1">'
+            + header + rows + "</div></div></body></html>")
+
+
+def sentiment_card_html(record):
+    return ('<div class="styles_card__4HWKI">'
+            f'<p class="styles_name__fT9wO">{record["ticker"]}</p>'
+            f'<p class="styles_mentions__YtuyJ">{record["mentions"]}<!-- --> Mentions</p>'
+            f'<p class="styles_entry__UNrRv">Earnings: {record["earnings"]}</p>'
+            f'<p class="styles_entry__UNrRv">Market Cap: {record["market_cap"]}</p>'
+            f'<p class="styles_entry__UNrRv">Call-To-Put OI Ratio: {record["call_to_put_oi_ratio"]}</p>'
+            f'<p class="styles_entry__UNrRv">30-Day IV: {record["thirty_day_iv"]}</p>'
+            f'<p class="styles_entry__UNrRv">Option Activity (7d): {record["option_activity_7d"]}</p>'
+            "</div>")
+
+
+def sentiment_page_html(records):
+    return ('<html><body><div class="styles_grid__k3s8A">'
+            + "".join(sentiment_card_html(r) for r in records) + "</div></body></html>")
+
+
+def load_option_records(rows=None):
+    # The saved options output, repeated/truncated to `rows` records.
+    with open(OPTIONS_JSON, "r") as f:
+        records = json.load(f)
+    if rows is None:
+        return records
+    return [records[i % len(records)] for i in range(rows)]
+
+
+def load_sentiment_records():
+    with open(SENTIMENT_JSON, "r") as f:
+        data = json.load(f)
+    return data["wallstreetbets_sentiment"] if isinstance(data, dict) else data
+
+
+# === Recorded fixtures ===
+def recorded_pages(kind):
+    # kind: "options" or "sentiment".
+    return sorted((RECORDED_DIR / kind).glob("*.html"))
+
+
+def recorded_network_sessions(kind):
+    # Directories of one --record-responses run for kind ("options" or
+    # "sentiment") that hold both the responses and the rendered page.
+    return sorted(path.parent for path in (RECORDED_DIR / "network").glob(f"*/{kind}/page.html"))
+
+
+def record_page(kind, source, name=None):
+    target = RECORDED_DIR / kind / (name or Path(source).name)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(source, target)
+    return target
+
+
+class RecordingFetcher:
+    # Wraps an eu_prices fetcher and saves each chunk it returns.
+    def __init__(self, fetcher, directory=RECORDED_DIR / "yfinance"):
+        self.fetcher = fetcher
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.chunks = 0
+
+    def __call__(self, tickers, period, start=None):
+        closes, errors = self.fetcher(tickers, period, start=start)
+        stem = self.directory / f"chunk-{self.chunks:03d}"
+        self.chunks += 1
+        closes = closes.copy()
+        if not closes.empty:
+            # Saved by trading date, as fetch_close_panel() aligns them anyway.
+            index = pd.DatetimeIndex(closes.index)
+            closes.index = (index.tz_localize(None) if index.tz is not None else index).normalize()
+        closes.to_csv(stem.with_suffix(".csv"))
+        with open(stem.with_suffix(".errors.json"), "w") as f:
+            json.dump({ticker: error for ticker, error in errors.items() if ticker in tickers}, f, indent=2)
+        return closes, errors
+
+
+def recorded_fetcher(directory=RECORDED_DIR / "yfinance"):
+    # An eu_prices fetcher serving the recorded chunks, or None if there are none.
+    paths = sorted(Path(directory).glob("chunk-*.csv"))
+    if not paths:
+        return None
+    frames, errors = [], {}
+    for path in paths:
+        frame = pd.read_csv(path, index_col=0, parse_dates=True)
+        if not frame.empty:
+            frames.append(frame)
+        errors_path = path.with_suffix(".errors.json")
+        if errors_path.exists():
+            with open(errors_path, "r") as f:
+                errors.update(json.load(f))
+    recorded = pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+    def fetcher(tickers, period, start=None):
+        columns = [t for t in tickers if t in recorded.columns]
+        return recorded[columns].dropna(how="all"), {t: errors[t] for t in tickers if t in errors}
+    return fetcher
@@ -0,0 +1,181 @@
+import hashlib
+import json
+from collections import namedtuple
+from pathlib import Path
+
+from instrumentation import span
+from json_io import iter_mapping, iter_records, load_json, orjson, write_json, write_mapping, write_records
+
+# Content-hash change detection for the stage outputs.
+#
+# write_output() hashes the new content and the output already on disk in a
+# canonical form (keys sorted, compact separators, VOLATILE_KEYS such as the
+# snapshot's "_date" left out), so re-serialization and timestamps do not
+# count as changes. When the digests match the file is not rewritten, which
+# leaves nothing for the workflows to commit or upload. The comparison is
+# against the file itself, so no state has to survive between CI runs.
+#
+# With delta=True the records are also compared per ticker and the
+# difference is written next to the output (<stem>.delta.json):
+#   {"base": old digest, "digest": new digest,
+#    "added": {ticker: record}, "removed": [ticker],
+#    "changed": {ticker: {"set": {field: value}, "unset": [field]}}}
+# Consumers holding the "base" version apply it with apply_delta() instead of
+# reloading the whole output.
+#
+# Layouts: "records" (list of records, json_io.write_records), "mapping"
+# (ticker -> record, json_io.write_mapping) and "document" (one object,
+# json_io.write_json; hashed whole, no delta).
+
+VOLATILE_KEYS = frozenset({"_date"})
+LAYOUTS = ("records", "mapping", "document")
+
+OutputChange = namedtuple("OutputChange", "path changed digest written delta")
+
+
+def canonical(value):
+    # Stable bytes for equal JSON values, whatever produced them.
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def _without(value, ignore):
+    if isinstance(value, dict) and ignore and not ignore.isdisjoint(value):
+        return {k: v for k, v in value.items() if k not in ignore}
+    return value
+
+
+def _scan(layout, content, ignore, key_field, keep):
+    # (sha256 hex digest, {ticker: record} or None) in one pass over content.
+    sha = hashlib.sha256()
+    keyed = {} if keep else None
+    if layout == "document":
+        sha.update(canonical(_without(content, ignore)))
+    elif layout == "mapping":
+        for key, value in content:
+            if key in ignore:
+                continue
+            sha.update(canonical([key, value]))
+            sha.update(b"\n")
+            if keep and isinstance(value, dict):
+                keyed[key] = value
+    else:
+        for record in content:
+            sha.update(canonical(record))
+            sha.update(b"\n")
+            if keep and isinstance(record, dict) and record.get(key_field):
+                keyed.setdefault(record[key_field], record)
+    return sha.hexdigest(), keyed
+
+
+def _read(path, layout, prefix):
+    if layout == "document":
+        return load_json(path)
+    if layout == "mapping":
+        return iter_mapping(path, prefix or "")
+    return iter_records(path, prefix or "item")
+
+
+def _content(content):
+    # Lists are iterated twice as they are; a callable returns a fresh iterable per pass.
+    return content() if callable(content) else content
+
+
+def output_digest(path, layout, prefix=None, ignore=VOLATILE_KEYS):
+    # Digest of an existing output, or None when it is missing or unreadable.
+    if not Path(path).exists():
+        return None
+    try:
+        return _scan(layout, _read(path, layout, prefix), ignore, None, False)[0]
+    except ValueError:
+        return None
+
+
+def ticker_delta(old, new):
+    added, changed = {}, {}
+    for ticker, record in new.items():
+        before = old.get(ticker)
+        if before is None:
+            added[ticker] = record
+        elif before != record:
+            entry = {"set": {field: value for field, value in record.items()
+                             if field not in before or before[field] != value}}
+            unset = [field for field in before if field not in record]
+            if unset:
+                entry["unset"] = unset
+            changed[ticker] = entry
+    removed = [ticker for ticker in old if ticker not in new]
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+def apply_delta(records, delta):
+    # Updates a {ticker: record} dict in place to the delta's new version.
+    for ticker in delta["removed"]:
+        records.pop(ticker, None)
+    for ticker, entry in delta["changed"].items():
+        record = records.setdefault(ticker, {})
+        record.update(entry["set"])
+        for field in entry.get("unset", ()):
+            record.pop(field, None)
+    records.update(delta["added"])
+    return records
+
+
+def delta_path(path):
+    path = Path(path)
+    return path.with_name(f"{path.stem}.delta.json")
+
+
+def write_output(path, layout, content, delta=False, key_field="ticker", prefix=None, ignore=VOLATILE_KEYS):
+    # Writes content unless it matches the existing output. content: a list
+    # (records), list of (key, value) pairs (mapping), an object (document),
+    # or a callable returning a fresh one. prefix: where the records sit in
+    # the existing file, if not at the top level. Returns an OutputChange.
+    with span("write_output", path=str(path)) as timing:
+        change = _write_output(path, layout, content, delta, key_field, prefix, ignore)
+        timing.set(changed=change.changed)
+    return change
+
+
+def _write_output(path, layout, content, delta, key_field, prefix, ignore):
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout '{layout}'. Use one of {LAYOUTS}.")
+    delta = delta and layout != "document"
+    exists = Path(path).exists()
+    old_digest, old = None, None
+    if exists:
+        try:
+            old_digest, old = _scan(layout, _read(path, layout, prefix), ignore, key_field, delta)
+        except ValueError:
+            print(f"⚠️ {path} could not be read; rewriting it.")
+    digest, new = _scan(layout, _content(content), ignore, key_field, delta)
+
+    if digest == old_digest:
+        print(f"⏭️ {path} unchanged ({digest[:12]}), not rewritten.")
+        return OutputChange(path, False, digest, None, None)
+
+    if layout == "document":
+        write_json(path, _content(content))
+        written = 1
+    elif layout == "mapping":
+        written = write_mapping(path, _content(content))
+    else:
+        written = write_records(path, _content(content))
+
+    changes = None
+    if delta:
+        changes = {"base": old_digest, "digest": digest, **ticker_delta(old or {}, new)}
+        write_json(delta_path(path), changes)
+        print(f"🧾 {path}: +{len(changes['added'])} −{len(changes['removed'])} ~{len(changes['changed'])} tickers "
+              f"→ {delta_path(path)}")
+    return OutputChange(path, True, digest, written, changes)
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    # Raw bytes digest, for payloads that are uploaded as they are.
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
@@ -0,0 +1,145 @@
+import argparse
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import parquet_io
+from parquet_io import DATASETS, DEFAULT_ROW_GROUP_SIZE, read_table, write_parquet
+
+# Append-only history of every stage's output, partitioned by dataset and day:
+#
+#   data/<dataset>/date=YYYY-MM-DD/part-<UTC run stamp>.parquet
+#
+# Each run adds one part file to that day's partition and never rewrites
+# older ones. Queries list partition directories first and only open the
+# days they need; within a file the ticker filter skips row groups by their
+# statistics. Rows come back with the partition "date" and the "run" stamp, so
+# several runs on one day can be told apart.
+#
+# data/ is not committed; the daily workflow (.github/workflows/main.yml)
+# carries it between runs in the Actions cache, which GitHub drops after a
+# week without runs.
+
+DEFAULT_ROOT = "data"
+RUN_STAMP_FORMAT = "%Y%m%dT%H%M%S"
+
+
+def _partition_dir(root, dataset, day):
+    return Path(root) / dataset / f"date={day.isoformat()}"
+
+
+def append(dataset, records, when=None, root=DEFAULT_ROOT, metadata=None, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+    # Writes records as a new part of the `when` (UTC now) partition. Returns
+    # the part path, or None when pyarrow is not installed.
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset '{dataset}'. Use one of {sorted(DATASETS)}.")
+    if parquet_io.pa is None:
+        print(f"⚠️ History store skipped for {dataset}: pyarrow is not installed.")
+        return None
+    when = when or datetime.utcnow()
+    path = _partition_dir(root, dataset, when.date()) / f"part-{when.strftime(RUN_STAMP_FORMAT)}.parquet"
+    # Two runs in the same second get distinct parts.
+    suffix = 1
+    while path.exists():
+        path = path.with_name(f"part-{when.strftime(RUN_STAMP_FORMAT)}-{suffix}.parquet")
+        suffix += 1
+    written = write_parquet(path, dataset, records, metadata=metadata, row_group_size=row_group_size)
+    print(f"🗃️ Appended {written} {dataset} rows to {path}")
+    return path
+
+
+def partitions(dataset, start=None, end=None, root=DEFAULT_ROOT):
+    # [(day, partition dir)] sorted by day, limited to start..end (inclusive).
+    base = Path(root) / dataset
+    if not base.is_dir():
+        return []
+    found = []
+    for directory in base.glob("date=*"):
+        try:
+            day = date.fromisoformat(directory.name[len("date="):])
+        except ValueError:
+            continue
+        if (start is None or day >= start) and (end is None or day <= end):
+            found.append((day, directory))
+    return sorted(found)
+
+
+def _run_order(part):
+    # part-<stamp>.parquet, or part-<stamp>-<n>.parquet for the n-th extra run
+    # in the same second: (stamp, n). As plain names "-1" would sort before
+    # ".parquet" and "-10" before "-2".
+    stamp, _, suffix = part.stem[len("part-"):].partition("-")
+    return stamp, int(suffix) if suffix.isdigit() else 0
+
+
+def _parts(directory):
+    # In run order, oldest first.
+    return sorted(directory.glob("part-*.parquet"), key=_run_order)
+
+
+def _read_parts(parts_by_day, columns, filters):
+    pa = parquet_io.pa
+    tables = []
+    for day, part in parts_by_day:
+        table = read_table(part, columns=columns, filters=filters)
+        run = part.stem[len("part-"):]
+        table = table.append_column("date", pa.array([day] * table.num_rows, pa.date32()))
+        table = table.append_column("run", pa.array([run] * table.num_rows, pa.string()))
+        tables.append(table)
+    if not tables:
+        return None
+    return pa.concat_tables(tables)
+
+
+def _frame(table, dataset, columns):
+    if table is not None:
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+    import pandas as pd
+    return pd.DataFrame(columns=list(columns or DATASETS[dataset]) + ["date", "run"])
+
+
+def ticker_history(dataset, ticker, days=30, columns=None, today=None, root=DEFAULT_ROOT):
+    # Every run's rows for one ticker over the last `days` days (today included).
+    parquet_io._require_pyarrow()
+    today = today or datetime.utcnow().date()
+    selected = partitions(dataset, today - timedelta(days=days - 1), today, root)
+    read_columns = None if columns is None else list(dict.fromkeys(["ticker", *columns]))
+    parts = [(day, part) for day, directory in selected for part in _parts(directory)]
+    table = _read_parts(parts, read_columns, [("ticker", "=", ticker)])
+    return _frame(table, dataset, read_columns)
+
+
+def day_snapshot(dataset, day, columns=None, runs="latest", root=DEFAULT_ROOT):
+    # All tickers on one day: the day's last run, or every run with runs="all".
+    parquet_io._require_pyarrow()
+    directory = _partition_dir(root, dataset, day)
+    parts = _parts(directory) if directory.is_dir() else []
+    if runs == "latest":
+        parts = parts[-1:]
+    table = _read_parts([(day, part) for part in parts], columns, None)
+    return _frame(table, dataset, columns)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the partitioned history store.")
+    parser.add_argument("--root", default=DEFAULT_ROOT)
+    parser.add_argument("--dataset", choices=sorted(DATASETS), default="combined")
+    columns_parser = argparse.ArgumentParser(add_help=False)
+    columns_parser.add_argument("--columns", nargs="*", help="Columns to read (default: all).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ticker_parser = commands.add_parser("ticker", parents=[columns_parser], help="One ticker over the last N days.")
+    ticker_parser.add_argument("ticker")
+    ticker_parser.add_argument("--days", type=int, default=30)
+    day_parser = commands.add_parser("day", parents=[columns_parser], help="All tickers on one day.")
+    day_parser.add_argument("day", type=date.fromisoformat)
+    day_parser.add_argument("--all-runs", action="store_true", help="Every run that day, not just the last one.")
+    commands.add_parser("partitions", help="List the stored days.")
+    args = parser.parse_args()
+
+    if args.command == "partitions":
+        for day, directory in partitions(args.dataset, root=args.root):
+            print(f"{day}  {len(_parts(directory))} run(s)  {directory}")
+    elif args.command == "ticker":
+        print(ticker_history(args.dataset, args.ticker, args.days, args.columns, root=args.root).to_string())
+    else:
+        frame = day_snapshot(args.dataset, args.day, args.columns, "all" if args.all_runs else "latest", args.root)
+        print(frame.to_string())
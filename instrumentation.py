@@ -0,0 +1,242 @@
+import argparse
+import asyncio
+import contextvars
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+from json_io import dumps, loads
+
+# Timing spans, counters and opt-in profiling for the scrapers, the EU
+# snapshot and the merge.
+#
+#   with stage("eu_snapshot", metrics_path, profile_dir):   # once per script run
+#       with span("eu.fetch_panel", tickers=92): ...         # or @span("...") on a function
+#       count("options.rows_skipped", reason="header_mismatch")
+#
+# Spans nest (the "path" of a span is its parents' names joined with "/") and
+# follow asyncio tasks and asyncio.to_thread() through contextvars. With a
+# metrics path, every finished span is appended to that file as one JSON line,
+# and the counters plus a stage summary follow when the stage ends:
+#
+#   {"type": "span", "stage": "swaggy", "name": "options.goto", "path": "swaggy/options.fetch/options.goto",
+#    "start": 1750000000.1, "seconds": 2.31, "ok": true, ...fields}
+#   {"type": "counter", "stage": "swaggy", "name": "options.rows_seen", "value": 4212, "labels": {}}
+#   {"type": "stage", "stage": "swaggy", "seconds": 41.7, "ok": true, "spans": {path: [calls, seconds]}}
+#
+# Several processes may append to the same file (pipeline.py runs stages in
+# parallel); each line is written with one call. With a profile directory,
+# the stage also runs under cProfile and tracemalloc and leaves
+# <stage>.prof (pstats), <stage>.prof.txt (top functions by cumulative time)
+# and <stage>.tracemalloc.txt (peak and top allocation sites). cProfile only
+# sees the thread that entered the stage; work in asyncio.to_thread() shows up
+# in the spans, not in the profile.
+#
+# Both default to the WARREN_METRICS / WARREN_PROFILE environment variables,
+# so pipeline.py can switch them on for every stage. Without either, spans and
+# counters are only kept in memory.
+
+METRICS_ENV = "WARREN_METRICS"
+PROFILE_ENV = "WARREN_PROFILE"
+PROFILE_TOP = 40
+TRACEMALLOC_FRAMES = 10
+TRACEMALLOC_TOP = 25
+
+_path = contextvars.ContextVar("span_path", default=())
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stage = None
+        self.sink = None
+        self.counters = {}
+        self.spans = {}
+
+    def reset(self, stage, sink=None):
+        with self.lock:
+            self.stage = stage
+            self.sink = sink
+            self.counters = {}
+            self.spans = {}
+
+    def emit(self, record):
+        if self.sink is None:
+            return
+        line = dumps({"stage": self.stage, **record}) + b"\n"
+        with self.lock:
+            self.sink.write(line)
+            self.sink.flush()
+
+    def add_span(self, path, name, started, seconds, ok, fields):
+        with self.lock:
+            totals = self.spans.setdefault(path, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+        self.emit({"type": "span", "name": name, "path": path, "start": round(started, 3),
+                   "seconds": round(seconds, 6), "ok": ok, **fields})
+
+    def add_count(self, name, value, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+
+METRICS = Metrics()
+
+
+class span:
+    # Context manager and decorator (sync or async functions). Fields given
+    # here or added with .set() inside the block are written with the span.
+    def __init__(self, name, **fields):
+        self.name = name
+        self.fields = fields
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def __enter__(self):
+        self._token = _path.set(_path.get() + (self.name,))
+        self._started = time.time()
+        self._clock = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._clock
+        path = "/".join(_path.get())
+        _path.reset(self._token)
+        METRICS.add_span(path, self.name, self._started, seconds, exc_type is None, self.fields)
+        return False
+
+    def __call__(self, fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with span(self.name, **self.fields):
+                    return await fn(*args, **kwargs)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with span(self.name, **self.fields):
+                    return fn(*args, **kwargs)
+        return wrapper
+
+
+def count(name, value=1, **labels):
+    METRICS.add_count(name, value, labels)
+
+
+def counters():
+    # {(name, ((label, value), ...)): total} so far in this stage.
+    with METRICS.lock:
+        return dict(METRICS.counters)
+
+
+def _dump_profile(profiler, directory, name):
+    profiler.dump_stats(str(directory / f"{name}.prof"))
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(PROFILE_TOP)
+    (directory / f"{name}.prof.txt").write_text(text.getvalue())
+
+
+def _dump_tracemalloc(directory, name):
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    lines = [f"peak traced memory: {peak / 1024 / 1024:.1f} MB", f"top {TRACEMALLOC_TOP} allocation sites:"]
+    for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]:
+        lines.append(f"  {stat}")
+    (directory / f"{name}.tracemalloc.txt").write_text("\n".join(lines) + "\n")
+    return peak
+
+
+@contextmanager
+def stage(name, metrics_path=None, profile_dir=None):
+    # Wraps one script run: the root span, the metrics sink and the profilers.
+    metrics_path = metrics_path or os.environ.get(METRICS_ENV)
+    profile_dir = profile_dir or os.environ.get(PROFILE_ENV)
+    sink = None
+    if metrics_path:
+        Path(metrics_path).parent.mkdir(parents=True, exist_ok=True)
+        sink = open(metrics_path, "ab")
+    METRICS.reset(name, sink)
+
+    profiler = None
+    if profile_dir:
+        profile_dir = Path(profile_dir)
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    started = time.perf_counter()
+    ok = False
+    try:
+        with span(name):
+            yield METRICS
+        ok = True
+    finally:
+        summary = {}
+        if profiler is not None:
+            profiler.disable()
+            _dump_profile(profiler, profile_dir, name)
+            summary["peak_traced_bytes"] = _dump_tracemalloc(profile_dir, name)
+            tracemalloc.stop()
+            print(f"🔬 Profiles for {name} written to {profile_dir}")
+        for (counter, labels), value in counters().items():
+            METRICS.emit({"type": "counter", "name": counter, "value": value, "labels": dict(labels)})
+        spans = {path: [calls, round(seconds, 4)] for path, (calls, seconds) in METRICS.spans.items()}
+        METRICS.emit({"type": "stage", "seconds": round(time.perf_counter() - started, 3), "ok": ok,
+                      "spans": spans, **summary})
+        if sink is not None:
+            sink.close()
+            print(f"📏 Metrics for {name} appended to {metrics_path}")
+        METRICS.reset(None)
+
+
+def add_arguments(parser):
+    # The --metrics / --profile flags every instrumented script takes.
+    parser.add_argument("--metrics", metavar="PATH", default=None,
+                        help=f"Append span and counter metrics as JSON lines (default: ${METRICS_ENV}).")
+    parser.add_argument("--profile", metavar="DIR", default=None,
+                        help=f"Write cProfile and tracemalloc dumps for this run (default: ${PROFILE_ENV}).")
+
+
+def summarize(path):
+    # {stage: {"seconds": total, "spans": {path: [calls, seconds]}, "counters": {...}}} over every run in the file.
+    stages = {}
+    with open(path, "rb") as f:
+        records = [loads(line) for line in f if line.strip()]
+    for record in records:
+        entry = stages.setdefault(record["stage"], {"runs": 0, "seconds": 0.0, "spans": {}, "counters": {}})
+        if record["type"] == "stage":
+            entry["runs"] += 1
+            entry["seconds"] += record["seconds"]
+            for span_path, (calls, seconds) in record["spans"].items():
+                totals = entry["spans"].setdefault(span_path, [0, 0.0])
+                totals[0] += calls
+                totals[1] += seconds
+        elif record["type"] == "counter":
+            labels = ",".join(f"{k}={v}" for k, v in sorted(record["labels"].items()))
+            key = f"{record['name']}[{labels}]" if labels else record["name"]
+            entry["counters"][key] = entry["counters"].get(key, 0) + record["value"]
+    return stages
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a JSON-lines metrics file.")
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    for stage_name, entry in summarize(args.path).items():
+        print(f"{stage_name}: {entry['runs']} run(s), {entry['seconds']:.2f}s")
+        for span_path, (calls, seconds) in sorted(entry["spans"].items(), key=lambda item: -item[1][1]):
+            print(f"  {seconds:9.3f}s {calls:6d}x  {span_path}")
+        for name, value in sorted(entry["counters"].items()):
+            print(f"  {value:>10}  {name}")
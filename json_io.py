@@ -0,0 +1,371 @@
+import heapq
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # optional; the standard json module produces the same documents
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # optional; without it JSON documents are read whole
+    ijson = None
+
+# Shared JSON I/O for the scrapers, the EU snapshot and the merge.
+#
+# Records are written one at a time, so a stage never holds the encoded output
+# next to its records. The format follows the file name: ".ndjson"/".jsonl"
+# gets one JSON value per line, anything else a regular JSON document laid out
+# like json.dump(indent=2). Reading streams NDJSON line by line and JSON
+# documents through ijson's incremental parser. Every write goes to a temporary
+# file next to the target and is renamed over it only once complete, so a
+# failed run never leaves a truncated output behind.
+
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+
+
+def is_ndjson(path):
+    return Path(path).suffix.lower() in NDJSON_SUFFIXES
+
+
+# === Encoding ===
+def dumps(obj, indent=False):
+    # bytes; orjson when installed.
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, indent=2 if indent else None).encode("utf-8")
+
+
+def _nested(obj, level):
+    # obj encoded with indent=2 and shifted right by `level` indents.
+    encoded = dumps(obj, indent=True)
+    return encoded.replace(b"\n", b"\n" + b"  " * level) if level else encoded
+
+
+@contextmanager
+def atomic_output(path):
+    # Yields a temporary path in the target's directory; renamed to path on success.
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    os.close(fd)
+    # mkstemp creates 0600; keep the target's mode (or a normal 0644).
+    os.chmod(tmp, path.stat().st_mode & 0o777 if path.exists() else 0o644)
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+@contextmanager
+def _open_for_write(path):
+    with atomic_output(path) as tmp, open(tmp, "wb") as f:
+        yield f
+
+
+def write_json(path, obj):
+    # Whole document at once; for small nested documents.
+    with _open_for_write(path) as f:
+        f.write(dumps(obj, indent=True))
+
+
+def write_records(path, records):
+    # Streams an iterable of records. Returns how many were written.
+    written = 0
+    with _open_for_write(path) as f:
+        if is_ndjson(path):
+            for record in records:
+                f.write(dumps(record))
+                f.write(b"\n")
+                written += 1
+            return written
+        for record in records:
+            f.write(b",\n  " if written else b"[\n  ")
+            f.write(_nested(record, 1))
+            written += 1
+        f.write(b"\n]" if written else b"[]")
+    return written
+
+
+def append_records(path, records):
+    # Adds records to the end of a records file written by write_records (or
+    # creates it). Unlike the writes above this is in place, so the cost is
+    # the new records rather than the whole file. A JSON document keeps its
+    # layout: the closing bracket is overwritten and put back after them.
+    # Returns how many were appended.
+    path = Path(path)
+    if not path.exists():
+        return write_records(path, records)
+    written = 0
+    if is_ndjson(path):
+        with open(path, "ab") as f:
+            for record in records:
+                f.write(dumps(record))
+                f.write(b"\n")
+                written += 1
+        return written
+
+    with open(path, "r+b") as f:
+        # Find the closing "]" and what precedes it.
+        end = f.seek(0, os.SEEK_END)
+        tail = b""
+        while end > 0 and len(tail.rstrip()) < 2:
+            start = max(0, end - 4096)
+            f.seek(start)
+            tail = f.read(end - start) + tail
+            end = start
+        stripped = tail.rstrip()
+        if not stripped.endswith(b"]"):
+            raise ValueError(f"{path} does not end with a JSON array.")
+        before = stripped[:-1].rstrip()
+        empty = before.endswith(b"[")
+        # Items go where "]" is, or right after the last item so the "\n]" is rewritten.
+        f.seek(end + (len(stripped) - 1 if empty else len(before)))
+        for record in records:
+            f.write(b",\n  " if written or not empty else b"\n  ")
+            f.write(_nested(record, 1))
+            written += 1
+        if not written:
+            return 0
+        f.write(b"\n]")
+        f.truncate()
+    return written
+
+
+def write_mapping(path, items):
+    # Streams (key, value) pairs as one JSON object, or as one {key: value}
+    # line per pair for NDJSON. Returns how many were written.
+    written = 0
+    with _open_for_write(path) as f:
+        if is_ndjson(path):
+            for key, value in items:
+                f.write(dumps({key: value}))
+                f.write(b"\n")
+                written += 1
+            return written
+        for key, value in items:
+            f.write(b",\n  " if written else b"{\n  ")
+            f.write(dumps(str(key)))
+            f.write(b": ")
+            f.write(_nested(value, 1))
+            written += 1
+        f.write(b"\n}" if written else b"{}")
+    return written
+
+
+# === Decoding ===
+def loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def load_json(path):
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def root_type(path):
+    # "list", "dict" or None (empty file / NDJSON), from the first byte only.
+    if is_ndjson(path):
+        return None
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(1)
+            if not chunk:
+                return None
+            if not chunk.isspace():
+                return {b"[": "list", b"{": "dict"}.get(chunk)
+
+
+def _iter_lines(path):
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+def _walk(obj, prefix):
+    # Fallback for ijson prefixes ("item", "key.item", "") on a loaded document.
+    parts = prefix.split(".") if prefix else []
+    values = [obj]
+    for part in parts:
+        if part == "item":
+            values = [item for value in values if isinstance(value, list) for item in value]
+        else:
+            values = [value[part] for value in values if isinstance(value, dict) and part in value]
+    return values
+
+
+def iter_records(path, prefix="item"):
+    # Values at an ijson prefix ("item" = elements of the top-level array);
+    # every line of an NDJSON file.
+    if is_ndjson(path):
+        yield from _iter_lines(path)
+        return
+    if ijson is None:
+        yield from _walk(load_json(path), prefix)
+        return
+    with open(path, "rb") as f:
+        yield from ijson.items(f, prefix, use_float=True)
+
+
+def iter_mapping(path, prefix=""):
+    # (key, value) pairs of the object at an ijson prefix ("" = top level).
+    if is_ndjson(path):
+        for line in _iter_lines(path):
+            yield from line.items()
+        return
+    if ijson is None:
+        for value in _walk(load_json(path), prefix):
+            if isinstance(value, dict):
+                yield from value.items()
+        return
+    with open(path, "rb") as f:
+        yield from ijson.kvitems(f, prefix, use_float=True)
+
+
+_STARTS = ("start_map", "start_array")
+_ENDS = ("end_map", "end_array")
+
+
+def _build(event, value, events):
+    # The value starting with (event, value), read off the ijson.parse events.
+    if event not in _STARTS:
+        return value
+    builder = ijson.ObjectBuilder()
+    builder.event(event, value)
+    depth = 1
+    while depth:
+        _, event, value = next(events)
+        builder.event(event, value)
+        depth += 1 if event in _STARTS else -1 if event in _ENDS else 0
+    return builder.value
+
+
+def _nested_events(events, level, depth, keys):
+    # Positioned just after the start_map of an object `level` deep.
+    for _, event, value in events:
+        if event == "end_map":
+            return
+        path = keys + (value,)
+        _, event, value = next(events)
+        if level < depth and event == "start_map":
+            yield from _nested_events(events, level + 1, depth, path)
+        elif level == depth and event == "start_array":
+            for _, event, value in events:
+                if event == "end_array":
+                    break
+                yield path, _build(event, value, events), True
+        else:
+            yield path, _build(event, value, events), False
+
+
+def _nested_loaded(obj, level, depth, keys):
+    for key, value in obj.items():
+        path = keys + (key,)
+        if level < depth and isinstance(value, dict):
+            yield from _nested_loaded(value, level + 1, depth, path)
+        elif level == depth and isinstance(value, list):
+            for item in value:
+                yield path, item, True
+        else:
+            yield path, value, False
+
+
+def iter_nested_items(path, depth):
+    # Elements of the arrays in an object nested `depth` objects deep
+    # ({region: {preset: [rows]}} is depth 2), one at a time: (keys, element,
+    # True). A value where an object or array was expected comes whole, as
+    # (keys, value, False). keys: the object keys leading to the array.
+    if ijson is None:
+        document = load_json(path)
+        if isinstance(document, dict):
+            yield from _nested_loaded(document, 1, depth, ())
+        return
+    with open(path, "rb") as f:
+        events = ijson.parse(f, use_float=True)
+        for _, event, _ in events:
+            if event == "start_map":
+                yield from _nested_events(events, 1, depth, ())
+            return
+
+
+# === Scratch files ===
+# Values produced once (fetched chunk by chunk, or sorted into runs) and read
+# back several times, kept on disk instead of in memory. One JSON value per
+# line; (key, value) pairs come back as [key, value] lists. Deleted on close.
+class Spool:
+    def __init__(self, directory=None):
+        if directory is not None:
+            Path(directory).mkdir(parents=True, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=directory, prefix=".spool.", suffix=".ndjson")
+        self.file = os.fdopen(fd, "wb")
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def extend(self, values):
+        # Returns how many values were added.
+        added = 0
+        for value in values:
+            self.file.write(dumps(value))
+            self.file.write(b"\n")
+            added += 1
+        self.count += added
+        return added
+
+    def __iter__(self):
+        self.file.flush()
+        return _iter_lines(self.path)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def sorted_runs(rows, key, run_size, stack, directory=None):
+    # Lists of rows (tuples/lists), each sorted by key, in runs of run_size
+    # rows. Sorting is stable, so equal keys keep their order. Unless all
+    # rows fit in one run, runs are spilled to Spools registered on stack (an
+    # ExitStack) and come back as lists.
+    runs = []
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= run_size:
+            batch.sort(key=key)
+            spool = stack.enter_context(Spool(directory))
+            spool.extend(batch)
+            runs.append(spool)
+            batch = []
+    if batch:
+        batch.sort(key=key)
+        if runs:
+            spool = stack.enter_context(Spool(directory))
+            spool.extend(batch)
+            batch = spool
+        runs.append(batch)
+    return runs
+
+
+def external_sort(rows, key, run_size, stack, directory=None):
+    # rows in key order (stable), holding about run_size of them in memory.
+    return heapq.merge(*sorted_runs(rows, key, run_size, stack, directory), key=key)
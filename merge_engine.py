@@ -0,0 +1,468 @@
+import heapq
+import os
+from contextlib import ExitStack
+from itertools import count, groupby, repeat
+from operator import itemgetter
+
+from json_io import iter_mapping, iter_nested_items, iter_records, root_type, sorted_runs
+
+# Merge engine for merge_sentiment.py. Each input file has a declared
+# SourceAdapter: how to walk its layout, which key is the ticker and which
+# source keys feed which output column. Rows are joined on the ticker into one
+# column-oriented index in a single pass per source, and anything that could
+# not be used is counted in a MergeReport instead of being dropped silently.
+
+# Output columns and the type each must have (None is always allowed).
+# Values of the wrong type are reported and stored as None.
+COLUMN_TYPES = {
+    "ticker": "text",
+    "name": "text",
+    "price": "number",
+    "percentChange": "number",
+    "volume": "number",
+    "rsi": "number",
+    "pe": "number",
+    "sector": "text",
+    "dividendYield": "number",
+    "source": "text",
+    "swaggy_mentions": "number",
+    "swaggy_sentiment": "any",
+    "oversold": "bool",
+    "country": "text",
+    "inPortfolio": "bool",
+}
+
+PRECEDENCE_RULES = ("overwrite", "fill")
+
+# Rows per sorted run in merge_sorted().
+DEFAULT_RUN_SIZE = 5000
+
+# Exact types accepted per column type; anything else goes through _valid().
+_VALUE_TYPES = {
+    "number": {int, float},
+    "text": {str},
+    "bool": {bool},
+}
+
+
+def _valid(kind, value):
+    if value is None or kind not in _VALUE_TYPES:
+        return True
+    if isinstance(value, bool):
+        # bool is an int subclass, but True is not a price.
+        return kind == "bool"
+    return isinstance(value, tuple(_VALUE_TYPES[kind]))
+
+
+def _first_key(record, keys):
+    for key in keys:
+        if key in record:
+            return record[key]
+    return None
+
+
+# One input file (rows/stream: see Source layouts). fields maps an output column to candidate source keys, the
+# first one present wins (so one adapter can read several layouts).
+# precedence: "overwrite" sets the columns even if another source already did;
+# "fill" only sets columns that are missing or None. constants are extra
+# columns set on every matched row with the same precedence. bounded_stream:
+# a stream(path) holding one row at a time, for merge_sorted(), where stream
+# may hold more (e.g. a whole region).
+class SourceAdapter:
+    def __init__(self, name, path, rows, stream, ticker_keys, fields, precedence="fill", constants=None,
+                 optional=False, bounded_stream=None):
+        if precedence not in PRECEDENCE_RULES:
+            raise ValueError(f"Unknown precedence '{precedence}'. Use one of {PRECEDENCE_RULES}.")
+        self.name = name
+        self.path = path
+        self.rows = rows
+        self.stream = stream
+        self.ticker_keys = tuple(ticker_keys)
+        self.fields = {column: tuple(keys) for column, keys in fields.items()}
+        self.precedence = precedence
+        self.constants = constants or {}
+        self.optional = optional
+        self.bounded_stream = bounded_stream or stream
+
+    def read(self, bounded=False):
+        # Streamed rows of the input file, or None for a missing optional input.
+        if not os.path.exists(self.path):
+            if self.optional:
+                return None
+            raise FileNotFoundError(f"{self.name} input not found: {self.path}")
+        return (self.bounded_stream if bounded else self.stream)(self.path)
+
+
+# === Source layouts ===
+# rows(data) walks an already-parsed document and stream(path) reads the file
+# incrementally (json_io); both yield (location, record). A location is a
+# string or, for list items, a (list path, position) pair that is only
+# formatted when reported.
+def format_location(location):
+    if isinstance(location, tuple):
+        path, position = location
+        return f"{path}[{position}]"
+    return location
+
+
+def _positions(path, rows):
+    return zip(zip(repeat(path), count()), rows)
+
+
+def _warren_regions(regions):
+    for region, presets in regions:
+        if not isinstance(presets, dict):
+            yield region, presets
+            continue
+        for preset, rows in presets.items():
+            if not isinstance(rows, list):
+                yield f"{region}/{preset}", rows
+                continue
+            yield from _positions(f"{region}/{preset}", rows)
+
+
+def warren_rows(data):
+    # scrapeRSI.js writes {region: {preset: [rows]}}; older runs wrote a flat list.
+    if isinstance(data, list):
+        yield from _positions("", data)
+    elif isinstance(data, dict):
+        yield from _warren_regions(data.items())
+    else:
+        yield "<root>", data
+
+
+def warren_stream(path):
+    # One region at a time.
+    if root_type(path) == "dict":
+        yield from _warren_regions(iter_mapping(path))
+    else:
+        yield from _positions("", iter_records(path))
+
+
+def warren_row_stream(path):
+    # One row at a time, parsed in Python (slower than warren_stream).
+    if root_type(path) != "dict":
+        yield from _positions("", iter_records(path))
+        return
+    location, position = None, 0
+    for keys, value, item in iter_nested_items(path, 2):
+        if not item:
+            yield "/".join(keys), value
+            continue
+        if keys != location:
+            location, position = keys, 0
+        yield ("/".join(keys), position), value
+        position += 1
+
+
+def swaggy_rows(data):
+    # swaggy_scraper.py writes {"wallstreetbets_sentiment": [...], "unusual_options_activity": [...]};
+    # older runs wrote the sentiment list alone.
+    if isinstance(data, dict):
+        data = data.get("wallstreetbets_sentiment", [])
+    if not isinstance(data, list):
+        yield "<root>", data
+        return
+    yield from _positions("wallstreetbets_sentiment", data)
+
+
+def swaggy_stream(path):
+    prefix = "wallstreetbets_sentiment.item" if root_type(path) == "dict" else "item"
+    yield from _positions("wallstreetbets_sentiment", iter_records(path, prefix))
+
+
+def _eu_snapshot_items(items):
+    # {ticker: record}; keys starting with "_" (like "_date") are metadata.
+    for ticker, record in items:
+        if ticker.startswith("_"):
+            continue
+        yield ticker, dict(record, ticker=ticker) if isinstance(record, dict) else record
+
+
+def eu_snapshot_rows(data):
+    if not isinstance(data, dict):
+        yield "<root>", data
+        return
+    yield from _eu_snapshot_items(data.items())
+
+
+def eu_snapshot_stream(path):
+    yield from _eu_snapshot_items(iter_mapping(path))
+
+
+WARREN_SOURCE = SourceAdapter(
+    "warren", "stockdata.json", warren_rows, warren_stream,
+    # TradingView rows keep the symbol in "name" and the company in "description".
+    ticker_keys=("ticker", "name"),
+    fields={
+        "name": ("description", "name"),
+        "price": ("close", "price"),
+        "percentChange": ("percentChange", "change"),
+        "volume": ("volume",),
+        "rsi": ("RSI", "rsi", "rsi14"),
+        "pe": ("price_earnings_ttm", "pe", "peRatio"),
+        "sector": ("sector",),
+        "dividendYield": ("dividends_yield_current", "dividendYield", "divYieldTTM"),
+    },
+    precedence="overwrite",
+    constants={"source": "warren"},
+    bounded_stream=warren_row_stream,
+)
+
+SWAGGY_SOURCE = SourceAdapter(
+    "swaggy", "sentiment/swaggystocks_sentiment.json", swaggy_rows, swaggy_stream,
+    ticker_keys=("ticker", "symbol"),
+    fields={
+        "swaggy_mentions": ("mentions",),
+        "swaggy_sentiment": ("sentiment",),
+    },
+    precedence="overwrite",
+)
+
+EU_SNAPSHOT_SOURCE = SourceAdapter(
+    "eu_snapshot", "sentiment/eu_snapshot.json", eu_snapshot_rows, eu_snapshot_stream,
+    ticker_keys=("ticker",),
+    fields={column: (column,) for column in ("price", "percentChange", "rsi", "oversold", "country", "inPortfolio", "sector")},
+    precedence="fill",
+    constants={"source": "eu_snapshot"},
+    optional=True,
+)
+
+# Warren is the source of truth, sentiment is layered on, the EU snapshot fills gaps.
+DEFAULT_SOURCES = (WARREN_SOURCE, SWAGGY_SOURCE, EU_SNAPSHOT_SOURCE)
+
+
+# Per-source counts and the first few problems of each kind.
+class MergeReport:
+    MAX_EXAMPLES = 20
+
+    def __init__(self):
+        self.sources = {}
+
+    def source(self, name):
+        return self.sources.setdefault(name, {
+            "loaded": False, "rows": 0, "matched": 0, "added": 0, "duplicates": 0,
+            "malformed": 0, "invalid_values": 0, "examples": [],
+        })
+
+    def problem(self, name, kind, location, reason):
+        stats = self.source(name)
+        stats[kind] += 1
+        if len(stats["examples"]) < self.MAX_EXAMPLES:
+            stats["examples"].append(f"{format_location(location)}: {reason}")
+
+    def print_summary(self):
+        for name, stats in self.sources.items():
+            if not stats["loaded"]:
+                print(f"⚠️ {name}: input missing, skipped.")
+                continue
+            print(f"🔗 {name}: {stats['rows']} rows, {stats['matched']} matched, {stats['added']} unmatched (added), "
+                  f"{stats['duplicates']} duplicates, {stats['malformed']} malformed, "
+                  f"{stats['invalid_values']} invalid values.")
+            for example in stats["examples"][:5]:
+                print(f"   ⚠️ {example}")
+
+    def as_dict(self):
+        return self.sources
+
+
+# Column-oriented ticker index: one row number per ticker and, per column, a
+# {row: value} dict holding only the cells some source has written (unwritten
+# cells are left out of the output).
+class TickerIndex:
+    def __init__(self):
+        self.rows = {}
+        self.columns = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def row(self, ticker):
+        # (row number, created)
+        row = self.rows.get(ticker)
+        if row is not None:
+            return row, False
+        row = self.rows[ticker] = len(self.rows)
+        return row, True
+
+    def column(self, name):
+        return self.columns.setdefault(name, {})
+
+    def records(self):
+        # {ticker: {column: value}}, columns in the order they were first declared.
+        rows = [{"ticker": ticker} for ticker in self.rows]
+        for name, cells in self.columns.items():
+            for row, value in cells.items():
+                rows[row][name] = value
+        return {record["ticker"]: record for record in rows}
+
+    def iter_records(self):
+        # (ticker, record) one row at a time, for streaming the output.
+        columns = list(self.columns.items())
+        for ticker, row in self.rows.items():
+            yield ticker, {"ticker": ticker, **{name: cells[row] for name, cells in columns if row in cells}}
+
+
+def _merge_source(index, adapter, rows, report):
+    stats = report.source(adapter.name)
+    stats["loaded"] = True
+    overwrite = adapter.precedence == "overwrite"
+    # Resolved once per source: (column, cells, single key or None, candidate keys, type, exact types).
+    fields = []
+    for column, keys in adapter.fields.items():
+        kind = COLUMN_TYPES.get(column, "any")
+        fields.append((column, index.column(column), keys[0] if len(keys) == 1 else None, keys, kind,
+                       _VALUE_TYPES.get(kind)))
+    constants = [(column, index.column(column), value) for column, value in adapter.constants.items()]
+    ticker_keys = adapter.ticker_keys
+    # {ticker: columns this source filled}, so a later duplicate row can replace them.
+    seen = {}
+
+    for location, record in rows:
+        stats["rows"] += 1
+        if not isinstance(record, dict):
+            report.problem(adapter.name, "malformed", location, f"expected an object, got {type(record).__name__}")
+            continue
+        ticker = _first_key(record, ticker_keys)
+        if not isinstance(ticker, str) or not ticker.strip():
+            report.problem(adapter.name, "malformed", location, f"no ticker in {ticker_keys}")
+            continue
+        ticker = ticker.strip()
+
+        row, created = index.row(ticker)
+        # Duplicates within a source: the last row wins, as in the old merge loops.
+        owned = seen.get(ticker)
+        if owned is not None:
+            stats["duplicates"] += 1
+        else:
+            stats["added" if created else "matched"] += 1
+            owned = seen[ticker] = () if overwrite else set()
+        for column, cells, key, keys, kind, exact_types in fields:
+            value = record.get(key) if key is not None else _first_key(record, keys)
+            if (value is not None and exact_types is not None and type(value) not in exact_types
+                    and not _valid(kind, value)):
+                report.problem(adapter.name, "invalid_values", f"{format_location(location)}.{column}",
+                               f"expected {kind}, got {value!r}")
+                value = None
+            if overwrite or column in owned or cells.get(row) is None:
+                cells[row] = value
+                if not overwrite:
+                    owned.add(column)
+        for column, cells, value in constants:
+            if overwrite or column in owned or cells.get(row) is None:
+                cells[row] = value
+                if not overwrite:
+                    owned.add(column)
+
+
+def merge_index(sources=DEFAULT_SOURCES, loaded=None):
+    # Returns (TickerIndex, MergeReport). Inputs are streamed from each
+    # adapter's path; loaded can hold already-parsed data by source name.
+    loaded = loaded or {}
+    index = TickerIndex()
+    report = MergeReport()
+    for adapter in sources:
+        rows = adapter.rows(loaded[adapter.name]) if adapter.name in loaded else adapter.read()
+        if rows is None:
+            report.source(adapter.name)
+            continue
+        _merge_source(index, adapter, rows, report)
+    return index, report
+
+
+def merge_sources(sources=DEFAULT_SOURCES, loaded=None):
+    # Returns (combined {ticker: record}, MergeReport).
+    index, report = merge_index(sources, loaded)
+    return index.records(), report
+
+
+# === Sorted streaming join ===
+# merge_index() holds every ticker of every source in memory. merge_sorted()
+# sorts each source by ticker in runs of run_size rows, spilled to scratch
+# files (json_io.Spool) once there is more than one, and joins all runs of
+# all sources in a single k-way merge (json_io.sorted_runs). Only the run
+# being sorted and one row per run are in memory at any time. Records come
+# out in ticker order and are the ones merge_index() builds, columns in the
+# same order; the report counts the same things (its examples are in ticker
+# order).
+def _keyed_rows(adapter, rows, report):
+    # (ticker, location, record) of each usable row; malformed rows are reported here.
+    stats = report.source(adapter.name)
+    stats["loaded"] = True
+    ticker_keys = adapter.ticker_keys
+    for location, record in rows:
+        stats["rows"] += 1
+        if not isinstance(record, dict):
+            report.problem(adapter.name, "malformed", location, f"expected an object, got {type(record).__name__}")
+            continue
+        ticker = _first_key(record, ticker_keys)
+        if not isinstance(ticker, str) or not ticker.strip():
+            report.problem(adapter.name, "malformed", location, f"no ticker in {ticker_keys}")
+            continue
+        yield ticker.strip(), format_location(location), record
+
+
+def _tagged(run, position):
+    for ticker, location, record in run:
+        yield ticker, position, location, record
+
+
+def _join(sources, loaded, run_size, directory, report):
+    with ExitStack() as stack:
+        runs, prepared, columns = [], [], {}
+        for adapter in sources:
+            rows = adapter.rows(loaded[adapter.name]) if adapter.name in loaded else adapter.read(bounded=True)
+            if rows is None:
+                report.source(adapter.name)
+                continue
+            position = len(prepared)
+            source_runs = sorted_runs(_keyed_rows(adapter, rows, report), itemgetter(0), run_size, stack, directory)
+            runs.extend(_tagged(run, position) for run in source_runs)
+            fields = []
+            for column, keys in adapter.fields.items():
+                kind = COLUMN_TYPES.get(column, "any")
+                fields.append((column, keys[0] if len(keys) == 1 else None, keys, kind, _VALUE_TYPES.get(kind)))
+                columns.setdefault(column, None)
+            columns.update((column, None) for column in adapter.constants if column not in columns)
+            prepared.append((adapter.name, report.source(adapter.name), adapter.precedence == "overwrite", fields,
+                             list(adapter.constants.items())))
+        columns = list(columns)
+
+        # Equal (ticker, source) keys come out in run order, i.e. file order.
+        merged = heapq.merge(*runs, key=itemgetter(0, 1))
+        for ticker, group in groupby(merged, key=itemgetter(0)):
+            cells = {}
+            # {source position: columns it filled}; a later duplicate row of that source replaces them.
+            joined = {}
+            for _, position, location, record in group:
+                name, stats, overwrite, fields, constants = prepared[position]
+                owned = joined.get(position)
+                if owned is not None:
+                    stats["duplicates"] += 1
+                else:
+                    stats["matched" if joined else "added"] += 1
+                    owned = joined[position] = () if overwrite else set()
+                for column, key, keys, kind, exact_types in fields:
+                    value = record.get(key) if key is not None else _first_key(record, keys)
+                    if (value is not None and exact_types is not None and type(value) not in exact_types
+                            and not _valid(kind, value)):
+                        report.problem(name, "invalid_values", f"{location}.{column}", f"expected {kind}, got {value!r}")
+                        value = None
+                    if overwrite or column in owned or cells.get(column) is None:
+                        cells[column] = value
+                        if not overwrite:
+                            owned.add(column)
+                for column, value in constants:
+                    if overwrite or column in owned or cells.get(column) is None:
+                        cells[column] = value
+                        if not overwrite:
+                            owned.add(column)
+            yield ticker, {"ticker": ticker, **{column: cells[column] for column in columns if column in cells}}
+
+
+def merge_sorted(sources=DEFAULT_SOURCES, loaded=None, run_size=DEFAULT_RUN_SIZE, directory=None):
+    # Returns ((ticker, record) iterator in ticker order, MergeReport). The
+    # report is complete once the iterator is exhausted; scratch files go in
+    # directory (the system temp dir by default) and are removed at the end.
+    report = MergeReport()
+    return _join(sources, loaded or {}, run_size, directory, report), report
@@ -1,73 +1,89 @@
-import json
-import os
+import argparse
+from contextlib import ExitStack
+from pathlib import Path
 
-# === Load Warren Screener Data ===
-with open("stockdata.json", "r") as f:
-    warren_data = json.load(f)
+import history_store
+from change_detection import write_output
+from instrumentation import add_arguments, count, span, stage
+from json_io import Spool
+from merge_engine import DEFAULT_RUN_SIZE, DEFAULT_SOURCES, merge_index, merge_sorted
+from parquet_io import DEFAULT_ROW_GROUP_SIZE, parquet_path, write_parquet
+from screening import OPTIONS_PATH, write_screens
 
-# === Load SwaggyStocks Sentiment Data ===
-with open("sentiment/swaggystocks_sentiment.json", "r") as f:
-    swaggy_data = json.load(f)
+OUTPUT_PATH = "combined_output.json"
 
-# === Load EU Snapshot Data ===
-eu_snapshot_path = "sentiment/eu_snapshot.json"
-eu_snapshot = {}
-if os.path.exists(eu_snapshot_path):
-    with open(eu_snapshot_path, "r") as f:
-        eu_snapshot = json.load(f)
 
-# === Merge Logic (Warren is source of truth) ===
-combined = {}
+def build_parser():
+    parser = argparse.ArgumentParser(description="Merge Warren, SwaggyStocks and EU snapshot data by ticker.")
+    parser.add_argument("--output", default=OUTPUT_PATH, help="Output file; a .ndjson name writes one ticker per line.")
+    parser.add_argument("--parquet", action="store_true", help="Also write typed Parquet next to the JSON (needs pyarrow).")
+    parser.add_argument("--no-history", action="store_true",
+                        help="Do not append this merge to the partitioned history store (see history_store.py).")
+    parser.add_argument("--no-screens", action="store_true",
+                        help="Do not rebuild the per-ticker aggregates and screening indexes (see screening.py).")
+    parser.add_argument("--bounded", action="store_true",
+                        help="Memory-bounded mode for large universes: sorted streaming join (merge_engine.merge_sorted), "
+                             "output in ticker order, no delta and no screens.")
+    parser.add_argument("--run-size", type=int, default=DEFAULT_RUN_SIZE,
+                        help="Rows per sorted run (and Parquet row group) in --bounded mode.")
+    add_arguments(parser)
+    return parser
 
-for stock in warren_data:
-    ticker = stock.get("ticker")
-    if not ticker:
-        continue
 
-    combined[ticker] = {
-        "ticker": ticker,
-        "name": stock.get("name"),
-        "price": stock.get("price"),
-        "percentChange": stock.get("percentChange"),
-        "volume": stock.get("volume"),
-        "rsi": stock.get("rsi"),
-        "pe": stock.get("pe"),
-        "sector": stock.get("sector"),
-        "dividendYield": stock.get("dividendYield"),
-        "source": "warren",
-    }
+def run_merge(output=OUTPUT_PATH, parquet=False, history=True, sources=DEFAULT_SOURCES, screens=True,
+              options_path=OPTIONS_PATH, bounded=False, run_size=DEFAULT_RUN_SIZE):
+    with ExitStack() as stack:
+        # === Merge Warren + SwaggyStocks + EU snapshot (see merge_engine.DEFAULT_SOURCES) ===
+        if bounded:
+            # The merged records go to a scratch file next to the output, which
+            # every writer below reads again.
+            spool = stack.enter_context(Spool(Path(output).parent))
+            with span("merge.sorted_join", run_size=run_size):
+                items, report = merge_sorted(sources, run_size=run_size, directory=Path(output).parent)
+                spool.extend(items)
+            records = lambda: iter(spool)
+            row_group_size = run_size
+        else:
+            with span("merge.index"):
+                index, report = merge_index(sources)
+            records = index.iter_records
+            row_group_size = DEFAULT_ROW_GROUP_SIZE
+        report.print_summary()
+        for source, stats in report.sources.items():
+            for counter in ("rows", "matched", "added", "duplicates", "malformed", "invalid_values"):
+                count(f"merge.{counter}", stats[counter], source=source)
 
-# Add SwaggyStocks sentiment - always add these sentiment fields, no overwrite of core data
-for entry in swaggy_data:
-    if not isinstance(entry, dict):
-        print(f"⚠️ Skipping malformed sentiment entry: {entry}")
-        continue
+        # === Save merged output ===
+        # The delta needs both versions keyed in memory, so bounded mode has none.
+        change = write_output(output, "mapping", records, delta=not bounded)
+        if change.changed:
+            print(f"✅ Saved {change.written} merged records to {output}")
 
-    ticker = entry.get("symbol")
-    if not ticker:
-        continue
+        if parquet and (change.changed or not parquet_path(output).exists()):
+            with span("merge.parquet"):
+                write_parquet(parquet_path(output), "combined", (record for _, record in records()),
+                              row_group_size=row_group_size)
 
-    if ticker not in combined:
-        combined[ticker] = {"ticker": ticker}
+        if history:
+            with span("merge.history"):
+                history_store.append("combined", (record for _, record in records()), row_group_size=row_group_size)
 
-    combined[ticker]["swaggy_mentions"] = entry.get("mentions")
-    combined[ticker]["swaggy_sentiment"] = entry.get("sentiment")
+    # === Aggregates and screening indexes next to the output ===
+    # The screens hold every ticker by design, so bounded mode leaves them out.
+    if screens and not bounded:
+        write_screens(output, options_path)
+    elif screens:
+        print("⏭️ Screens not rebuilt in --bounded mode.")
+    return change, report
 
-# Add EU snapshot overlays - only update missing or None fields in Warren data
-for ticker, data in eu_snapshot.items():
-    if not isinstance(data, dict):
-        continue
-    if ticker not in combined:
-        combined[ticker] = {"ticker": ticker}
 
-    for key in ["price", "percentChange", "rsi", "oversold", "country", "inPortfolio", "sector"]:
-        if key not in combined[ticker] or combined[ticker][key] is None:
-            combined[ticker][key] = data.get(key)
+# main(argv) is the command line; pipeline.py calls it as a stage.
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    with stage("merge", args.metrics, args.profile):
+        return run_merge(args.output, parquet=args.parquet, history=not args.no_history, screens=not args.no_screens,
+                         bounded=args.bounded, run_size=args.run_size)
 
-    combined[ticker]["source"] = combined[ticker].get("source", "eu_snapshot")
 
-# === Save merged output ===
-with open("combined_output.json", "w") as f:
-    json.dump(combined, f, indent=2)
-
-print(f"✅ Saved {len(combined)} merged records to combined_output.json")
+if __name__ == "__main__":
+    main()
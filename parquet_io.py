@@ -0,0 +1,214 @@
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional; JSON is always written
+    pa = None
+    pq = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "sentiment"))
+
+from json_io import atomic_output
+from merge_engine import COLUMN_TYPES
+from options_schema import parse_number
+
+# Typed columnar output: one Parquet file per dataset, with the explicit
+# schemas below instead of types re-inferred from JSON text on every load.
+#
+# Writing: write_parquet(path, dataset, records) streams records into row
+# groups of DEFAULT_ROW_GROUP_SIZE rows and renames the file into place only
+# once it is complete. Cells that cannot be converted to their column type
+# (e.g. "N/A" in a float column) are stored as null and counted.
+#
+# Reading:
+#   read_table(path, columns=None, filters=None, row_groups=None) -> pyarrow.Table
+#       The file is memory-mapped, so column chunks are decoded straight from
+#       the page cache without an intermediate read buffer. Only the requested
+#       columns are decoded; filters (pyarrow filter tuples, e.g.
+#       [("ticker", "in", ["TSLA", "NVDA"]), ("dte", "<=", 7)]) skip whole row
+#       groups using their min/max statistics before filtering rows;
+#       row_groups selects row groups by number.
+#   read_frame(...) -> pandas.DataFrame, same arguments. Numeric columns
+#       without nulls are handed to pandas without another copy.
+#   describe(path) -> rows, row groups, schema and writer metadata, from the
+#       footer only.
+
+DEFAULT_ROW_GROUP_SIZE = 50_000
+DATE_FORMATS = ("%m-%d-%Y", "%Y-%m-%d")
+
+
+def _to_string(value):
+    return value if isinstance(value, str) or value is None else str(value)
+
+
+def _to_float(value):
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return parse_number(value) if isinstance(value, str) else None
+
+
+def _to_int(value):
+    value = _to_float(value)
+    return int(value) if value is not None and value.is_integer() else None
+
+
+def _to_bool(value):
+    return value if isinstance(value, bool) else None
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        text = value.strip().split(" ", 1)[0]
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(text, fmt).date()
+            except ValueError:
+                pass
+    return None
+
+
+# kind -> (arrow type factory, converter)
+_KINDS = {
+    "string": (lambda: pa.string(), _to_string),
+    "float": (lambda: pa.float64(), _to_float),
+    "int": (lambda: pa.int64(), _to_int),
+    "bool": (lambda: pa.bool_(), _to_bool),
+    "date": (lambda: pa.date32(), _to_date),
+}
+
+_MERGE_KINDS = {"text": "string", "number": "float", "bool": "bool", "any": "string"}
+
+# Column order and kind per dataset.
+DATASETS = {
+    "wallstreetbets_sentiment": {
+        "ticker": "string",
+        "mentions": "int",
+        "earnings": "string",
+        "market_cap": "float",
+        "call_to_put_oi_ratio": "float",
+        "thirty_day_iv": "float",
+        "option_activity_7d": "int",
+    },
+    "unusual_options_activity": {
+        "ticker": "string",
+        "shares_closed_at_price": "float",
+        "side": "string",
+        "expiration": "date",
+        "dte": "int",
+        "updated": "date",
+        "strike": "float",
+        "last": "float",
+        "bid": "float",
+        "ask": "float",
+        "volume": "int",
+        "oi": "int",
+        "iv_(percent)": "float",
+        "delta": "float",
+        "otm_(percent)": "float",
+        "est._total_premium": "float",
+    },
+    "eu_snapshot": {
+        "ticker": "string",
+        "name": "string",
+        "country": "string",
+        "sector": "string",
+        "price": "float",
+        "percentChange": "float",
+        "rsi": "float",
+        "oversold": "bool",
+        "inPortfolio": "bool",
+    },
+    "combined": {column: _MERGE_KINDS[kind] for column, kind in COLUMN_TYPES.items()},
+}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet output needs the pyarrow package (pip install pyarrow).")
+
+
+def dataset_schema(dataset, metadata=None):
+    _require_pyarrow()
+    columns = DATASETS[dataset]
+    fields = [pa.field(name, _KINDS[kind][0]()) for name, kind in columns.items()]
+    return pa.schema(fields, metadata={"dataset": dataset, **(metadata or {})})
+
+
+def _batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_parquet(path, dataset, records, metadata=None, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+    # Returns how many records were written. metadata: extra str -> str
+    # key/values stored in the file footer (e.g. the snapshot date).
+    schema = dataset_schema(dataset, metadata)
+    columns = [(name, _KINDS[kind][1]) for name, kind in DATASETS[dataset].items()]
+    written = 0
+    nulled = {}
+
+    with atomic_output(path) as tmp:
+        with pq.ParquetWriter(tmp, schema, compression="zstd") as writer:
+            for batch in _batches(records, row_group_size):
+                arrays = {}
+                for name, convert in columns:
+                    raw = [record.get(name) for record in batch]
+                    values = list(map(convert, raw))
+                    lost = sum(1 for before, after in zip(raw, values) if after is None and before is not None)
+                    if lost:
+                        nulled[name] = nulled.get(name, 0) + lost
+                    arrays[name] = values
+                writer.write_table(pa.Table.from_pydict(arrays, schema=schema))
+                written += len(batch)
+            if not written:
+                writer.write_table(schema.empty_table())
+
+    if nulled:
+        details = ", ".join(f"{name}: {count}" for name, count in nulled.items())
+        print(f"⚠️ {path}: values that did not fit the column type were stored as null ({details}).")
+    return written
+
+
+def read_table(path, columns=None, filters=None, row_groups=None):
+    _require_pyarrow()
+    if row_groups is not None:
+        table = pq.ParquetFile(path, memory_map=True).read_row_groups(row_groups, columns=columns)
+        return table.filter(pq.filters_to_expression(filters)) if filters else table
+    return pq.read_table(path, columns=columns, filters=filters, memory_map=True)
+
+
+def read_frame(path, columns=None, filters=None, row_groups=None):
+    return read_table(path, columns, filters, row_groups).to_pandas(split_blocks=True, self_destruct=True)
+
+
+def describe(path):
+    _require_pyarrow()
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    metadata = parquet_file.metadata
+    schema = parquet_file.schema_arrow
+    return {
+        "rows": metadata.num_rows,
+        "row_groups": metadata.num_row_groups,
+        "columns": {field.name: str(field.type) for field in schema},
+        "metadata": {k.decode(): v.decode() for k, v in (schema.metadata or {}).items()},
+    }
+
+
+def parquet_path(json_path):
+    # The Parquet file written next to a JSON output.
+    return Path(json_path).with_suffix(".parquet")
@@ -0,0 +1,290 @@
+import argparse
+import importlib
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+from change_detection import file_sha256
+from instrumentation import METRICS_ENV, PROFILE_ENV
+from json_io import load_json, write_json
+
+REPO_ROOT = Path(__file__).resolve().parent
+
+# Runs the daily pipeline as a dependency graph instead of a fixed shell
+# sequence. Each Stage declares the files it reads and writes; a stage waits
+# for the stages that produce its inputs, and stages with nothing between
+# them run at the same time:
+#
+#   warren ──────┐
+#   swaggy ──────┼──> merge
+#   eu_snapshot ─┘
+#
+# Every stage runs in its own process (its module's main(argv), or a command
+# such as npm start) so it can be stopped at its timeout, and its output is
+# printed with a [stage] prefix. Failed or timed-out attempts are retried
+# with backoff; stages downstream of a failure are not run.
+#
+# A stage that only reads local files is skipped when the sha256 of every
+# input matches its last successful run and its outputs still exist (see
+# STATE_PATH). Stages that fetch from the network (external=True) always run.
+# Because unchanged outputs are not rewritten (change_detection.py), a quiet
+# day leaves the merge's inputs untouched and the merge is skipped.
+#
+# The run report (REPORT_PATH) has the status, attempts, timing and error of
+# every stage. --metrics / --profile are passed to every stage through
+# WARREN_METRICS / WARREN_PROFILE (see instrumentation.py), so all stages
+# append to one metrics file. --chunk-size runs the EU snapshot chunked and
+# the merge --bounded, for universes too large to hold in memory.
+
+STATE_PATH = ".pipeline_state.json"
+REPORT_PATH = "pipeline_report.json"
+DEFAULT_BACKOFF_S = 10.0
+
+
+class Stage:
+    # call: (module, argv) for a module whose main(argv) does the work
+    # (modules are looked up in the repo root and sentiment/); command: an argv
+    # to run as it is. inputs/outputs: repo-relative paths. after: stage names
+    # to wait for besides the producers of the inputs.
+    def __init__(self, name, call=None, command=None, inputs=(), outputs=(), after=(), external=False,
+                 timeout_s=None, retries=0):
+        if (call is None) == (command is None):
+            raise ValueError(f"Stage {name}: give exactly one of call or command.")
+        self.name = name
+        self.call = call
+        self.command = command
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.after = tuple(after)
+        self.external = external
+        self.timeout_s = timeout_s
+        self.retries = retries
+
+    def argv(self):
+        if self.command is not None:
+            return list(self.command)
+        module, args = self.call
+        return [sys.executable, str(Path(__file__).resolve()), "--invoke", module, *args]
+
+
+DEFAULT_STAGES = (
+    Stage("warren", command=["npm", "start"], outputs=("stockdata.json",), external=True, timeout_s=900, retries=1),
+    Stage("swaggy", call=("swaggy_scraper", []),
+          outputs=("sentiment/swaggystocks_sentiment.json", "options/unusual_options_activity.json"),
+          external=True, timeout_s=900, retries=1),
+    Stage("eu_snapshot", call=("eu_snapshot", []), inputs=("sentiment/eu_tickers.csv",),
+          outputs=("sentiment/eu_snapshot.json",), external=True, timeout_s=600, retries=1),
+    Stage("merge", call=("merge_sentiment", []),
+          inputs=("stockdata.json", "sentiment/swaggystocks_sentiment.json", "sentiment/eu_snapshot.json",
+                  "options/unusual_options_activity.json"),
+          outputs=("combined_output.json", "combined_output.screens.json"), timeout_s=300),
+)
+
+
+def bounded_stages(stages, chunk_size):
+    # The stages with the EU snapshot reading its universe chunk_size rows at a
+    # time and the merge in --bounded mode (which writes no screens).
+    bounded = []
+    for stage in stages:
+        if stage.call is not None and stage.name in ("eu_snapshot", "merge"):
+            module, args = stage.call
+            extra = ["--chunk-size", str(chunk_size)] if stage.name == "eu_snapshot" else ["--bounded"]
+            outputs = tuple(path for path in stage.outputs if not path.endswith(".screens.json"))
+            stage = Stage(stage.name, call=(module, [*args, *extra]), inputs=stage.inputs, outputs=outputs,
+                          after=stage.after, external=stage.external, timeout_s=stage.timeout_s, retries=stage.retries)
+        bounded.append(stage)
+    return tuple(bounded)
+
+
+# === Graph ===
+def dependencies(stages):
+    # {stage name: set of stage names it waits for}; rejects cycles.
+    producers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            producers[output] = stage.name
+    names = {stage.name for stage in stages}
+    graph = {}
+    for stage in stages:
+        upstream = {producers[path] for path in stage.inputs if path in producers} | set(stage.after)
+        unknown = upstream - names
+        if unknown:
+            raise ValueError(f"Stage {stage.name} waits for unknown stages {sorted(unknown)}.")
+        graph[stage.name] = upstream - {stage.name}
+
+    visiting, done = set(), set()
+
+    def visit(name, path):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Stage dependency cycle: {' -> '.join(path + [name])}")
+        visiting.add(name)
+        for upstream in graph[name]:
+            visit(upstream, path + [name])
+        visiting.discard(name)
+        done.add(name)
+
+    for name in graph:
+        visit(name, [])
+    return graph
+
+
+# === Change detection ===
+def input_digests(stage):
+    return {path: file_sha256(path) if Path(path).exists() else None for path in stage.inputs}
+
+
+def _unchanged(stage, digests, state):
+    if stage.external or not stage.inputs:
+        return False
+    previous = state.get(stage.name, {})
+    return previous.get("inputs") == digests and all(Path(path).exists() for path in stage.outputs)
+
+
+# === Running ===
+def _stream(process, name):
+    for line in process.stdout:
+        print(f"[{name}] {line}", end="", flush=True)
+
+
+def _attempt(stage):
+    # (status, error) of one run of the stage's process.
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    # Own process group, so a timeout also stops what the stage started (node, Chromium).
+    process = subprocess.Popen(stage.argv(), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                               encoding="utf-8", errors="replace", env=env, start_new_session=True)
+    reader = threading.Thread(target=_stream, args=(process, stage.name), daemon=True)
+    reader.start()
+    try:
+        returncode = process.wait(timeout=stage.timeout_s)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+        reader.join()
+        return "timeout", f"no result after {stage.timeout_s}s"
+    reader.join()
+    return ("ok", None) if returncode == 0 else ("failed", f"exit code {returncode}")
+
+
+def run_stage(stage, state, force=False, backoff_s=DEFAULT_BACKOFF_S):
+    started = time.perf_counter()
+    digests = input_digests(stage)
+    if not force and _unchanged(stage, digests, state):
+        print(f"⏭️ {stage.name}: inputs unchanged since the last run, skipping.")
+        return {"status": "skipped", "attempts": 0, "seconds": 0.0, "error": None}
+
+    status, error, attempts = "failed", None, 0
+    for attempt in range(stage.retries + 1):
+        attempts += 1
+        print(f"▶️ {stage.name}: attempt {attempts}/{stage.retries + 1}")
+        status, error = _attempt(stage)
+        if status == "ok":
+            break
+        if attempt < stage.retries:
+            wait_s = backoff_s * 2 ** attempt
+            print(f"⚠️ {stage.name}: {status} ({error}); retrying in {wait_s:.0f}s")
+            time.sleep(wait_s)
+    return {"status": status, "attempts": attempts, "seconds": round(time.perf_counter() - started, 2),
+            "error": error, "inputs": digests}
+
+
+def run_pipeline(stages=DEFAULT_STAGES, max_workers=None, force=False, state_path=STATE_PATH,
+                 report_path=REPORT_PATH, backoff_s=DEFAULT_BACKOFF_S):
+    graph = dependencies(stages)
+    by_name = {stage.name: stage for stage in stages}
+    try:
+        state = load_json(state_path)
+    except (OSError, ValueError):
+        state = {}
+
+    results = {}
+    started_at = datetime.utcnow()
+    started = time.perf_counter()
+    pending = dict(graph)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages)) as pool:
+        while pending or running:
+            for name, upstream in list(pending.items()):
+                if any(results.get(u, {}).get("status") not in (None, "ok", "skipped") for u in upstream):
+                    del pending[name]
+                    failed = sorted(u for u in upstream if u in results and results[u]["status"] not in ("ok", "skipped"))
+                    results[name] = {"status": "blocked", "attempts": 0, "seconds": 0.0,
+                                     "error": f"upstream {', '.join(failed)} did not succeed"}
+                    print(f"⛔ {name}: not run, {results[name]['error']}.")
+                elif all(u in results for u in upstream):
+                    del pending[name]
+                    running[pool.submit(run_stage, by_name[name], state, force, backoff_s)] = name
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                results[name] = future.result()
+
+    for name, result in results.items():
+        digests = result.pop("inputs", None)
+        if result["status"] == "ok":
+            state[name] = {"inputs": digests, "finished": datetime.utcnow().isoformat()}
+    write_json(state_path, state)
+
+    report = {
+        "started": started_at.isoformat(),
+        "seconds": round(time.perf_counter() - started, 2),
+        "ok": all(result["status"] in ("ok", "skipped") for result in results.values()),
+        "stages": {stage.name: results[stage.name] for stage in stages},
+    }
+    write_json(report_path, report)
+    print_report(report)
+    return report
+
+
+def print_report(report):
+    print(f"\n📋 Pipeline {'finished' if report['ok'] else 'FAILED'} in {report['seconds']:.1f}s")
+    for name, result in report["stages"].items():
+        detail = f"  {result['error']}" if result["error"] else ""
+        print(f"  {name:14s} {result['status']:8s} {result['seconds']:8.1f}s  {result['attempts']} attempt(s){detail}")
+
+
+def _invoke(module, argv):
+    # Child side of a call stage: run module.main(argv) from the repo root.
+    os.chdir(REPO_ROOT)
+    sys.path[:0] = [str(REPO_ROOT), str(REPO_ROOT / "sentiment")]
+    importlib.import_module(module).main(argv)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--invoke":
+        _invoke(sys.argv[2], sys.argv[3:])
+        sys.exit(0)
+
+    names = [stage.name for stage in DEFAULT_STAGES]
+    parser = argparse.ArgumentParser(description="Run the scrape -> snapshot -> merge pipeline as a dependency graph.")
+    parser.add_argument("--only", nargs="+", choices=names, help="Run just these stages.")
+    parser.add_argument("--exclude", nargs="+", choices=names, default=[], help="Leave these stages out.")
+    parser.add_argument("--force", action="store_true", help="Run stages even if their inputs are unchanged.")
+    parser.add_argument("--workers", type=int, help="Most stages running at once (default: all).")
+    parser.add_argument("--report", default=REPORT_PATH)
+    parser.add_argument("--metrics", metavar="PATH", help="Stages append span and counter metrics to this file.")
+    parser.add_argument("--profile", metavar="DIR", help="Stages write cProfile and tracemalloc dumps here.")
+    parser.add_argument("--chunk-size", type=int, metavar="ROWS",
+                        help="Memory-bounded mode: EU snapshot in chunks of this many tickers, sorted streaming merge.")
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    if args.metrics:
+        os.environ[METRICS_ENV] = str(Path(args.metrics).resolve())
+    if args.profile:
+        os.environ[PROFILE_ENV] = str(Path(args.profile).resolve())
+    stages = bounded_stages(DEFAULT_STAGES, args.chunk_size) if args.chunk_size else DEFAULT_STAGES
+    selected = [stage for stage in stages
+                if (args.only is None or stage.name in args.only) and stage.name not in args.exclude]
+    # Inputs produced by left-out stages are taken as they are on disk.
+    report = run_pipeline(selected, max_workers=args.workers, force=args.force, report_path=args.report)
+    sys.exit(0 if report["ok"] else 1)
@@ -0,0 +1,259 @@
+import argparse
+import heapq
+import sys
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "sentiment"))
+
+from change_detection import write_output
+from instrumentation import span
+from json_io import iter_mapping, iter_records, load_json
+from options_index import CONTRACT_FIELDS, updated_order
+
+# Per-ticker aggregates and screening indexes over the merged output, built
+# after the merge and stored next to it (<stem>.screens.json):
+#
+#   "tickers": {ticker: {"premium_total", "premium_calls", "premium_puts",
+#                        "call_volume", "put_volume", "max_iv", "option_rows",
+#                        "mentions", "rsi", "percentChange", "inPortfolio",
+#                        "top_calls": [up to TOP_CONTRACTS call contracts by premium]}}
+#   "sorted":  {field: {"values": [ascending], "tickers": [same order]}}
+#   "buckets": {field: {"edges": [...], "tickers": [[bucket 0], [bucket 1], ...]}}
+#   "sets":    {"portfolio": [...], "unusual": [tickers with options activity]}
+#
+# Screens then answer with a bisect on a sorted index, a bucket lookup or a
+# set intersection instead of a pass over every record:
+#
+#   screens = Screens.load()
+#   screens.top("premium_calls", 10)
+#   screens.oversold(min_mentions=50)
+#   screens.portfolio_unusual()
+
+OPTIONS_PATH = "options/unusual_options_activity.json"
+MERGED_PATH = "combined_output.json"
+TOP_CONTRACTS = 5
+OVERSOLD_RSI = 32  # same threshold as eu_snapshot's "oversold"
+
+SORTED_FIELDS = ("rsi", "percentChange", "mentions", "premium_total", "premium_calls", "premium_puts", "max_iv")
+# Bucket i holds edges[i - 1] <= value < edges[i]; the first and last are open-ended.
+BUCKET_EDGES = {
+    "rsi": (30, 40, 50, 60, 70),
+    "percentChange": (-10, -5, -2, 0, 2, 5, 10),
+    "mentions": (1, 10, 100, 1000),
+}
+
+
+def screens_path(merged_path):
+    path = Path(merged_path)
+    return path.with_name(f"{path.stem}.screens.json")
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+# === Building ===
+def latest_observations(option_records):
+    # The options output can hold several rows per contract (the poller
+    # appends each new observation, see sentiment/options_index.py); only the
+    # newest counts. Newest by "updated", the later row on the same date.
+    latest = {}
+    for record in option_records:
+        key = tuple(record.get(field) for field in CONTRACT_FIELDS)
+        current = latest.get(key)
+        if current is None or (updated_order(record.get("updated")) or 0) >= (updated_order(current.get("updated")) or 0):
+            latest[key] = record
+    return latest.values()
+
+
+def _option_aggregates(option_records):
+    aggregates = {}
+    top_calls = {}
+    for record in latest_observations(option_records):
+        ticker = record.get("ticker")
+        if not ticker:
+            continue
+        entry = aggregates.get(ticker)
+        if entry is None:
+            entry = aggregates[ticker] = {"premium_total": 0.0, "premium_calls": 0.0, "premium_puts": 0.0,
+                                          "call_volume": 0, "put_volume": 0, "max_iv": None, "option_rows": 0}
+        premium = _number(record.get("est._total_premium")) or 0.0
+        volume = _number(record.get("volume")) or 0
+        iv = _number(record.get("iv_(percent)"))
+        side = record.get("side")
+        entry["option_rows"] += 1
+        entry["premium_total"] += premium
+        if side == "call":
+            entry["premium_calls"] += premium
+            entry["call_volume"] += volume
+            heap = top_calls.setdefault(ticker, [])
+            contract = (premium, entry["option_rows"], {
+                "strike": record.get("strike"), "expiration": record.get("expiration"), "premium": premium,
+                "volume": volume, "iv": iv, "updated": record.get("updated")})
+            if len(heap) < TOP_CONTRACTS:
+                heapq.heappush(heap, contract)
+            else:
+                heapq.heappushpop(heap, contract)
+        elif side == "put":
+            entry["premium_puts"] += premium
+            entry["put_volume"] += volume
+        if iv is not None and (entry["max_iv"] is None or iv > entry["max_iv"]):
+            entry["max_iv"] = iv
+    for ticker, heap in top_calls.items():
+        aggregates[ticker]["top_calls"] = [contract for _, _, contract in sorted(heap, key=lambda c: (-c[0], c[1]))]
+    return aggregates
+
+
+def _sorted_index(tickers, field):
+    pairs = sorted((entry[field], ticker) for ticker, entry in tickers.items() if _number(entry.get(field)) is not None)
+    return {"values": [value for value, _ in pairs], "tickers": [ticker for _, ticker in pairs]}
+
+
+def _bucket_index(tickers, field, edges):
+    buckets = [[] for _ in range(len(edges) + 1)]
+    for ticker, entry in tickers.items():
+        value = _number(entry.get(field))
+        if value is not None:
+            buckets[bisect_right(edges, value)].append(ticker)
+    return {"edges": list(edges), "tickers": buckets}
+
+
+@span("screens.build")
+def build_screens(merged_items, option_records):
+    # merged_items: (ticker, record) pairs of the merged output; option_records:
+    # unusual options activity rows. Returns the document described above.
+    options = _option_aggregates(option_records)
+    tickers = {}
+    for ticker, record in merged_items:
+        entry = tickers[ticker] = {
+            "mentions": _number(record.get("swaggy_mentions")),
+            "rsi": _number(record.get("rsi")),
+            "percentChange": _number(record.get("percentChange")),
+            "inPortfolio": bool(record.get("inPortfolio")),
+        }
+        entry.update(options.pop(ticker, {}))
+    # Options activity on tickers the merge does not know still counts.
+    for ticker, aggregate in options.items():
+        tickers[ticker] = {"mentions": None, "rsi": None, "percentChange": None, "inPortfolio": False, **aggregate}
+
+    return {
+        "tickers": tickers,
+        "sorted": {field: _sorted_index(tickers, field) for field in SORTED_FIELDS},
+        "buckets": {field: _bucket_index(tickers, field, edges) for field, edges in BUCKET_EDGES.items()},
+        "sets": {
+            "portfolio": sorted(t for t, entry in tickers.items() if entry["inPortfolio"]),
+            "unusual": sorted(t for t, entry in tickers.items() if entry.get("option_rows")),
+        },
+    }
+
+
+def write_screens(merged_path=MERGED_PATH, options_path=OPTIONS_PATH, output=None):
+    # Builds from the files on disk; a missing options file means no options aggregates.
+    options = iter_records(options_path) if Path(options_path).exists() else ()
+    document = build_screens(iter_mapping(merged_path), options)
+    output = output or screens_path(merged_path)
+    change = write_output(output, "document", document)
+    if change.changed:
+        print(f"🔎 Screens for {len(document['tickers'])} tickers saved to {output}")
+    return change
+
+
+# === Querying ===
+class Screens:
+    def __init__(self, document):
+        self.tickers = document["tickers"]
+        self.sorted = document["sorted"]
+        self.buckets = document["buckets"]
+        self.sets = {name: set(tickers) for name, tickers in document["sets"].items()}
+
+    @classmethod
+    def load(cls, path=None):
+        return cls(load_json(path or screens_path(MERGED_PATH)))
+
+    def range(self, field, low=None, high=None):
+        # Tickers with low <= field < high, ascending by field.
+        index = self.sorted[field]
+        start = 0 if low is None else bisect_left(index["values"], low)
+        end = len(index["values"]) if high is None else bisect_left(index["values"], high)
+        return index["tickers"][start:end]
+
+    def top(self, field, n=10):
+        # The n tickers with the highest field, highest first.
+        return self.sorted[field]["tickers"][-n:][::-1] if n > 0 else []
+
+    def bucket(self, field, value):
+        # Tickers in the bucket value falls into.
+        index = self.buckets[field]
+        return list(index["tickers"][bisect_right(index["edges"], value)])
+
+    def histogram(self, field):
+        index = self.buckets[field]
+        edges = index["edges"]
+        labels = [f"<{edges[0]}"] + [f"{lo}..{hi}" for lo, hi in zip(edges, edges[1:])] + [f">={edges[-1]}"]
+        return dict(zip(labels, map(len, index["tickers"])))
+
+    def top_premium_calls(self, n=10):
+        # [(ticker, summed call premium, top call contracts)]
+        return [(t, self.tickers[t]["premium_calls"], self.tickers[t].get("top_calls", []))
+                for t in self.top("premium_calls", n) if self.tickers[t]["premium_calls"]]
+
+    def above(self, field, value):
+        # Tickers with field > value, ascending by field.
+        index = self.sorted[field]
+        return index["tickers"][bisect_right(index["values"], value):]
+
+    def oversold(self, min_mentions=0, rsi_below=OVERSOLD_RSI):
+        # RSI below rsi_below and more than min_mentions WSB mentions. The
+        # shorter of the two index slices is filtered by the other.
+        low_rsi = self.range("rsi", high=rsi_below)
+        mentioned = self.above("mentions", min_mentions)
+        shorter, longer = (mentioned, low_rsi) if len(mentioned) < len(low_rsi) else (low_rsi, mentioned)
+        longer = set(longer)
+        return [t for t in shorter if t in longer]
+
+    def portfolio_unusual(self):
+        # Portfolio tickers with options activity, by summed premium.
+        tickers = self.sets["portfolio"] & self.sets["unusual"]
+        return sorted(tickers, key=lambda t: -self.tickers[t]["premium_total"])
+
+
+def _print_rows(screens, tickers, fields):
+    for ticker in tickers:
+        entry = screens.tickers[ticker]
+        print(f"  {ticker:<12} " + "  ".join(f"{field}={entry.get(field)}" for field in fields))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the screening indexes next to the merged output.")
+    parser.add_argument("--merged", default=MERGED_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Rebuild the aggregates and indexes from the files on disk.")
+    build.add_argument("--options", default=OPTIONS_PATH)
+    calls = commands.add_parser("top-calls", help="Tickers with the most call premium, with their top contracts.")
+    calls.add_argument("-n", type=int, default=10)
+    oversold = commands.add_parser("oversold", help=f"RSI below {OVERSOLD_RSI} with more than N WSB mentions.")
+    oversold.add_argument("--min-mentions", type=int, default=0)
+    oversold.add_argument("--rsi-below", type=float, default=OVERSOLD_RSI)
+    commands.add_parser("portfolio", help="Portfolio tickers with unusual options activity.")
+    histogram = commands.add_parser("histogram", help="Ticker counts per bucket.")
+    histogram.add_argument("field", choices=sorted(BUCKET_EDGES))
+    args = parser.parse_args()
+
+    if args.command == "build":
+        write_screens(args.merged, args.options)
+    else:
+        screens = Screens.load(screens_path(args.merged))
+        if args.command == "top-calls":
+            for ticker, premium, contracts in screens.top_premium_calls(args.n):
+                print(f"  {ticker:<12} call premium {premium:,.0f}")
+                for contract in contracts:
+                    print(f"      {contract['strike']} {contract['expiration']}  premium {contract['premium']:,.0f}  "
+                          f"volume {contract['volume']}  iv {contract['iv']}")
+        elif args.command == "oversold":
+            _print_rows(screens, screens.oversold(args.min_mentions, args.rsi_below), ("rsi", "mentions", "percentChange"))
+        elif args.command == "portfolio":
+            _print_rows(screens, screens.portfolio_unusual(), ("premium_total", "call_volume", "put_volume", "max_iv"))
+        else:
+            for label, size in screens.histogram(args.field).items():
+                print(f"  {label:>10}  {size}")
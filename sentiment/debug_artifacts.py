@@ -0,0 +1,119 @@
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+DEBUG_LEVELS = ("off", "on-failure", "always")
+
+# Each run writes into <directory>/debug/<run stamp>/ and only the newest
+# keep_runs run folders are kept. The stamp (UTC) is taken when a scraper opens
+# its session, so every scrape of a serve or poll loop gets its own folder. Nothing touches the disk unless an artifact
+# is actually written, so a successful run at "on-failure" does no I/O.
+DEFAULT_KEEP_RUNS = 5
+RUN_STAMP_FORMAT = "%Y%m%dT%H%M%S"
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+DEFAULT_JPEG_QUALITY = 60
+MIN_JPEG_QUALITY = 25
+
+
+# What to capture and how. One policy is shared by all scrapers; each scraper
+# opens its own session() for its output folder.
+class DebugArtifactPolicy:
+    def __init__(self, level="on-failure", full_page=False, image_format="jpeg", quality=DEFAULT_JPEG_QUALITY,
+                 max_bytes=DEFAULT_MAX_BYTES, keep_runs=DEFAULT_KEEP_RUNS):
+        if level not in DEBUG_LEVELS:
+            raise ValueError(f"Unknown debug artifact level '{level}'. Use one of {DEBUG_LEVELS}.")
+        if image_format not in ("jpeg", "png"):
+            raise ValueError(f"Unknown screenshot format '{image_format}'. Use 'jpeg' or 'png'.")
+        self.level = level
+        self.full_page = full_page
+        self.image_format = image_format
+        self.quality = quality
+        self.max_bytes = max_bytes
+        self.keep_runs = keep_runs
+
+    def wants(self, failure=False):
+        return self.level == "always" or (self.level == "on-failure" and failure)
+
+    def session(self, directory):
+        return DebugArtifacts(self, directory)
+
+
+DEFAULT_DEBUG_POLICY = DebugArtifactPolicy()
+
+
+class DebugArtifacts:
+    def __init__(self, policy, directory):
+        self.policy = policy
+        self.root = Path(directory) / "debug"
+        self.run_dir = self.root / datetime.now(timezone.utc).strftime(RUN_STAMP_FORMAT)
+        self._prepared = False
+
+    def _prepare(self):
+        if self._prepared:
+            return
+        self.run_dir.mkdir(exist_ok=True, parents=True)
+        self._rotate()
+        self._prepared = True
+
+    def _rotate(self):
+        runs = sorted((p for p in self.root.iterdir() if p.is_dir()), key=lambda p: p.name, reverse=True)
+        for old_run in runs[self.policy.keep_runs:]:
+            shutil.rmtree(old_run, ignore_errors=True)
+
+    async def _capture(self, page, full_page, quality):
+        if self.policy.image_format == "png":
+            return await page.screenshot(type="png", full_page=full_page)
+        return await page.screenshot(type="jpeg", quality=quality, full_page=full_page)
+
+    async def screenshot(self, page, name, failure=False):
+        if not self.policy.wants(failure):
+            return None
+
+        full_page = self.policy.full_page
+        quality = self.policy.quality
+        try:
+            image = await self._capture(page, full_page, quality)
+            # Over the cap: fall back to the viewport, then to lower JPEG quality.
+            if len(image) > self.policy.max_bytes and full_page:
+                full_page = False
+                image = await self._capture(page, full_page, quality)
+            while len(image) > self.policy.max_bytes and self.policy.image_format == "jpeg" and quality > MIN_JPEG_QUALITY:
+                quality = max(MIN_JPEG_QUALITY, quality - 15)
+                image = await self._capture(page, full_page, quality)
+        except Exception as e:
+            print(f"⚠️ Could not take debug screenshot '{name}': {e}")
+            return None
+
+        if len(image) > self.policy.max_bytes:
+            print(f"⚠️ Debug screenshot '{name}' is {len(image) / 1024:.0f} KB, over the {self.policy.max_bytes / 1024:.0f} KB cap. Not saved.")
+            return None
+
+        self._prepare()
+        extension = "jpg" if self.policy.image_format == "jpeg" else "png"
+        path = self.run_dir / f"{name}.{extension}"
+        path.write_bytes(image)
+        print(f"Debug screenshot saved to: {path}")
+        return path
+
+    async def html(self, page_or_html, name, failure=False):
+        if not self.policy.wants(failure):
+            return None
+
+        if isinstance(page_or_html, str):
+            html = page_or_html
+        else:
+            try:
+                html = await page_or_html.content()
+            except Exception as e:
+                print(f"⚠️ Could not read page HTML for '{name}': {e}")
+                return None
+
+        data = html.encode("utf-8")
+        if len(data) > self.policy.max_bytes:
+            data = data[:self.policy.max_bytes] + b"\n<!-- truncated by debug_artifacts size cap -->\n"
+
+        self._prepare()
+        path = self.run_dir / f"{name}.html"
+        path.write_bytes(data)
+        print(f"Debug HTML saved to: {path}")
+        return path
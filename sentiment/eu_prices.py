@@ -0,0 +1,97 @@
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from instrumentation import count, span
+
+# Batched close-price fetch for the EU snapshot. Tickers are downloaded in
+# chunks with one yf.download call each instead of one Ticker().history()
+# round trip per ticker; the result is a single dates x tickers frame.
+#
+# A fetcher is any callable fetcher(tickers, period, start=None) -> (closes,
+# errors) where closes is a DataFrame with one column per ticker and errors
+# maps a ticker to its error message. With start (a date) it returns the bars
+# from that date on instead of the period. Pass your own to run without the
+# network.
+
+DEFAULT_PERIOD = "21d"
+DEFAULT_CHUNK_SIZE = 50
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF_S = 2.0
+
+
+def _trading_dates(index):
+    # Exchanges report in their own timezone; align on the trading date.
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize()
+
+
+def yfinance_fetcher(tickers, period, start=None):
+    import yfinance as yf
+    from yfinance import shared
+
+    window = {"start": str(start)} if start is not None else {"period": period}
+    data = yf.download(list(tickers), auto_adjust=True, group_by="column", threads=True, progress=False, **window)
+    # download() resets shared._ERRORS on every call, so this is this chunk's.
+    errors = {ticker: str(error) for ticker, error in getattr(shared, "_ERRORS", {}).items()}
+    if data is None or data.empty:
+        return pd.DataFrame(), errors
+
+    closes = data["Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(name=tickers[0])
+    return closes, errors
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _fetch_chunk(fetcher, chunk, period, start, retries, backoff_s):
+    for attempt in range(retries + 1):
+        try:
+            with span("eu.download", tickers=len(chunk), attempt=attempt + 1):
+                return fetcher(chunk, period, start=start)
+        except Exception as e:
+            if attempt == retries:
+                # Every ticker in the chunk gets the chunk's error.
+                count("eu.chunk_failures")
+                return pd.DataFrame(), {ticker: str(e) for ticker in chunk}
+            count("eu.fetch_retries")
+            wait_s = backoff_s * (2 ** attempt)
+            print(f"⚠️ Chunk of {len(chunk)} tickers failed ({e}), retrying in {wait_s:.0f}s...")
+            time.sleep(wait_s)
+
+
+def fetch_close_panel(tickers, period=DEFAULT_PERIOD, start=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                      retries=DEFAULT_RETRIES, backoff_s=DEFAULT_BACKOFF_S, fetcher=yfinance_fetcher):
+    # Returns (panel, failures): closes indexed by trading date with one column
+    # per fetched ticker, and {ticker: error message} for tickers that failed.
+    # Tickers with no rows at all are simply missing from the panel, like an
+    # empty history() used to be.
+    tickers = list(dict.fromkeys(tickers))
+    frames = []
+    failures = {}
+    for chunk in _chunks(tickers, chunk_size):
+        closes, errors = _fetch_chunk(fetcher, chunk, period, start, retries, backoff_s)
+        failures.update((ticker, error) for ticker, error in errors.items() if ticker in chunk)
+        if closes.empty:
+            continue
+        closes = closes.copy()
+        closes.index = _trading_dates(closes.index)
+        keep = [t for t in closes.columns if t in chunk and t not in errors and closes[t].notna().any()]
+        frames.append(closes[keep])
+
+    count("eu.tickers_failed", len(failures))
+    if not frames:
+        return pd.DataFrame(), failures
+    panel = pd.concat(frames, axis=1).sort_index()
+    # Two timezones can land on the same trading date; keep the last bar.
+    panel = panel.groupby(level=0).last()
+    return panel, failures
@@ -1,86 +1,241 @@
-import json
+import argparse
 import os
-import yfinance as yf
+import sys
+from collections import deque
+from contextlib import ExitStack
+from itertools import groupby
+from operator import itemgetter
+
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
+from pathlib import Path
 
-# === Load tickers from CSV ===
-ticker_file = "sentiment/eu_tickers.csv"
-portfolio_tickers = {
+from eu_prices import fetch_close_panel, yfinance_fetcher
+from indicators import last_valid, rsi, valid_counts
+from price_cache import DEFAULT_CACHE_PATH, DEFAULT_LOOKBACK_DAYS, DEFAULT_MAX_AGE, PriceCache
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import history_store
+from change_detection import write_output
+from instrumentation import add_arguments, count, span, stage
+from json_io import Spool, external_sort
+from parquet_io import parquet_path, write_parquet
+
+OUTPUT_PATH = "sentiment/eu_snapshot.json"
+TICKER_FILE = "sentiment/eu_tickers.csv"
+PORTFOLIO_TICKERS = {
     "NOVO-B.CO", "ASML.AS", "NKT.CO", "ALV.DE", "BESI.AS",
     "ORSTED.CO", "EVO.ST", "TEP.PA", "RELX.AS"
 }
+# Rows per sorted run and Parquet row group in chunked mode.
+CHUNKED_RUN_SIZE = 5000
 
-if not os.path.exists(ticker_file):
-    raise FileNotFoundError(f"CSV not found: {ticker_file}")
 
-universe = pd.read_csv(ticker_file)
-snapshot = {}
+def build_parser():
+    parser = argparse.ArgumentParser(description="Daily EU snapshot: price, change and RSI per ticker.")
+    parser.add_argument("--output", default=OUTPUT_PATH, help="Output file; a .ndjson name writes one ticker per line.")
+    parser.add_argument("--parquet", action="store_true", help="Also write typed Parquet next to the JSON (needs pyarrow).")
+    parser.add_argument("--no-history", action="store_true",
+                        help="Do not append this snapshot to the partitioned history store (see history_store.py).")
+    parser.add_argument("--no-cache", action="store_true", help="Download the whole window for every ticker.")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--lookback-days", type=int, default=DEFAULT_LOOKBACK_DAYS,
+                        help="Calendar days of closes the indicators are computed from.")
+    parser.add_argument("--max-age-hours", type=float, default=DEFAULT_MAX_AGE.total_seconds() / 3600,
+                        help="Tickers fetched more recently than this are not fetched again.")
+    parser.add_argument("--refresh", nargs="*", metavar="TICKER",
+                        help="Invalidate the cached history of these tickers (all if none are given) first.")
+    parser.add_argument("--chunk-size", type=int, default=0, metavar="ROWS",
+                        help="Memory-bounded mode for large universes: read, fetch and emit the CSV this many rows "
+                             "at a time. No delta is written in this mode.")
+    add_arguments(parser)
+    return parser
 
-# === RSI Calculation ===
-def calculate_rsi(prices, period=14):
-    deltas = [prices[i+1] - prices[i] for i in range(len(prices)-1)]
-    gains = [delta if delta > 0 else 0 for delta in deltas]
-    losses = [-delta if delta < 0 else 0 for delta in deltas]
 
-    avg_gain = sum(gains[:period]) / period
-    avg_loss = sum(losses[:period]) / period
+# === Load tickers from CSV ===
+@span("eu.load_universe")
+def load_universe(ticker_file=TICKER_FILE):
+    if not os.path.exists(ticker_file):
+        raise FileNotFoundError(f"CSV not found: {ticker_file}")
+    return pd.read_csv(ticker_file)
 
-    for i in range(period, len(deltas)):
-        gain = gains[i]
-        loss = losses[i]
-        avg_gain = (avg_gain * (period - 1) + gain) / period
-        avg_loss = (avg_loss * (period - 1) + loss) / period
 
-    if avg_loss == 0:
-        return 100.0
-    rs = avg_gain / avg_loss
-    return round(100 - (100 / (1 + rs)), 2)
+def iter_universe(ticker_file=TICKER_FILE, chunk_size=1000):
+    # The CSV in DataFrames of chunk_size rows, read as they are needed.
+    if not os.path.exists(ticker_file):
+        raise FileNotFoundError(f"CSV not found: {ticker_file}")
+    with pd.read_csv(ticker_file, chunksize=chunk_size) as reader:
+        yield from reader
 
-print("📈 Fetching EU tickers from yfinance...")
 
-for _, row in universe.iterrows():
-    ticker = row["ticker"]
-    try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="21d")
-        prices = hist["Close"].tolist()
+# === Fetch closes into one panel (dates x tickers) ===
+@span("eu.fetch_panel")
+def fetch_panel(tickers, use_cache=True, cache_path=DEFAULT_CACHE_PATH, lookback_days=DEFAULT_LOOKBACK_DAYS,
+                max_age=DEFAULT_MAX_AGE, refresh=None):
+    # Returns (panel, {ticker: error}).
+    if not use_cache:
+        return fetch_close_panel(tickers, period=f"{lookback_days}d")
+    with PriceCache(cache_path, max_age=max_age) as cache:
+        if refresh is not None:
+            cache.invalidate(refresh or None)
+        return _cached_panel(cache, tickers, lookback_days)
 
-        if len(prices) < 15:
-            rsi = None
-            pct_change = None
-        else:
-            rsi = calculate_rsi(prices)
-            pct_change = round(((prices[-1] - prices[-2]) / prices[-2]) * 100, 2)
 
-        snapshot[ticker] = {
-            "name": row["name"],
-            "country": row["country"],
-            "sector": row["sector"],
-            "price": round(prices[-1], 2) if prices else None,
-            "percentChange": pct_change,
-            "rsi": rsi,
-            "oversold": rsi is not None and rsi < 32,
-            "inPortfolio": ticker in portfolio_tickers
-        }
+def _cached_panel(cache, tickers, lookback_days, fetcher=yfinance_fetcher):
+    now = datetime.utcnow()
+    failed = cache.refresh(tickers, lookback_days=lookback_days, now=now, fetcher=fetcher)
+    since = now.date() - timedelta(days=lookback_days)
+    return cache.load_panel([t for t in tickers if t not in failed], since), failed
+
+
+def _value(series, ticker):
+    value = series.get(ticker)
+    return None if value is None or pd.isna(value) else round(float(value), 2)
+
+
+# === Indicators for all tickers at once ===
+@span("eu.build_snapshot")
+def build_snapshot(universe, panel, failed, portfolio_tickers=PORTFOLIO_TICKERS):
+    counts = valid_counts(panel)
+    last_price = last_valid(panel)
+    prev_price = last_valid(panel, back=1)
+    latest_rsi = last_valid(rsi(panel))
+    pct_change = ((last_price - prev_price) / prev_price) * 100
+
+    snapshot = {}
+    for _, row in universe.iterrows():
+        ticker = row["ticker"]
+        if ticker in failed:
+            snapshot[ticker] = {
+                "name": row["name"],
+                "country": row["country"],
+                "sector": row["sector"],
+                "price": None,
+                "percentChange": None,
+                "rsi": None,
+                "oversold": False,
+                "inPortfolio": ticker in portfolio_tickers
+            }
+            continue
+
+        enough_history = counts.get(ticker, 0) >= 15
+        ticker_rsi = _value(latest_rsi, ticker) if enough_history else None
 
-    except Exception as e:
-        print(f"⚠️ Error for {ticker}: {e}")
         snapshot[ticker] = {
             "name": row["name"],
             "country": row["country"],
             "sector": row["sector"],
-            "price": None,
-            "percentChange": None,
-            "rsi": None,
-            "oversold": False,
+            "price": _value(last_price, ticker),
+            "percentChange": _value(pct_change, ticker) if enough_history else None,
+            "rsi": ticker_rsi,
+            "oversold": ticker_rsi is not None and ticker_rsi < 32,
             "inPortfolio": ticker in portfolio_tickers
         }
+    return snapshot
+
+
+def _rows(items):
+    return ({"ticker": ticker, **record} for ticker, record in items if not ticker.startswith("_"))
+
 
 # === Save snapshot with date ===
-snapshot["_date"] = datetime.utcnow().isoformat()
-os.makedirs("sentiment", exist_ok=True)
-with open("sentiment/eu_snapshot.json", "w") as f:
-    json.dump(snapshot, f, indent=2)
+@span("eu.save_snapshot")
+def save_snapshot(snapshot, output=OUTPUT_PATH, parquet=False, history=True):
+    snapshot["_date"] = datetime.utcnow().isoformat()
+    # "_date" is left out of the comparison, so an unchanged snapshot keeps its file (and date).
+    change = write_output(output, "mapping", list(snapshot.items()), delta=True)
+    if change.changed:
+        print(f"✅ Saved {change.written - 1} tickers to {output}")
+
+    if parquet and (change.changed or not parquet_path(output).exists()):
+        write_parquet(parquet_path(output), "eu_snapshot", _rows(snapshot.items()), metadata={"date": snapshot["_date"]})
+    if history:
+        history_store.append("eu_snapshot", _rows(snapshot.items()), metadata={"date": snapshot["_date"]})
+    return change
+
+
+# === Chunked mode: one chunk of the universe in memory at a time ===
+# Each chunk is fetched, turned into snapshot records and emitted to sorted
+# runs on disk before the next one is read. The output is then compared and
+# written from a scratch file, in ticker order with "_date" last, so peak
+# memory follows the chunk size, not the universe size. A ticker listed twice
+# in the CSV keeps its last row, as in build_snapshot().
+def iter_snapshot_chunks(chunks, use_cache=True, cache_path=DEFAULT_CACHE_PATH, lookback_days=DEFAULT_LOOKBACK_DAYS,
+                         max_age=DEFAULT_MAX_AGE, refresh=None, fetcher=yfinance_fetcher):
+    # Yields (ticker, record) for every row of every chunk. fetcher: see eu_prices.py.
+    with ExitStack() as stack:
+        cache = None
+        if use_cache:
+            cache = stack.enter_context(PriceCache(cache_path, max_age=max_age))
+            if refresh is not None:
+                cache.invalidate(refresh or None)
+        for number, chunk in enumerate(chunks, 1):
+            count("eu.tickers", len(chunk))
+            count("eu.chunks")
+            tickers = list(chunk["ticker"])
+            with span("eu.fetch_panel", chunk=number, tickers=len(tickers)):
+                if cache is None:
+                    panel, failed = fetch_close_panel(tickers, period=f"{lookback_days}d", fetcher=fetcher)
+                else:
+                    panel, failed = _cached_panel(cache, tickers, lookback_days, fetcher)
+            for ticker, error in failed.items():
+                print(f"⚠️ Error for {ticker}: {error}")
+            yield from build_snapshot(chunk, panel, failed).items()
+            print(f"📦 Chunk {number}: {len(chunk)} tickers done.")
+
+
+def _last_per_ticker(items):
+    for _, group in groupby(items, key=itemgetter(0)):
+        yield deque(group, maxlen=1)[0]
+
+
+@span("eu.save_snapshot")
+def save_snapshot_chunks(items, output=OUTPUT_PATH, parquet=False, history=True):
+    directory = Path(output).parent
+    with ExitStack() as stack:
+        spool = stack.enter_context(Spool(directory))
+        ordered = external_sort(items, itemgetter(0), CHUNKED_RUN_SIZE, stack, directory)
+        tickers = spool.extend(_last_per_ticker(ordered))
+        snapshot_date = datetime.utcnow().isoformat()
+        spool.extend([("_date", snapshot_date)])
+        change = write_output(output, "mapping", spool)
+        if change.changed:
+            print(f"✅ Saved {tickers} tickers to {output}")
+
+        if parquet and (change.changed or not parquet_path(output).exists()):
+            write_parquet(parquet_path(output), "eu_snapshot", _rows(spool), metadata={"date": snapshot_date},
+                          row_group_size=CHUNKED_RUN_SIZE)
+        if history:
+            history_store.append("eu_snapshot", _rows(spool), metadata={"date": snapshot_date},
+                                 row_group_size=CHUNKED_RUN_SIZE)
+    return change
+
+
+# main(argv) is the command line; pipeline.py calls it as a stage.
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    with stage("eu_snapshot", args.metrics, args.profile):
+        if args.chunk_size > 0:
+            print(f"📈 Fetching EU tickers from yfinance, {args.chunk_size} at a time...")
+            items = iter_snapshot_chunks(iter_universe(chunk_size=args.chunk_size), use_cache=not args.no_cache,
+                                         cache_path=args.cache_path, lookback_days=args.lookback_days,
+                                         max_age=timedelta(hours=args.max_age_hours), refresh=args.refresh)
+            return save_snapshot_chunks(items, args.output, parquet=args.parquet, history=not args.no_history)
+
+        universe = load_universe()
+        count("eu.tickers", len(universe))
+
+        print("📈 Fetching EU tickers from yfinance...")
+        panel, failed = fetch_panel(universe["ticker"], use_cache=not args.no_cache, cache_path=args.cache_path,
+                                    lookback_days=args.lookback_days, max_age=timedelta(hours=args.max_age_hours),
+                                    refresh=args.refresh)
+        for ticker, error in failed.items():
+            print(f"⚠️ Error for {ticker}: {error}")
+
+        snapshot = build_snapshot(universe, panel, failed)
+        save_snapshot(snapshot, args.output, parquet=args.parquet, history=not args.no_history)
+    return snapshot
+
 
-print(f"✅ Saved {len(snapshot)-1} tickers to sentiment/eu_snapshot.json")
+if __name__ == "__main__":
+    main()
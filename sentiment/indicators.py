@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+# Vectorized indicators over a whole price panel: a DataFrame indexed by date
+# with one column per ticker. Every function returns the full series in the
+# same shape, so the snapshot can take the last row and backtests can use the
+# rest. Column names in compute_indicators() follow TradingView's scanner
+# columns (see scrapeRSI.js).
+#
+# Tickers trade on different exchange calendars, so an aligned panel has gaps
+# on each market's holidays. Indicators are computed on each column's valid
+# prices only (as if the gaps were not there) and written back to the dates
+# they came from, which is what the per-ticker lists always did.
+
+
+# === Reference implementation (the original scalar Wilder RSI) ===
+def calculate_rsi(prices, period=14):
+    deltas = [prices[i+1] - prices[i] for i in range(len(prices)-1)]
+    gains = [delta if delta > 0 else 0 for delta in deltas]
+    losses = [-delta if delta < 0 else 0 for delta in deltas]
+
+    avg_gain = sum(gains[:period]) / period
+    avg_loss = sum(losses[:period]) / period
+
+    for i in range(period, len(deltas)):
+        gain = gains[i]
+        loss = losses[i]
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+
+    if avg_loss == 0:
+        return 100.0
+    rs = avg_gain / avg_loss
+    return round(100 - (100 / (1 + rs)), 2)
+
+
+# === Gap handling ===
+def _pack(values):
+    # Moves each column's valid values to the bottom, keeping their order.
+    # Returns the packed array and the row order needed to undo it.
+    order = np.argsort(~np.isnan(values), axis=0, kind="stable")
+    return np.take_along_axis(values, order, axis=0), order
+
+
+def _unpack(packed, order, valid):
+    result = np.full(packed.shape, np.nan)
+    np.put_along_axis(result, order, packed, axis=0)
+    result[~valid] = np.nan
+    return result
+
+
+def _on_valid_prices(panel, fn):
+    # Runs fn(DataFrame of packed values) and maps the result back onto panel's dates.
+    values = panel.to_numpy(dtype=float)
+    packed, order = _pack(values)
+    result = fn(pd.DataFrame(packed, columns=panel.columns))
+    result = np.asarray(result, dtype=float)
+    return pd.DataFrame(_unpack(result, order, ~np.isnan(values)), index=panel.index, columns=panel.columns)
+
+
+def _as_panel(prices):
+    return prices.to_frame() if isinstance(prices, pd.Series) else prices
+
+
+# === Indicators ===
+def _wilder_rsi(packed, period):
+    values = packed.to_numpy()
+    rows, cols = values.shape
+    out = np.full((rows, cols), np.nan)
+    deltas = np.diff(values, axis=0)
+    gains = np.where(deltas > 0, deltas, 0.0)
+    losses = np.where(deltas < 0, -deltas, 0.0)
+    valid = ~np.isnan(deltas)
+
+    seen = np.zeros(cols, dtype=int)
+    avg_gain = np.zeros(cols)
+    avg_loss = np.zeros(cols)
+    for t in range(rows - 1):
+        live = valid[t]
+        seeding = live & (seen < period)
+        smoothing = live & (seen >= period)
+        # First `period` deltas: simple average (summed, then divided once, as
+        # calculate_rsi does). After that: Wilder smoothing.
+        avg_gain = np.where(seeding, avg_gain + gains[t], avg_gain)
+        avg_loss = np.where(seeding, avg_loss + losses[t], avg_loss)
+        avg_gain = np.where(smoothing, (avg_gain * (period - 1) + gains[t]) / period, avg_gain)
+        avg_loss = np.where(smoothing, (avg_loss * (period - 1) + losses[t]) / period, avg_loss)
+        seen = seen + live
+        seeded = seeding & (seen == period)
+        avg_gain = np.where(seeded, avg_gain / period, avg_gain)
+        avg_loss = np.where(seeded, avg_loss / period, avg_loss)
+
+        ready = live & (seen >= period)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi_t = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+        out[t + 1] = np.where(ready, rsi_t, np.nan)
+    return out
+
+
+def rsi(close, period=14):
+    return _on_valid_prices(_as_panel(close), lambda packed: _wilder_rsi(packed, period))
+
+
+def momentum(close, period=10):
+    return _on_valid_prices(_as_panel(close), lambda packed: packed - packed.shift(period))
+
+
+def _ema(packed, span):
+    # TradingView ta.ema: seeded with the first value, alpha = 2 / (span + 1).
+    return packed.ewm(span=span, adjust=False).mean()
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    # Returns (macd line, signal line).
+    panel = _as_panel(close)
+    macd_line = _on_valid_prices(panel, lambda packed: _ema(packed, fast) - _ema(packed, slow))
+    signal_line = _on_valid_prices(macd_line, lambda packed: _ema(packed, signal))
+    return macd_line, signal_line
+
+
+def cci(close, high=None, low=None, period=20):
+    # Typical price needs high/low; with close only, CCI runs on the close.
+    panel = _as_panel(close)
+    if high is not None and low is not None:
+        panel = (_as_panel(high) + _as_panel(low) + panel) / 3
+
+    def _cci(packed):
+        values = packed.to_numpy()
+        out = np.full(values.shape, np.nan)
+        if len(values) < period:
+            return out
+        windows = np.lib.stride_tricks.sliding_window_view(values, period, axis=0)
+        sma = windows.mean(axis=-1)
+        mean_dev = np.abs(windows - sma[..., None]).mean(axis=-1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[period - 1:] = (values[period - 1:] - sma) / (0.015 * mean_dev)
+        return out
+
+    return _on_valid_prices(panel, _cci)
+
+
+def compute_indicators(close, high=None, low=None, rsi_period=14):
+    macd_line, signal_line = macd(close)
+    return {
+        "RSI": rsi(close, rsi_period),
+        "Mom": momentum(close),
+        "MACD.macd": macd_line,
+        "MACD.signal": signal_line,
+        "CCI20": cci(close, high, low),
+    }
+
+
+# === Snapshot helpers ===
+def last_valid(panel, back=0):
+    # Per column: the value `back` valid rows before the last valid one (NaN if too short).
+    values = _as_panel(panel).to_numpy(dtype=float)
+    packed, _ = _pack(values)
+    row = packed.shape[0] - 1 - back
+    if row < 0:
+        return pd.Series(np.nan, index=panel.columns)
+    return pd.Series(packed[row], index=panel.columns)
+
+
+def valid_counts(panel):
+    return _as_panel(panel).count()
@@ -0,0 +1,64 @@
+import hashlib
+
+# Keys of the option rows already ingested, for the intraday poller.
+#
+# A row is one observation of a contract: the contract (ticker, side,
+# expiration, strike) plus the columns that move during the day. A contract
+# whose volume or price changed comes back as a new row; the same row read
+# again on the next poll does not. Only an 8-byte digest of each key is kept
+# (an int in a set, ~70 bytes per row instead of the ~1.5 KB of the record).
+#
+# The watermark is the newest "updated" date seen. Rows older than it can only
+# be rows the index already has, so they are skipped without a lookup, and the
+# poller stops reading the table at the first of them. Rows of the watermark's
+# own day are not: "updated" holds only a date, so new rows of that day can
+# sort below ones already seen.
+
+CONTRACT_FIELDS = ("ticker", "side", "expiration", "strike")
+ROW_KEY_FIELDS = CONTRACT_FIELDS + ("updated", "volume", "oi", "last")
+
+
+def row_key(record):
+    raw = "\x1f".join(str(record.get(field)) for field in ROW_KEY_FIELDS).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "little")
+
+
+def updated_order(value):
+    # "MM-DD-YYYY" (how the table shows it) -> YYYYMMDD, comparable; None otherwise.
+    if not isinstance(value, str) or len(value) != 10 or value[2] != "-" or value[5] != "-":
+        return None
+    digits = value[6:] + value[:2] + value[3:5]
+    return int(digits) if digits.isdigit() else None
+
+
+class RowKeyIndex:
+    __slots__ = ("keys", "watermark")
+
+    def __init__(self, records=()):
+        self.keys = set()
+        self.watermark = None
+        for record in records:
+            self.add(record)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, record):
+        return row_key(record) in self.keys
+
+    def is_stale(self, record, watermark=None):
+        # Older than watermark (default: the current one).
+        watermark = self.watermark if watermark is None else watermark
+        order = updated_order(record.get("updated"))
+        return order is not None and watermark is not None and order < watermark
+
+    def add(self, record):
+        # True if the row was not in the index yet.
+        key = row_key(record)
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        order = updated_order(record.get("updated"))
+        if order is not None and (self.watermark is None or order > self.watermark):
+            self.watermark = order
+        return True
@@ -0,0 +1,85 @@
+# Table-driven cell conversion for the unusual-options table. Headers are
+# resolved once per page into (output_key, converter) slots; each row is then
+# a single pass over its cells with no header string work.
+
+import math
+import operator
+
+# operator.call is Python 3.11+.
+_call = getattr(operator, "call", lambda convert, cell: convert(cell))
+
+# Currency, percent and thousands separators never change the value.
+_STRIP_TABLE = str.maketrans("", "", "$%, ")
+_SUFFIX_SCALE = {"K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}
+
+
+def parse_number(text):
+    # float for anything numeric ("$1.08K", "-2.5M", "1,234", "30%"), None
+    # when the text is not a number. The suffix is checked before anything is
+    # rewritten, so "1.5K" is 1500.0. float() also reads "nan" and "inf",
+    # which no cell means as a number, so only finite values count.
+    cleaned = text.translate(_STRIP_TABLE)
+    try:
+        value = float(cleaned)
+    except ValueError:
+        value = None
+        scale = _SUFFIX_SCALE.get(cleaned[-1:].upper())
+        if scale:
+            try:
+                value = float(cleaned[:-1]) * scale
+            except ValueError:
+                pass
+    return value if value is not None and math.isfinite(value) else None
+
+
+def to_float(text):
+    value = parse_number(text)
+    return text if value is None else value
+
+
+def to_int(text):
+    value = parse_number(text)
+    return text if value is None else int(value)
+
+
+def to_text(text):
+    return text
+
+
+COLUMN_CONVERTERS = {
+    "Shares Closed @ Price": to_float,
+    "Strike": to_float,
+    "Last": to_float,
+    "Bid": to_float,
+    "Ask": to_float,
+    "IV (%)": to_float,
+    "Delta": to_float,
+    "OTM (%)": to_float,
+    "Volume": to_int,
+    "OI": to_int,
+    "DTE": to_int,
+    "Est. Total Premium": to_float,
+}
+
+
+def output_key(header):
+    # Same key the options JSON has always used, e.g. "IV (%)" -> "iv_(percent)".
+    return header.lower().replace(' ', '_').replace('@', 'at').replace('%', 'percent')
+
+
+class OptionRowSchema:
+    # column_headers include the sticky "Ticker" column first, like the page.
+    __slots__ = ("keys", "converters", "cell_count")
+
+    def __init__(self, column_headers):
+        info_headers = column_headers[1:]
+        self.keys = ("ticker",) + tuple(output_key(h) for h in info_headers)
+        self.converters = tuple(COLUMN_CONVERTERS.get(h, to_text) for h in info_headers)
+        self.cell_count = len(info_headers)
+
+    def convert(self, ticker, cells):
+        # Typed row tuple in self.keys order.
+        return (ticker, *map(_call, self.converters, cells))
+
+    def as_dict(self, row):
+        return dict(zip(self.keys, row))
@@ -0,0 +1,227 @@
+import argparse
+import sqlite3
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from eu_prices import fetch_close_panel, yfinance_fetcher
+
+# Local daily-close history for the EU snapshot, one SQLite file keyed by
+# (ticker, date). A run only downloads the bars since each ticker's last cached
+# date; RSI and percentChange are then computed from the cache.
+#
+# Freshness: a ticker fetched less than max_age ago is not fetched again.
+# Otherwise the download starts at its last cached date, so that bar is
+# re-read too (it may have been an intraday value when it was stored).
+#
+# Closes are split/dividend adjusted (auto_adjust=True), and an adjustment
+# rewrites the whole history. So the download starts one bar earlier, at the
+# newest bar that was already final when it was cached, and if Yahoo now
+# reports a different close for it the ticker's history is dropped and
+# downloaded in full. A ticker whose history starts after the lookback window
+# (the lookback was raised) is downloaded in full as well.
+
+DEFAULT_CACHE_PATH = "sentiment/price_cache.sqlite"
+DEFAULT_LOOKBACK_DAYS = 21     # calendar days, same window as history(period="21d")
+DEFAULT_MAX_AGE = timedelta(hours=6)
+DEFAULT_RETENTION_DAYS = 400  # at least; a longer lookback keeps its whole window
+ADJUSTMENT_TOLERANCE = 1e-4    # relative change of a re-read close that counts as a re-adjustment
+# Days the first bar may come after the start of the lookback window: weekends
+# plus exchange holidays (Easter, Christmas). Tickers listed more recently than
+# that are downloaded in full on every refresh.
+MAX_LEADING_GAP_DAYS = 5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS closes (
+    ticker TEXT NOT NULL,
+    date   TEXT NOT NULL,
+    close  REAL NOT NULL,
+    PRIMARY KEY (ticker, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS fetches (
+    ticker     TEXT PRIMARY KEY,
+    fetched_at TEXT NOT NULL
+);
+"""
+
+
+def _readjusted(panel, final_closes):
+    # Tickers whose re-read final bar no longer matches the cached close: a
+    # split or dividend has re-adjusted their history since.
+    changed = []
+    for ticker, (day, close) in final_closes.items():
+        if ticker not in panel.columns:
+            continue
+        value = panel[ticker].get(pd.Timestamp(day))
+        if value is not None and not pd.isna(value) and abs(value - close) > ADJUSTMENT_TOLERANCE * abs(close):
+            changed.append(ticker)
+    return changed
+
+
+class PriceCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_age=DEFAULT_MAX_AGE, retention_days=DEFAULT_RETENTION_DAYS):
+        self.path = path
+        self.max_age = max_age
+        self.retention_days = retention_days
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- reads ---
+    def _want(self, tickers):
+        # Fills the temp "wanted" table the reads below join on.
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (ticker TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM wanted")
+        self.conn.executemany("INSERT OR IGNORE INTO wanted VALUES (?)", ((t,) for t in tickers))
+
+    def _dates(self, aggregate, tickers):
+        # Of the given tickers only (a chunk of the universe), or of all.
+        if tickers is None:
+            rows = self.conn.execute(f"SELECT ticker, {aggregate}(date) FROM closes GROUP BY ticker")
+        else:
+            self._want(tickers)
+            rows = self.conn.execute(f"SELECT c.ticker, {aggregate}(c.date) FROM closes c "
+                                     "JOIN wanted w ON w.ticker = c.ticker GROUP BY c.ticker")
+        return {ticker: date.fromisoformat(day) for ticker, day in rows}
+
+    def last_dates(self, tickers=None):
+        return self._dates("MAX", tickers)
+
+    def first_dates(self, tickers=None):
+        return self._dates("MIN", tickers)
+
+    def final_closes(self, tickers):
+        # {ticker: (date, close)} of the newest bar dated before the day the
+        # ticker was last fetched, i.e. one that was final when it was stored.
+        # (SQLite takes the bare c.date/c.close from the MAX row.)
+        self._want(tickers)
+        rows = self.conn.execute(
+            "SELECT c.ticker, MAX(c.date), c.close FROM closes c JOIN wanted w ON w.ticker = c.ticker "
+            "JOIN fetches f ON f.ticker = c.ticker WHERE c.date < substr(f.fetched_at, 1, 10) GROUP BY c.ticker")
+        return {ticker: (date.fromisoformat(day), close) for ticker, day, close in rows}
+
+    def fetched_at(self, tickers=None):
+        if tickers is None:
+            rows = self.conn.execute("SELECT ticker, fetched_at FROM fetches")
+        else:
+            self._want(tickers)
+            rows = self.conn.execute("SELECT f.ticker, f.fetched_at FROM fetches f JOIN wanted w ON w.ticker = f.ticker")
+        return {ticker: datetime.fromisoformat(at) for ticker, at in rows}
+
+    def load_panel(self, tickers, since):
+        # Closes from `since` (a date) on, dates x tickers.
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return pd.DataFrame()
+        self._want(tickers)
+        rows = pd.read_sql_query(
+            "SELECT c.ticker, c.date, c.close FROM closes c JOIN wanted w ON w.ticker = c.ticker "
+            "WHERE c.date >= ? ORDER BY c.date",
+            self.conn, params=(since.isoformat(),))
+        if rows.empty:
+            return pd.DataFrame()
+        panel = rows.pivot(index="date", columns="ticker", values="close")
+        panel.index = pd.to_datetime(panel.index)
+        panel.columns.name = None
+        return panel[[t for t in tickers if t in panel.columns]]
+
+    # --- writes ---
+    def store(self, panel, fetched_at, lookback_days=0):
+        # Bars older than the retention (or the lookback, if longer) are pruned.
+        rows = [
+            (ticker, day.date().isoformat(), float(value))
+            for ticker in panel.columns
+            for day, value in panel[ticker].dropna().items()
+        ]
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO closes VALUES (?, ?, ?)", rows)
+            self.conn.executemany("INSERT OR REPLACE INTO fetches VALUES (?, ?)",
+                                  ((ticker, fetched_at.isoformat()) for ticker in panel.columns))
+            keep_days = max(self.retention_days, lookback_days)
+            cutoff = (fetched_at.date() - timedelta(days=keep_days)).isoformat()
+            self.conn.execute("DELETE FROM closes WHERE date < ?", (cutoff,))
+
+    def invalidate(self, tickers=None):
+        # Drops the cached history of the given tickers (all when None); they
+        # are downloaded in full on the next refresh.
+        with self.conn:
+            if tickers is None:
+                self.conn.execute("DELETE FROM closes")
+                self.conn.execute("DELETE FROM fetches")
+            else:
+                tickers = [(t,) for t in tickers]
+                self.conn.executemany("DELETE FROM closes WHERE ticker = ?", tickers)
+                self.conn.executemany("DELETE FROM fetches WHERE ticker = ?", tickers)
+
+    # --- refresh ---
+    def refresh(self, tickers, lookback_days=DEFAULT_LOOKBACK_DAYS, now=None, fetcher=yfinance_fetcher, **fetch_options):
+        # Brings the cache up to date for tickers. Returns {ticker: error} like
+        # fetch_close_panel(); failed tickers keep whatever was cached before.
+        now = now or datetime.utcnow()
+        tickers = list(dict.fromkeys(tickers))
+        first_dates = self.first_dates(tickers)
+        last_dates = self.last_dates(tickers)
+        fetched_at = self.fetched_at(tickers)
+        final_closes = self.final_closes(tickers)
+        window_start = now.date() - timedelta(days=lookback_days)
+
+        full, by_start = [], {}
+        for ticker in tickers:
+            # History starting after the lookback window (it was raised) is a
+            # miss however recent the last fetch.
+            if ticker not in last_dates or first_dates[ticker] > window_start + timedelta(days=MAX_LEADING_GAP_DAYS):
+                full.append(ticker)
+            elif now - fetched_at.get(ticker, datetime.min) >= self.max_age:
+                # History ending before the window counts as a miss too.
+                if last_dates[ticker] < window_start:
+                    full.append(ticker)
+                else:
+                    start = final_closes[ticker][0] if ticker in final_closes else last_dates[ticker]
+                    by_start.setdefault(start, []).append(ticker)
+
+        failures, adjusted = {}, []
+        for start, group in sorted(by_start.items()):
+            panel, errors = fetch_close_panel(group, start=start, fetcher=fetcher, **fetch_options)
+            changed = _readjusted(panel, {t: final_closes[t] for t in group if t in final_closes})
+            self.store(panel.drop(columns=changed), now, lookback_days)
+            adjusted += changed
+            failures.update(errors)
+        if full or adjusted:
+            panel, errors = fetch_close_panel(full + adjusted, period=f"{lookback_days}d", fetcher=fetcher,
+                                              **fetch_options)
+            # The re-adjusted history goes only once its replacement arrived.
+            self.invalidate([t for t in adjusted if t in panel.columns])
+            self.store(panel, now, lookback_days)
+            failures.update(errors)
+
+        incremental = sum(len(group) for group in by_start.values()) - len(adjusted)
+        print(f"🗄️ Price cache: {len(tickers) - incremental - len(full) - len(adjusted)} fresh, {incremental} incremental, "
+              f"{len(full)} full downloads, {len(adjusted)} re-adjusted, {len(failures)} failed.")
+        return failures
+
+    def stats(self):
+        tickers, rows, first, last = self.conn.execute(
+            "SELECT COUNT(DISTINCT ticker), COUNT(*), MIN(date), MAX(date) FROM closes").fetchone()
+        return {"tickers": tickers, "rows": rows, "first_date": first, "last_date": last}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or invalidate the EU price cache.")
+    parser.add_argument("--path", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--invalidate", nargs="*", metavar="TICKER",
+                        help="Drop the cached history of these tickers (all tickers if none are given).")
+    args = parser.parse_args()
+
+    with PriceCache(args.path) as cache:
+        if args.invalidate is not None:
+            cache.invalidate(args.invalidate or None)
+            print(f"🗑️ Invalidated {', '.join(args.invalidate) if args.invalidate else 'all tickers'}.")
+        print(cache.stats())
@@ -0,0 +1,281 @@
+import asyncio
+import json
+import re
+from pathlib import Path
+
+from options_schema import COLUMN_CONVERTERS, output_key
+
+# Only XHR/fetch JSON coming from SwaggyStocks itself is considered; ads and
+# analytics beacons never match.
+API_URL_PATTERN = re.compile(r"swaggystocks\.com", re.IGNORECASE)
+API_RESOURCE_TYPES = {"xhr", "fetch"}
+
+# Output key -> accepted payload keys. Payload keys are normalized with
+# _norm_key() first, so "marketCap", "market_cap" and "Market Cap" all match.
+SENTIMENT_FIELDS = {
+    "ticker": ("ticker", "symbol"),
+    "mentions": ("mentions", "mentioncount", "count"),
+    "earnings": ("earnings", "earningsdate", "nextearnings"),
+    "market_cap": ("marketcap",),
+    "call_to_put_oi_ratio": ("calltoputoiratio", "callputoiratio", "calltoputratio"),
+    "thirty_day_iv": ("thirtydayiv", "30dayiv", "iv30"),
+    "option_activity_7d": ("optionactivity7d", "optionactivity", "unusualactivity7d"),
+}
+
+OPTION_FIELDS = {
+    "ticker": ("ticker", "symbol", "underlying"),
+    "shares_closed_at_price": ("sharesclosedatprice", "underlyingprice", "stockprice", "closeprice"),
+    "side": ("side", "putcall", "optiontype", "type"),
+    "expiration": ("expiration", "expirationdate", "expiry"),
+    "dte": ("dte", "daystoexpiration"),
+    "updated": ("updated", "updatedat", "date"),
+    "strike": ("strike", "strikeprice"),
+    "last": ("last", "lastprice"),
+    "bid": ("bid",),
+    "ask": ("ask",),
+    "volume": ("volume",),
+    "oi": ("oi", "openinterest"),
+    "iv_(percent)": ("ivpercent", "iv", "impliedvolatility"),
+    "delta": ("delta",),
+    "otm_(percent)": ("otmpercent", "otm"),
+    "est._total_premium": ("esttotalpremium", "totalpremium", "premium"),
+}
+
+# A dict only counts as a record if it has a ticker and at least this share of
+# the remaining fields, so unrelated ticker lists (search, watchlists) are ignored.
+MIN_FIELD_COVERAGE = 0.5
+
+# EXPERIMENTAL: the field aliases above were worked out on a synthetic
+# payload and have not been checked against a recorded one yet. Until a
+# session recorded with --record-responses passes benchmarks/bench_network.py
+# (API records == DOM parse of the same page), capture is opt-in (--network)
+# and captured records are only used when they agree with what the page
+# rendered (check_against_dom):
+# at least this share of the tickers in the DOM must be among them, and
+# there must be at least as many records as rendered rows.
+MIN_DOM_OVERLAP = 0.9
+OPTION_SIDES = {"call", "put"}
+
+
+def _norm_key(key):
+    return re.sub(r"[^a-z0-9]", "", str(key).lower())
+
+
+def _iter_dict_lists(payload):
+    # Yields every list of dicts anywhere in the payload, outermost first.
+    if isinstance(payload, list):
+        if payload and all(isinstance(item, dict) for item in payload):
+            yield payload
+        for item in payload:
+            yield from _iter_dict_lists(item)
+    elif isinstance(payload, dict):
+        for value in payload.values():
+            yield from _iter_dict_lists(value)
+
+
+def _map_record(item, fields):
+    normalized = {_norm_key(k): v for k, v in item.items()}
+    record = {}
+    matched = 0
+    for output_key, aliases in fields.items():
+        value = None
+        for alias in aliases:
+            if alias in normalized:
+                value = normalized[alias]
+                break
+        if value is not None and output_key != "ticker":
+            matched += 1
+        record[output_key] = value
+
+    if not record["ticker"] or matched < MIN_FIELD_COVERAGE * (len(fields) - 1):
+        return None
+    return record
+
+
+def _records_from_payload(payload, fields):
+    for candidates in _iter_dict_lists(payload):
+        records = [_map_record(item, fields) for item in candidates]
+        records = [r for r in records if r is not None]
+        if records:
+            return records
+    return []
+
+
+def sentiment_records_from_payload(payload):
+    records = _records_from_payload(payload, SENTIMENT_FIELDS)
+    for record in records:
+        # Same defaults and types as the HTML card parser.
+        record["mentions"] = int(record["mentions"] or 0)
+        if record["thirty_day_iv"] is not None:
+            record["thirty_day_iv"] = str(record["thirty_day_iv"])
+    return records
+
+
+# Numeric columns sometimes arrive pre-formatted ("$1.08K"); convert those
+# exactly like the table cells.
+_OPTION_CONVERTERS = {output_key(header): convert for header, convert in COLUMN_CONVERTERS.items()}
+
+
+def check_against_dom(records, dom_tickers, kind):
+    # None when the captured records look right, otherwise why not.
+    dom_tickers = [t for t in dom_tickers if t]
+    if not dom_tickers:
+        return "no rendered rows to compare with"
+    if len(records) < len(dom_tickers):
+        return f"{len(records)} records but {len(dom_tickers)} rendered rows"
+    captured = {str(record["ticker"]).strip().upper() for record in records}
+    rendered = {t.strip().upper() for t in dom_tickers}
+    overlap = len(rendered & captured) / len(rendered)
+    if overlap < MIN_DOM_OVERLAP:
+        return f"only {overlap:.0%} of the rendered tickers are in the captured records"
+    if kind == "options":
+        sides = {str(record["side"]).lower() for record in records}
+        if not sides <= OPTION_SIDES:
+            return f"unexpected side values {sorted(sides - OPTION_SIDES)[:5]}"
+    return None
+
+
+def option_records_from_payload(payload):
+    records = _records_from_payload(payload, OPTION_FIELDS)
+    for record in records:
+        for key, convert in _OPTION_CONVERTERS.items():
+            if isinstance(record[key], str):
+                record[key] = convert(record[key])
+    return records
+
+
+def request_key(method, url, post_data=None):
+    return method.upper(), url, post_data or ""
+
+
+def _merge_records(payloads, mapper):
+    # Rows of every captured page, in page order.
+    records = []
+    for payload in payloads:
+        records.extend(mapper(payload))
+    return records
+
+
+# Collects JSON API responses for a page, optionally recording them to disk.
+# Payloads are kept per request (method, URL, POST body) in the order the
+# requests were first seen, which for paginated tables is page order: pages
+# fetched with POST bodies or query strings each keep their rows, while the
+# same request made again replaces its earlier body.
+class ResponseCapture:
+    def __init__(self, url_pattern=API_URL_PATTERN, record_dir=None):
+        self.url_pattern = url_pattern
+        self.record_dir = Path(record_dir) if record_dir else None
+        self.payloads = {}
+        self.received = 0
+        self._pending = set()
+        self._arrived = asyncio.Event()
+
+    def attach(self, page):
+        page.on("response", self._on_response)
+
+    def _on_response(self, response):
+        if response.request.resource_type not in API_RESOURCE_TYPES:
+            return
+        if not self.url_pattern.search(response.url):
+            return
+        if "json" not in response.headers.get("content-type", ""):
+            return
+        task = asyncio.ensure_future(self._read(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _read(self, response):
+        try:
+            payload = await response.json()
+        except Exception as e:
+            print(f"⚠️ Could not read JSON from {response.url}: {e}")
+            return
+
+        request = response.request
+        self.payloads[request_key(request.method, response.url, request.post_data)] = payload
+        self.received += 1
+        if self.record_dir:
+            self._record(request, response.url, payload)
+        self._arrived.set()
+
+    def _record(self, request, url, payload):
+        self.record_dir.mkdir(exist_ok=True, parents=True)
+        index = len(list(self.record_dir.glob("*.json")))
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", url.split("://", 1)[-1])[:80].strip("_")
+        path = self.record_dir / f"{index:03d}_{slug}.json"
+        with open(path, "w") as f:
+            json.dump({"url": url, "method": request.method, "post_data": request.post_data, "payload": payload}, f,
+                      indent=2)
+
+    async def record_page(self, page):
+        # Saves the rendered page next to the recorded responses, so a
+        # recording can be checked against the DOM parse of the same page.
+        if not self.record_dir:
+            return None
+        self.record_dir.mkdir(exist_ok=True, parents=True)
+        path = self.record_dir / RECORDED_PAGE_NAME
+        path.write_text(await page.content(), encoding="utf-8")
+        return path
+
+    async def drain(self):
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    def records(self, mapper):
+        return _merge_records(self.payloads.values(), mapper)
+
+    async def wait_for_response(self, since, timeout_s):
+        # True once more than `since` responses have been read, False on timeout.
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout_s
+        while self.received <= since:
+            self._arrived.clear()
+            if self.received > since:
+                break
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._arrived.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+
+# --- Recorded fixtures ---
+# A recording directory holds NNN_<url>.json per response plus the page as
+# rendered at the end of the scrape.
+RECORDED_PAGE_NAME = "page.html"
+
+
+def load_recorded_responses(record_dir):
+    # [(request key, payload)]; recordings made before the method and body
+    # were stored count as GETs.
+    responses = []
+    for path in sorted(Path(record_dir).glob("*.json")):
+        with open(path, "r") as f:
+            recorded = json.load(f)
+        key = request_key(recorded.get("method", "GET"), recorded["url"], recorded.get("post_data"))
+        responses.append((key, recorded["payload"]))
+    return responses
+
+
+def records_from_recordings(record_dir, mapper):
+    # Replays a recorded session through a mapper exactly like ResponseCapture.records().
+    payloads = {}
+    for key, payload in load_recorded_responses(record_dir):
+        payloads[key] = payload
+    return _merge_records(payloads.values(), mapper)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Map recorded SwaggyStocks API responses to scraper output.")
+    parser.add_argument("record_dir", help="Directory written by --record-responses.")
+    parser.add_argument("--kind", choices=["sentiment", "options"], required=True)
+    args = parser.parse_args()
+
+    mapper = sentiment_records_from_payload if args.kind == "sentiment" else option_records_from_payload
+    records = records_from_recordings(args.record_dir, mapper)
+    print(json.dumps(records, indent=2))
@@ -0,0 +1,169 @@
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:  # lxml is optional; the soup backend covers everything
+    etree = None
+    lxml_html = None
+
+# Common row-extraction interface for both scrapers. A backend only pulls the
+# raw text out of the page; turning that text into typed values stays in
+# swaggy_scraper.py so every backend produces identical output.
+#
+#   sentiment_cards(html) -> [(ticker or None, mentions text or None, [info texts])]
+#   option_table(html)    -> (headers or None, [(ticker or None, [cell texts])]),
+#                            or None when the entries container is missing
+#   option_rows(html)     -> [(ticker or None, [cell texts])] for a fragment of rows
+#
+# Texts are joined like BeautifulSoup's get_text(strip=True).
+
+CARD_CLASS = "styles_card__4HWKI"
+TICKER_NAME_CLASS = "styles_name__fT9wO"
+MENTIONS_CLASS = "styles_mentions__YtuyJ"
+ENTRY_INFO_CLASS = "styles_entry__UNrRv"
+
+ENTRIES_CONTAINER_CLASS = "styles_entries__dTOx1"
+HEADER_ROW_CLASSES = "styles_container__IuRgX styles_header__XI6EA styles_sortable__3o7wg"
+DATA_ROW_CLASSES = "styles_container__IuRgX styles_path__ng9lW"
+ROW_TICKER_CLASS = "styles_name__M_BGb"
+INFO_CELL_CLASS = "styles_info__8BsWp"
+
+
+class SoupBackend:
+    # The original behaviour: full html.parser tree of the whole page.
+    name = "soup"
+
+    def _soup(self, html):
+        return BeautifulSoup(html, "html.parser")
+
+    def _text(self, tag):
+        return tag.get_text(strip=True) if tag else None
+
+    def sentiment_cards(self, html):
+        soup = self._soup(html)
+        cards = []
+        for card in soup.find_all("div", class_=CARD_CLASS):
+            cards.append((
+                self._text(card.find("p", class_=TICKER_NAME_CLASS)),
+                self._text(card.find("p", class_=MENTIONS_CLASS)),
+                [entry.get_text(strip=True) for entry in card.find_all("p", class_=ENTRY_INFO_CLASS)],
+            ))
+        return cards
+
+    def _rows(self, table_rows):
+        rows = []
+        for row in table_rows:
+            rows.append((
+                self._text(row.find("p", class_=ROW_TICKER_CLASS)),
+                [cell.get_text(strip=True) for cell in row.find_all("div", class_=INFO_CELL_CLASS)],
+            ))
+        return rows
+
+    def option_table(self, html):
+        soup = self._soup(html)
+        container = soup.find("div", class_=ENTRIES_CONTAINER_CLASS)
+        if not container:
+            return None
+
+        headers = None
+        header_row = container.find("div", class_=HEADER_ROW_CLASSES)
+        if header_row:
+            headers = ([p.get_text(strip=True) for p in header_row.select(f"p.{ROW_TICKER_CLASS}")]
+                       + [div.get_text(strip=True) for div in header_row.select(f"div.{INFO_CELL_CLASS}")])
+
+        return headers, self._rows(container.find_all("div", class_=DATA_ROW_CLASSES))
+
+    def option_rows(self, html):
+        soup = self._soup(html)
+        return self._rows(soup.find_all("div", class_=DATA_ROW_CLASSES))
+
+
+def _has_class(cls):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+
+def _has_classes(classes):
+    return " and ".join(_has_class(cls) for cls in classes.split())
+
+
+class LxmlBackend:
+    # libxml2 parser with XPath expressions compiled once per process.
+    name = "lxml"
+
+    def __init__(self):
+        if etree is None:
+            raise ImportError("The lxml parser backend needs the lxml package (pip install lxml).")
+        self._cards = etree.XPath(f"//div[{_has_class(CARD_CLASS)}]")
+        self._card_ticker = etree.XPath(f".//p[{_has_class(TICKER_NAME_CLASS)}]")
+        self._card_mentions = etree.XPath(f".//p[{_has_class(MENTIONS_CLASS)}]")
+        self._card_entries = etree.XPath(f".//p[{_has_class(ENTRY_INFO_CLASS)}]")
+        self._container = etree.XPath(f"//div[{_has_class(ENTRIES_CONTAINER_CLASS)}]")
+        self._header_row = etree.XPath(f".//div[{_has_classes(HEADER_ROW_CLASSES)}]")
+        self._data_rows = etree.XPath(f".//div[{_has_classes(DATA_ROW_CLASSES)}]")
+        self._row_ticker = etree.XPath(f".//p[{_has_class(ROW_TICKER_CLASS)}]")
+        self._info_cells = etree.XPath(f".//div[{_has_class(INFO_CELL_CLASS)}]")
+
+    def _parse(self, html):
+        return lxml_html.fromstring(html)
+
+    def _text(self, element):
+        return "".join(part.strip() for part in element.itertext())
+
+    def _first_text(self, matches):
+        return self._text(matches[0]) if matches else None
+
+    def sentiment_cards(self, html):
+        root = self._parse(html)
+        return [
+            (
+                self._first_text(self._card_ticker(card)),
+                self._first_text(self._card_mentions(card)),
+                [self._text(entry) for entry in self._card_entries(card)],
+            )
+            for card in self._cards(root)
+        ]
+
+    def _rows(self, table_rows):
+        return [
+            (self._first_text(self._row_ticker(row)), [self._text(cell) for cell in self._info_cells(row)])
+            for row in table_rows
+        ]
+
+    def option_table(self, html):
+        containers = self._container(self._parse(html))
+        if not containers:
+            return None
+        container = containers[0]
+
+        headers = None
+        header_rows = self._header_row(container)
+        if header_rows:
+            header_row = header_rows[0]
+            headers = ([self._text(p) for p in self._row_ticker(header_row)]
+                       + [self._text(div) for div in self._info_cells(header_row)])
+
+        return headers, self._rows(self._data_rows(container))
+
+    def option_rows(self, html):
+        # fromstring() would drop everything but the first row of a bare fragment.
+        root = self._parse(f"<div>{html}</div>")
+        return self._rows(self._data_rows(root))
+
+
+PARSER_BACKENDS = {
+    "soup": SoupBackend,
+    "lxml": LxmlBackend,
+}
+
+DEFAULT_PARSER_BACKEND = "lxml" if etree is not None else "soup"
+
+_backends = {}
+
+
+def get_parser_backend(name=None):
+    name = name or DEFAULT_PARSER_BACKEND
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend '{name}'. Use one of {sorted(PARSER_BACKENDS)}.")
+    if name not in _backends:
+        _backends[name] = PARSER_BACKENDS[name]()
+    return _backends[name]
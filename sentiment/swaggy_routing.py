@@ -0,0 +1,102 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+# Everything the dashboards need to render their data. Images, fonts, media,
+# websockets, beacons etc. are aborted before they leave the browser.
+DEFAULT_ALLOWED_RESOURCE_TYPES = ("document", "script", "stylesheet", "xhr", "fetch")
+
+# First-party only: ads, analytics and tag managers are served from other hosts.
+# A host also matches its subdomains (api.swaggystocks.com).
+DEFAULT_ALLOWED_HOSTS = ("swaggystocks.com",)
+
+
+def _host_allowed(host, allowed_hosts):
+    return any(host == allowed or host.endswith("." + allowed) for allowed in allowed_hosts)
+
+
+# Decides per request whether it may leave the browser. Shared by both scrapes;
+# each context gets its own counters through install().
+class RequestFilter:
+    def __init__(self, allowed_resource_types=DEFAULT_ALLOWED_RESOURCE_TYPES, allowed_hosts=DEFAULT_ALLOWED_HOSTS):
+        self.allowed_resource_types = set(allowed_resource_types)
+        self.allowed_hosts = tuple(h.lower() for h in allowed_hosts)
+
+    def allows(self, resource_type, url):
+        if resource_type not in self.allowed_resource_types:
+            return False
+        host = (urlsplit(url).hostname or "").lower()
+        return _host_allowed(host, self.allowed_hosts)
+
+    async def install(self, context, traffic=None):
+        async def handle(route):
+            request = route.request
+            try:
+                if self.allows(request.resource_type, request.url):
+                    await route.continue_()
+                else:
+                    if traffic:
+                        traffic.blocked += 1
+                    await route.abort()
+            except Exception:
+                # The context can close while requests are still in flight.
+                pass
+
+        await context.route("**/*", handle)
+
+
+DEFAULT_REQUEST_FILTER = RequestFilter()
+
+
+# Per-scrape page load time and bytes transferred.
+class TrafficMonitor:
+    def __init__(self, name):
+        self.name = name
+        self.requests = 0
+        self.blocked = 0
+        self.bytes_transferred = 0
+        self.started = None
+        self.load_time_s = None
+        self._pending = set()
+
+    def attach(self, context):
+        context.on("requestfinished", self._on_request_finished)
+
+    def _on_request_finished(self, request):
+        self.requests += 1
+        task = asyncio.ensure_future(self._count(request))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _count(self, request):
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        self.bytes_transferred += sizes["responseBodySize"] + sizes["responseHeadersSize"]
+
+    def start(self):
+        self.started = time.perf_counter()
+
+    def loaded(self):
+        self.load_time_s = time.perf_counter() - self.started
+
+    async def report(self):
+        # Must run before the context closes; sizes() needs a live request.
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+        total_s = time.perf_counter() - self.started if self.started else 0.0
+        load = f"{self.load_time_s:.1f}s" if self.load_time_s is not None else "n/a"
+        print(f"📦 {self.name}: page load {load}, scrape {total_s:.1f}s, "
+              f"{self.requests} requests, {self.bytes_transferred / 1024:.0f} KB transferred, {self.blocked} blocked.")
+
+
+async def open_context(browser, name, request_filter=None):
+    # New browser context with optional request blocking and traffic accounting.
+    context = await browser.new_context()
+    traffic = TrafficMonitor(name)
+    traffic.attach(context)
+    if request_filter:
+        await request_filter.install(context, traffic)
+    traffic.start()
+    return context, traffic
@@ -1,46 +1,116 @@
-import json
+import argparse
+import asyncio
+import sys
 from pathlib import Path
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
-from bs4 import BeautifulSoup
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+from swaggy_parsers import (CARD_CLASS, ENTRIES_CONTAINER_CLASS, MENTIONS_CLASS, PARSER_BACKENDS, TICKER_NAME_CLASS,
+                             get_parser_backend)
+from options_index import RowKeyIndex, updated_order
+from options_schema import OptionRowSchema, output_key
+from swaggy_network import (ResponseCapture, check_against_dom, option_records_from_payload,
+                             sentiment_records_from_payload)
+from debug_artifacts import DEBUG_LEVELS, DEFAULT_DEBUG_POLICY, DebugArtifactPolicy
+from swaggy_routing import DEFAULT_ALLOWED_HOSTS, DEFAULT_REQUEST_FILTER, RequestFilter, open_context
+from swaggy_session import DEFAULT_CACHE_MAX_MB, DEFAULT_PROFILE_DIR, PersistentSession
 import re
 import time
 
-# --- Function for WallStreetBets Ticker Sentiment (no changes needed) ---
-def scrape_swaggystocks_sentiment(output_path="sentiment/swaggystocks_sentiment.json"):
-    url = "https://swaggystocks.com/dashboard/wallstreetbets/ticker-sentiment"
-    data = []
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from change_detection import write_output
+from instrumentation import add_arguments, count, span, stage
+from json_io import append_records
+import history_store
+from parquet_io import parquet_path, write_parquet
+
+SENTIMENT_URL = "https://swaggystocks.com/dashboard/wallstreetbets/ticker-sentiment"
+OPTIONS_URL = "https://swaggystocks.com/dashboard/unusual-options-activity"
+
+SENTIMENT_OUTPUT_PATH = "sentiment/swaggystocks_sentiment.json"
+OPTIONS_OUTPUT_PATH = "options/unusual_options_activity.json"
+
+# Define selectors based on the provided HTML snippet
+MAIN_CONTENT_SELECTOR = "div.styles_content__uVpvM" # Outer most container from your HTML
+HEADER_ROW_SELECTOR = "div.styles_container__IuRgX.styles_header__XI6EA.styles_sortable__3o7wg"
+DATA_ROW_SELECTOR = "div.styles_container__IuRgX.styles_path__ng9lW"
+TICKER_IN_ROW_SELECTOR = "p.styles_name__M_BGb" # Class for the ticker text within a data row
+INFO_CELL_SELECTOR = "div.styles_info__8BsWp" # Class for general info cells within a data row
+SENTIMENT_TICKER_SELECTOR = f"div.{CARD_CLASS} p.{TICKER_NAME_CLASS}"
 
-    CARD_CLASS = "styles_card__4HWKI"
-    TICKER_NAME_CLASS = "styles_name__fT9wO"
-    MENTIONS_CLASS = "styles_mentions__YtuyJ"
-    ENTRY_INFO_CLASS = "styles_entry__UNrRv"
+# Trimmed text of every element matched by eval_on_selector_all.
+ELEMENT_TEXTS_JS = "(elements) => elements.map((element) => element.textContent.trim())"
 
-    sentiment_dir = Path("sentiment")
-    sentiment_dir.mkdir(exist_ok=True, parents=True)
-    debug_failed_sentiment_path = sentiment_dir / "debug_failed_sentiment.png"
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+# --- Browser helpers ---
+# Both scrapes can share one Chromium. Each scrape opens its own context so
+# cookies and storage never leak between the two dashboards.
+async def _launch_browser(p):
+    return await p.chromium.launch(headless=True)
+
+
+async def _run_with_own_browser(scrape, output_path, **kwargs):
+    async with async_playwright() as p:
+        browser = await _launch_browser(p)
+        try:
+            return await scrape(browser, output_path, **kwargs)
+        finally:
+            await browser.close()
+
+
+# --- Function for WallStreetBets Ticker Sentiment ---
+@span("sentiment.fetch")
+async def _fetch_sentiment(browser, capture=None, request_filter=DEFAULT_REQUEST_FILTER, debug=DEFAULT_DEBUG_POLICY):
+    # Returns (records, html). With capture, records come from the dashboard's
+    # own API responses if they agree with the rendered cards; otherwise html
+    # is serialized for the HTML parser.
+    artifacts = debug.session("sentiment")
+
+    context, traffic = await open_context(browser, "WallStreetBets Sentiment", request_filter)
+    try:
+        page = await context.new_page()
+        if capture:
+            capture.attach(page)
         print("🌐 Navigating to SwaggyStocks - WallStreetBets Sentiment...")
-        page.goto(url, timeout=90000)
+        with span("sentiment.goto"):
+            await page.goto(SENTIMENT_URL, timeout=90000)
+        traffic.loaded()
 
+        print("⏳ Waiting for sentiment cards to load...")
         try:
-            print("⏳ Waiting for sentiment cards to load...")
-            page.wait_for_selector(f"div.{CARD_CLASS}", timeout=30000)
+            await page.wait_for_selector(f"div.{CARD_CLASS}", timeout=30000)
             print("✅ Sentiment cards found.")
         except PlaywrightTimeout:
             print("⛔ Timeout: Sentiment cards not found. This might indicate a change in website structure or a slow load.")
-            page.screenshot(path=str(debug_failed_sentiment_path), full_page=True)
-            print(f"Debug screenshot saved to: {debug_failed_sentiment_path}")
-            browser.close()
-            return []
-
-        html = page.content()
-        browser.close()
+            await artifacts.screenshot(page, "failed_sentiment", failure=True)
+            return None, None
+
+        if capture:
+            await capture.drain()
+            await capture.record_page(page)
+            records = capture.records(sentiment_records_from_payload)
+            if not records:
+                print("⚠️ No usable sentiment API response captured. Falling back to HTML parsing.")
+            else:
+                rendered = await page.eval_on_selector_all(SENTIMENT_TICKER_SELECTOR, ELEMENT_TEXTS_JS)
+                problem = check_against_dom(records, rendered, "sentiment")
+                if problem is None:
+                    print(f"✅ Sentiment data captured from {len(capture.payloads)} API response(s).")
+                    return records, None
+                count("sentiment.capture_rejected")
+                print(f"⚠️ Captured sentiment records rejected ({problem}). Falling back to HTML parsing.")
+
+        with span("sentiment.content"):
+            return None, await page.content()
+    finally:
+        await traffic.report()
+        await context.close()
+
+
+@span("sentiment.parse_html")
+def _parse_sentiment_html(html, parser_backend=None):
+    data = []
 
-    soup = BeautifulSoup(html, "html.parser")
-    cards = soup.find_all("div", class_=CARD_CLASS)
+    cards = get_parser_backend(parser_backend).sentiment_cards(html)
+    count("sentiment.cards_seen", len(cards))
 
     if not cards:
         print(f"⚠️ No elements found with class '{CARD_CLASS}' in the scraped HTML. This could mean the page loaded, but the expected elements were not present.")
@@ -48,7 +118,7 @@ def scrape_swaggystocks_sentiment(output_path="sentiment/swaggystocks_sentiment.
 
     print(f"Found {len(cards)} potential sentiment cards.")
 
-    for i, card in enumerate(cards):
+    for i, (ticker_text, mentions_text, info_entries) in enumerate(cards):
         try:
             stock_data = {
                 "ticker": "N/A",
@@ -60,16 +130,14 @@ def scrape_swaggystocks_sentiment(output_path="sentiment/swaggystocks_sentiment.
                 "option_activity_7d": None
             }
 
-            ticker_p_tag = card.find("p", class_=TICKER_NAME_CLASS)
-            if ticker_p_tag:
-                stock_data["ticker"] = ticker_p_tag.get_text(strip=True)
+            if ticker_text is not None:
+                stock_data["ticker"] = ticker_text
             else:
                 print(f"⚠️ Card {i}: Ticker element with class '{TICKER_NAME_CLASS}' not found. Skipping card.")
+                count("sentiment.cards_skipped", reason="no_ticker")
                 continue
 
-            mentions_p_tag = card.find("p", class_=MENTIONS_CLASS)
-            if mentions_p_tag:
-                mentions_text = mentions_p_tag.get_text(strip=True)
+            if mentions_text is not None:
                 match = re.search(r'(\d+)\s*Mentions', mentions_text)
                 if match:
                     stock_data["mentions"] = int(match.group(1))
@@ -78,10 +146,7 @@ def scrape_swaggystocks_sentiment(output_path="sentiment/swaggystocks_sentiment.
             else:
                 print(f"⚠️ Card {stock_data['ticker']}: Mentions element with class '{MENTIONS_CLASS}' not found.")
 
-            info_entries = card.find_all("p", class_=ENTRY_INFO_CLASS)
-            for entry in info_entries:
-                text = entry.get_text(strip=True)
-
+            for text in info_entries:
                 if text.startswith("Earnings:"):
                     stock_data["earnings"] = text.replace("Earnings: ", "").strip()
                 elif text.startswith("Market Cap:"):
@@ -116,105 +181,168 @@ def scrape_swaggystocks_sentiment(output_path="sentiment/swaggystocks_sentiment.
             data.append(stock_data)
 
         except Exception as e:
-            print(f"⚠️ Failed to parse card {i} (Ticker: {stock_data.get('ticker', 'N/A')}): {e}. Card HTML snippet: {str(card)[:500]}")
+            print(f"⚠️ Failed to parse card {i} (Ticker: {stock_data.get('ticker', 'N/A')}): {e}. Card texts: {[ticker_text, mentions_text] + info_entries}")
+            count("sentiment.parse_failures")
             continue
 
+    return data
+
+
+async def scrape_swaggystocks_sentiment_async(browser, output_path=SENTIMENT_OUTPUT_PATH, network=False, record_dir=None,
+                                             request_filter=DEFAULT_REQUEST_FILTER, debug=DEFAULT_DEBUG_POLICY,
+                                             parser_backend=None, parquet=False, history=False, save=True):
+    # save=False leaves output_path to the caller: the combined runs write it
+    # once, with the options, through save_combined().
+    capture = ResponseCapture(record_dir=record_dir) if network else None
+    data, html = await _fetch_sentiment(browser, capture, request_filter, debug)
+    if data is None:
+        if html is None:
+            return []
+        # Parsing is CPU-bound; keep it off the event loop so the other scrape keeps going.
+        data = await asyncio.to_thread(_parse_sentiment_html, html, parser_backend)
+
     if data:
-        Path("sentiment").mkdir(exist_ok=True)
-        with open(output_path, "w") as f:
-            json.dump(data, f, indent=2)
-        print(f"✅ Scraped and saved {len(data)} tickers to {output_path}")
+        changed = True
+        if save:
+            changed = write_output(output_path, "records", data, delta=True).changed
+            if changed:
+                print(f"✅ Scraped and saved {len(data)} tickers to {output_path}")
+        else:
+            print(f"✅ Scraped {len(data)} tickers.")
+        if parquet and (changed or not parquet_path(output_path).exists()):
+            write_parquet(parquet_path(output_path), "wallstreetbets_sentiment", data)
+        if history:
+            history_store.append("wallstreetbets_sentiment", data)
     else:
         print("⚠️ No data extracted. This could be due to parsing errors or no cards being found after initial load.")
 
     return data
 
-# --- Function for Unusual Options Activity ---
-def scrape_unusual_options_activity(output_path="options/unusual_options_activity.json"):
-    url = "https://swaggystocks.com/dashboard/unusual-options-activity"
-    options_data = []
 
-    # Define selectors based on the provided HTML snippet
-    MAIN_CONTENT_SELECTOR = "div.styles_content__uVpvM" # Outer most container from your HTML
-    HEADER_ROW_SELECTOR = "div.styles_container__IuRgX.styles_header__XI6EA.styles_sortable__3o7wg"
-    DATA_ROW_SELECTOR = "div.styles_container__IuRgX.styles_path__ng9lW"
-    TICKER_IN_ROW_SELECTOR = "p.styles_name__M_BGb" # Class for the ticker text within a data row
-    INFO_CELL_SELECTOR = "div.styles_info__8BsWp" # Class for general info cells within a data row
-
-    options_dir = Path("options")
-    options_dir.mkdir(exist_ok=True, parents=True)
-    debug_failed_options_path = options_dir / "debug_failed_options.png"
-    debug_failed_options_html_path = options_dir / "debug_failed_options.html"
-    debug_after_initial_wait_path = options_dir / "debug_after_initial_wait.png"
-    debug_full_options_page_path = options_dir / "debug_full_options_page.png"
-    debug_full_options_html_path = options_dir / "debug_full_options_html.html"
-
-    with sync_playwright() as p:
-        # ABSOLUTELY ESSENTIAL FOR THIS DEBUGGING STEP: Run HEADLESS=FALSE
-        # If this works, you can change it back to True for efficiency.
-        browser = p.chromium.launch(headless=True) # Set headless to FALSE to see browser
-        page = browser.new_page()
-        print("🌐 Navigating to SwaggyStocks - Unusual Options Activity...")
-        page.goto(url, timeout=90000)
-
-        try:
-            print(f"⏳ Waiting for the main content container '{MAIN_CONTENT_SELECTOR}' to be attached...")
-            # Wait for the outermost content div to be attached, which should encompass everything
-            page.wait_for_selector(MAIN_CONTENT_SELECTOR, state='attached', timeout=60000)
-            print(f"✅ Main content container '{MAIN_CONTENT_SELECTOR}' confirmed attached.")
-
-            # Now, wait for at least one data row to be attached within that container
-            print(f"⏳ Waiting for at least one data row ('{DATA_ROW_SELECTOR}') to be attached...")
-            page.wait_for_selector(f"{MAIN_CONTENT_SELECTOR} {DATA_ROW_SELECTOR}", state='attached', timeout=30000)
-            print("✅ First data row confirmed attached.")
-
-            page.screenshot(path=str(debug_after_initial_wait_path), full_page=True)
-            print(f"Debug screenshot after initial elements attached saved to: {debug_after_initial_wait_path}")
-
-        except PlaywrightTimeout as e:
-            print(f"⛔ Timeout: Required page elements not found after initial load ({e}). This indicates the page content is not loading as expected or the selector is incorrect.")
-            page.screenshot(path=str(debug_failed_options_path), full_page=True)
-            print(f"Debug screenshot saved to: {debug_failed_options_path}")
-            failed_html = page.content()
-            debug_failed_options_html_path.write_text(failed_html, encoding="utf-8")
-            print(f"Debug HTML saved to: {debug_failed_options_html_path}")
-            browser.close()
-            return []
-        except Exception as e:
-            print(f"An unexpected error occurred during initial page load: {e}")
-            page.screenshot(path=str(debug_failed_options_path), full_page=True)
-            print(f"Debug screenshot saved to: {debug_failed_options_path}")
-            failed_html = page.content()
-            debug_failed_options_html_path.write_text(failed_html, encoding="utf-8")
-            print(f"Debug HTML saved to: {debug_failed_options_html_path}")
-            browser.close()
-            return []
-
-        # --- SCROLLING LOGIC ---
-        # We know the page is very long and data is loaded on scroll.
-        print("📈 Scrolling to load all data...")
-        # Your HTML shows no direct scroller element like MuiDataGrid-virtualScroller.
-        # It seems the entire styles_content__uVpvM might be the scrollable area,
-        # or the body of the document. Let's try to scroll the main page.
-        
-        # Determine the scrollable element. It could be the 'body' or 'html' element,
-        # or the 'styles_content__uVpvM' div itself if it has overflow.
-        # Let's try scrolling the page's main scrollbar (document.body.scrollHeight)
-        # If this doesn't load all data, we'll need to find the specific scrollable div.
-
-        last_scroll_height = -1
-        scroll_attempts = 0
-        max_scroll_attempts = 100 # Increased max attempts, as this page can be very long
+def scrape_swaggystocks_sentiment(output_path=SENTIMENT_OUTPUT_PATH, **scrape_options):
+    # scrape_options: any keyword of scrape_swaggystocks_sentiment_async().
+    return asyncio.run(_run_with_own_browser(scrape_swaggystocks_sentiment_async, output_path, **scrape_options))
 
+# --- Function for Unusual Options Activity ---
+PREDEFINED_OPTION_HEADERS = [
+    "Ticker", "Shares Closed @ Price", "Side", "Expiration", "DTE", "Updated",
+    "Strike", "Last", "Bid", "Ask", "Volume", "OI", "IV (%)", "Delta",
+    "OTM (%)", "Est. Total Premium"
+]
+
+# Harvest mode: instead of sleeping a fixed 2s per scroll, wait for the row
+# count to grow and stop once no new rows show up within an adaptive timeout
+# (HARVEST_TIMEOUT_FACTOR x the smoothed time between batches, clamped).
+HARVEST_INITIAL_TIMEOUT_S = 8.0
+HARVEST_MIN_TIMEOUT_S = 1.5
+HARVEST_MAX_TIMEOUT_S = 15.0
+HARVEST_TIMEOUT_FACTOR = 4.0
+HARVEST_MAX_BATCHES = 500
+
+# Installs a MutationObserver that keeps a live count of loaded data rows.
+HARVEST_OBSERVER_JS = """
+(rowSelector) => {
+    if (window.__warrenHarvest) {
+        return window.__warrenHarvest.count;
+    }
+    const state = { count: document.querySelectorAll(rowSelector).length };
+    const observer = new MutationObserver(() => {
+        state.count = document.querySelectorAll(rowSelector).length;
+    });
+    observer.observe(document.body, { childList: true, subtree: true });
+    window.__warrenHarvest = state;
+    return state.count;
+}
+"""
+
+# Returns the outerHTML of rows not handed over yet and marks them as harvested.
+HARVEST_BATCH_JS = """
+(rowSelector) => {
+    const rows = document.querySelectorAll(rowSelector + ':not([data-warren-harvested])');
+    const batch = [];
+    for (const row of rows) {
+        row.setAttribute('data-warren-harvested', '1');
+        batch.push(row.outerHTML);
+    }
+    return batch;
+}
+"""
+
+HARVEST_WAIT_JS = "(seen) => window.__warrenHarvest.count > seen"
+
+
+def _next_harvest_timeout(avg_gap_s, gap_s):
+    avg_gap_s = gap_s if avg_gap_s is None else 0.7 * avg_gap_s + 0.3 * gap_s
+    timeout_s = min(HARVEST_MAX_TIMEOUT_S, max(HARVEST_MIN_TIMEOUT_S, avg_gap_s * HARVEST_TIMEOUT_FACTOR))
+    return avg_gap_s, timeout_s
+
+
+async def _open_options_page(context, artifacts, capture=None, traffic=None):
+    page = await context.new_page()
+    if capture:
+        capture.attach(page)
+    print("🌐 Navigating to SwaggyStocks - Unusual Options Activity...")
+    with span("options.goto"):
+        await page.goto(OPTIONS_URL, timeout=90000)
+    if traffic:
+        traffic.loaded()
+
+    try:
+        print(f"⏳ Waiting for the main content container '{MAIN_CONTENT_SELECTOR}' to be attached...")
+        # Wait for the outermost content div to be attached, which should encompass everything
+        await page.wait_for_selector(MAIN_CONTENT_SELECTOR, state='attached', timeout=60000)
+        print(f"✅ Main content container '{MAIN_CONTENT_SELECTOR}' confirmed attached.")
+
+        # Now, wait for at least one data row to be attached within that container
+        print(f"⏳ Waiting for at least one data row ('{DATA_ROW_SELECTOR}') to be attached...")
+        await page.wait_for_selector(f"{MAIN_CONTENT_SELECTOR} {DATA_ROW_SELECTOR}", state='attached', timeout=30000)
+        print("✅ First data row confirmed attached.")
+
+        await artifacts.screenshot(page, "after_initial_wait")
+
+    except PlaywrightTimeout as e:
+        print(f"⛔ Timeout: Required page elements not found after initial load ({e}). This indicates the page content is not loading as expected or the selector is incorrect.")
+        await artifacts.screenshot(page, "failed_options", failure=True)
+        await artifacts.html(page, "failed_options", failure=True)
+        return None
+    except Exception as e:
+        print(f"An unexpected error occurred during initial page load: {e}")
+        await artifacts.screenshot(page, "failed_options", failure=True)
+        await artifacts.html(page, "failed_options", failure=True)
+        return None
+
+    return page
+
+
+@span("options.scroll_and_serialize")
+async def _scroll_and_serialize(page, artifacts):
+    # --- SCROLLING LOGIC ---
+    # We know the page is very long and data is loaded on scroll.
+    print("📈 Scrolling to load all data...")
+    # Your HTML shows no direct scroller element like MuiDataGrid-virtualScroller.
+    # It seems the entire styles_content__uVpvM might be the scrollable area,
+    # or the body of the document. Let's try to scroll the main page.
+
+    # Determine the scrollable element. It could be the 'body' or 'html' element,
+    # or the 'styles_content__uVpvM' div itself if it has overflow.
+    # Let's try scrolling the page's main scrollbar (document.body.scrollHeight)
+    # If this doesn't load all data, we'll need to find the specific scrollable div.
+
+    last_scroll_height = -1
+    scroll_attempts = 0
+    max_scroll_attempts = 100 # Increased max attempts, as this page can be very long
+
+    with span("options.scroll") as scrolling:
         while scroll_attempts < max_scroll_attempts:
             # Scroll to the bottom of the page
-            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            
+            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+
             # Wait for content to load after scrolling. Adjust this time based on observation.
-            time.sleep(2) # Increased sleep slightly
+            # asyncio.sleep, not time.sleep: the sentiment scrape runs on the same loop.
+            await asyncio.sleep(2) # Increased sleep slightly
+
+            current_scroll_height = await page.evaluate("document.body.scrollHeight")
 
-            current_scroll_height = page.evaluate("document.body.scrollHeight")
-            
             if current_scroll_height == last_scroll_height:
                 print(f"  Reached end of scrollable content. Height {current_scroll_height}px, after {scroll_attempts+1} attempts.")
                 break
@@ -222,148 +350,510 @@ def scrape_unusual_options_activity(output_path="options/unusual_options_activit
             print(f"  Attempt {scroll_attempts+1}: Scrolled to {current_scroll_height}px.")
             last_scroll_height = current_scroll_height
             scroll_attempts += 1
-        
-        print("✅ Finished scrolling.")
-        page.screenshot(path=str(debug_full_options_page_path), full_page=True)
-        print(f"Full page screenshot saved to: {debug_full_options_page_path}")
+        scrolling.set(attempts=scroll_attempts + 1)
+
+    print("✅ Finished scrolling.")
+    await artifacts.screenshot(page, "full_options_page")
+
+    with span("options.content"):
+        html = await page.content()
 
-        html = page.content()
-        browser.close()
+    # --- Save the FULL HTML content for inspection (only with --debug-artifacts always) ---
+    await artifacts.html(html, "full_options_html")
 
-    # --- Save the FULL HTML content for inspection (This should now always be reached if scrolling succeeds) ---
-    debug_full_options_html_path.write_text(html, encoding="utf-8")
-    print(f"📄 Full page HTML saved to {debug_full_options_html_path} for detailed inspection.")
+    return html
+
+
+async def _read_option_schema(page, parser_backend=None):
+    try:
+        header_html = await page.eval_on_selector(HEADER_ROW_SELECTOR, "el => el.outerHTML")
+        column_headers, _ = get_parser_backend(parser_backend).option_table(f'<div class="{ENTRIES_CONTAINER_CLASS}">{header_html}</div>')
+        if not column_headers:
+            raise ValueError("empty header row")
+    except Exception:
+        print("⚠️ Could not find the header row on the page. Using predefined headers.")
+        column_headers = list(PREDEFINED_OPTION_HEADERS)
+    print(f"Detected Headers: {column_headers}")
+    return OptionRowSchema(column_headers)
+
+
+@span("options.harvest")
+async def _harvest_option_rows(page, parser_backend=None, schema=None):
+    schema = schema or await _read_option_schema(page, parser_backend)
+
+    print("📈 Harvesting option rows as they load...")
+    seen = await page.evaluate(HARVEST_OBSERVER_JS, DATA_ROW_SELECTOR)
+    options_data = []
+    harvested = 0
+    timeout_s = HARVEST_INITIAL_TIMEOUT_S
+    avg_gap_s = None
+
+    for batch_no in range(1, HARVEST_MAX_BATCHES + 1):
+        batch = await page.evaluate(HARVEST_BATCH_JS, DATA_ROW_SELECTOR)
+        if batch:
+            # Parse right away so only the extracted dicts stay around, never the full DOM dump.
+            options_data.extend(await asyncio.to_thread(_parse_option_row_batch, batch, schema, harvested, parser_backend))
+            harvested += len(batch)
+
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        waited_from = time.perf_counter()
+        try:
+            await page.wait_for_function(HARVEST_WAIT_JS, arg=seen, timeout=timeout_s * 1000)
+        except PlaywrightTimeout:
+            print(f"  No new rows within {timeout_s:.1f}s after batch {batch_no}. Assuming the table is fully loaded.")
+            break
 
-    soup = BeautifulSoup(html, "html.parser")
+        gap_s = time.perf_counter() - waited_from
+        avg_gap_s, timeout_s = _next_harvest_timeout(avg_gap_s, gap_s)
+        seen = await page.evaluate("() => window.__warrenHarvest.count")
+        print(f"  Batch {batch_no}: {seen} rows loaded, next wait up to {timeout_s:.1f}s.")
+    else:
+        print(f"⚠️ Stopped after {HARVEST_MAX_BATCHES} batches; the table may be incomplete.")
+
+    # Rows that arrived while the last wait timed out.
+    batch = await page.evaluate(HARVEST_BATCH_JS, DATA_ROW_SELECTOR)
+    if batch:
+        options_data.extend(await asyncio.to_thread(_parse_option_row_batch, batch, schema, harvested, parser_backend))
+        harvested += len(batch)
+
+    print(f"✅ Finished harvesting. {harvested} rows seen, {len(options_data)} parsed.")
+    return options_data
+
+
+async def _rendered_option_tickers(page):
+    return await page.eval_on_selector_all(f"{DATA_ROW_SELECTOR} {TICKER_IN_ROW_SELECTOR}", ELEMENT_TEXTS_JS)
+
+
+def _capture_problem(records, rendered):
+    problem = check_against_dom(records, rendered, "options")
+    if problem is not None:
+        count("options.capture_rejected")
+        print(f"⚠️ Captured option records rejected ({problem}). Falling back to the DOM.")
+    return problem
+
+
+@span("options.capture")
+async def _capture_option_rows(page, capture):
+    # The first rows are already rendered, so their API payload has arrived.
+    # If it maps to option records that match those rows, keep scrolling only
+    # to trigger the next pages and read them from the network instead of
+    # the DOM. Returns [] (use the DOM) whenever the records do not match.
+    await capture.drain()
+    records = capture.records(option_records_from_payload)
+    if not records:
+        print("⚠️ No usable options API response captured. Falling back to the DOM.")
+        return []
+    if _capture_problem(records, await _rendered_option_tickers(page)):
+        return []
 
-    # --- BeautifulSoup parsing logic ---
-    # We are now using the specific class names identified from your provided HTML snippet.
+    print("📈 Options table is fed by the API; scrolling to pull the remaining pages...")
+    timeout_s = HARVEST_INITIAL_TIMEOUT_S
+    avg_gap_s = None
+
+    for batch_no in range(1, HARVEST_MAX_BATCHES + 1):
+        seen = capture.received
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        waited_from = time.perf_counter()
+        if not await capture.wait_for_response(seen, timeout_s):
+            print(f"  No new API page within {timeout_s:.1f}s after {batch_no} scroll(s). Assuming the table is fully loaded.")
+            break
+        avg_gap_s, timeout_s = _next_harvest_timeout(avg_gap_s, time.perf_counter() - waited_from)
+    else:
+        print(f"⚠️ Stopped after {HARVEST_MAX_BATCHES} batches; the table may be incomplete.")
+
+    await capture.drain()
+    options_data = capture.records(option_records_from_payload)
+    # Every row scrolled into view must be in the captured pages too.
+    if _capture_problem(options_data, await _rendered_option_tickers(page)):
+        return []
+    print(f"✅ Captured {len(options_data)} rows from {len(capture.payloads)} API response(s).")
+    return options_data
+
+
+@span("options.parse_html")
+def _parse_options_html(html, parser_backend=None):
+    # --- Row extraction (see swaggy_parsers.py for the backends) ---
     # The main container for all entries (headers + rows) is styles_entries__dTOx1
-    main_entries_container = soup.find("div", class_="styles_entries__dTOx1")
-    if not main_entries_container:
+    table = get_parser_backend(parser_backend).option_table(html)
+    if table is None:
         print("⚠️ Could not find the main entries container (styles_entries__dTOx1) in the scraped HTML.")
         return []
 
-    # Find the header row within the main entries container
-    header_row_bs = main_entries_container.find("div", class_="styles_container__IuRgX styles_header__XI6EA styles_sortable__3o7wg")
-    if header_row_bs:
-        # Extract header names from the header row (excluding the ticker in the sticky column)
-        header_names = [p.get_text(strip=True) for p in header_row_bs.select('p.styles_name__M_BGb')] # Ticker header
-        info_headers = [div.get_text(strip=True) for div in header_row_bs.select('div.styles_info__8BsWp')] # Other headers
-        # Combine the "Ticker" header with the rest of the info headers
-        # The Ticker header seems to be "Ticker"
-        # The others are "Shares Closed @ Price", "Side", etc.
-        column_headers = header_names + info_headers
-    else:
+    column_headers, table_rows = table
+    if not column_headers:
         # Fallback to a predefined list if header row cannot be found in HTML
         print("⚠️ Could not find the header row in the scraped HTML. Using predefined headers.")
-        column_headers = [
-            "Ticker", "Shares Closed @ Price", "Side", "Expiration", "DTE", "Updated",
-            "Strike", "Last", "Bid", "Ask", "Volume", "OI", "IV (%)", "Delta",
-            "OTM (%)", "Est. Total Premium"
-        ]
+        column_headers = list(PREDEFINED_OPTION_HEADERS)
 
     print(f"Detected Headers: {column_headers}")
 
-
-    # Find all data rows. They have styles_container__IuRgX styles_path__ng9lW
-    table_rows = main_entries_container.find_all("div", class_="styles_container__IuRgX styles_path__ng9lW")
-
     if not table_rows:
-        print("⚠️ No data rows found using the specific class names. Check HTML structure in debug_full_options_html.html.")
+        print("⚠️ No data rows found using the specific class names. Re-run with --debug-artifacts always and check options/debug/*/full_options_html.html.")
         return []
 
     print(f"Found {len(table_rows)} options activity rows from HTML for parsing.")
 
-    for i, row in enumerate(table_rows):
-        try:
-            row_data = {}
-            
-            # Extract Ticker from the sticky column part of the row
-            ticker_element = row.find("p", class_="styles_name__M_BGb")
-            if ticker_element:
-                row_data["ticker"] = ticker_element.get_text(strip=True)
-            else:
+    return _parse_option_rows(table_rows, OptionRowSchema(column_headers))
+
+
+@span("options.parse_batch")
+def _parse_option_row_batch(rows_html, schema, first_index=0, parser_backend=None):
+    table_rows = get_parser_backend(parser_backend).option_rows("".join(rows_html))
+    return _parse_option_rows(table_rows, schema, first_index)
+
+
+def _typed_option_rows(table_rows, schema, first_index=0):
+    # table_rows: (ticker text or None, [cell texts]) pairs from a parser backend.
+    # Yields typed row tuples in schema.keys order.
+    seen = no_ticker = mismatched = failed = 0
+    try:
+        for i, (ticker_text, cells) in enumerate(table_rows, start=first_index):
+            seen += 1
+            # Ticker comes from the sticky column part of the row
+            if ticker_text is None:
                 # If ticker isn't found for a row, skip or assign N/A and log
                 print(f"⚠️ Row {i}: Ticker element not found. Skipping row.")
+                no_ticker += 1
                 continue
 
-            # Extract other info cells
-            cells = row.find_all("div", class_="styles_info__8BsWp")
-
-            # Match cells to headers by position, assuming consistent order
-            # Start from the 1st column header since 'Ticker' is handled separately
-            # and it's a fixed-width column
-            start_index_for_info_cells = 1 # Because 'Ticker' is the 0th header conceptually
-            
-            if len(cells) != len(column_headers) - start_index_for_info_cells:
-                 print(f"⚠️ Row {i} ({row_data['ticker']}): Mismatch in number of data cells ({len(cells)}) and expected headers ({len(column_headers) - start_index_for_info_cells}). Skipping row. Raw cells: {[c.get_text(strip=True) for c in cells]}")
-                 continue
-
-            for col_idx, cell in enumerate(cells):
-                # Map to the corresponding header starting from the 2nd header
-                header = column_headers[start_index_for_info_cells + col_idx]
-                value = cell.get_text(strip=True)
-
-                # Type conversion and cleaning based on column header
-                if header in ["Shares Closed @ Price", "Strike", "Last", "Bid", "Ask", "IV (%)", "Delta", "OTM (%)"]:
-                    value = value.replace('$', '').replace('%', '').strip()
-                    try:
-                        value = float(value)
-                    except ValueError:
-                        pass # Keep as string if conversion fails
-                elif header in ["Volume", "OI", "DTE", "Est. Total Premium"]: # Assuming Est. Total Premium is also numeric
-                    value = value.replace('K', '000').replace('M', '000000').replace('B', '000000000').replace('$', '').replace(',', '').strip()
-                    try:
-                        # Handle 'K', 'M' suffixes for Volume/OI/Premium if needed
-                        # Simplistic conversion:
-                        if 'K' in value:
-                            value = float(value.replace('K', '')) * 1000
-                        elif 'M' in value:
-                            value = float(value.replace('M', '')) * 1000000
-                        elif 'B' in value:
-                            value = float(value.replace('B', '')) * 1000000000
-                        else:
-                            value = float(value)
-                        
-                        # For integer types like Volume, OI, DTE, convert to int if possible
-                        if header in ["Volume", "OI", "DTE"]:
-                            value = int(value)
-                        elif header == "Est. Total Premium": # Can be float
-                            pass
-
-                    except ValueError:
-                        pass
-                
-                row_data[header.lower().replace(' ', '_').replace('@', 'at').replace('%', 'percent')] = value
-
-            options_data.append(row_data)
+            # Match cells to headers by position, assuming consistent order.
+            # 'Ticker' is the 0th header and is handled separately.
+            if len(cells) != schema.cell_count:
+                print(f"⚠️ Row {i} ({ticker_text}): Mismatch in number of data cells ({len(cells)}) and expected headers ({schema.cell_count}). Skipping row. Raw cells: {cells}")
+                mismatched += 1
+                continue
 
-        except Exception as e:
-            print(f"⚠️ Failed to parse row {i} (HTML: {str(row)[:500]}): {e}")
-            continue
+            try:
+                yield schema.convert(ticker_text, cells)
+            except Exception as e:
+                print(f"⚠️ Failed to parse row {i} (cells: {[ticker_text] + cells}): {e}")
+                failed += 1
+                continue
+    finally:
+        # Counted once per batch, not per row.
+        count("options.rows_seen", seen)
+        count("options.rows_skipped", no_ticker, reason="no_ticker")
+        count("options.rows_skipped", mismatched, reason="header_mismatch")
+        count("options.parse_failures", failed)
+
+
+def _parse_option_rows(table_rows, schema, first_index=0):
+    as_dict = schema.as_dict
+    return [as_dict(row) for row in _typed_option_rows(table_rows, schema, first_index)]
+
+
+async def scrape_unusual_options_activity_async(browser, output_path=OPTIONS_OUTPUT_PATH, mode="harvest", network=False, record_dir=None,
+                                                request_filter=DEFAULT_REQUEST_FILTER, debug=DEFAULT_DEBUG_POLICY,
+                                                parser_backend=None, parquet=False, history=False):
+    artifacts = debug.session("options")
+    capture = ResponseCapture(record_dir=record_dir) if network else None
+    html = None
+    options_data = []
+
+    context, traffic = await open_context(browser, "Unusual Options Activity", request_filter)
+    try:
+        page = await _open_options_page(context, artifacts, capture, traffic)
+        if page is None:
+            return []
+
+        if capture:
+            options_data = await _capture_option_rows(page, capture)
+
+        if options_data:
+            pass
+        elif mode == "scroll":
+            html = await _scroll_and_serialize(page, artifacts)
+        else:
+            options_data = await _harvest_option_rows(page, parser_backend)
+        if capture:
+            await capture.record_page(page)
+    finally:
+        await traffic.report()
+        await context.close()
+
+    if html is not None:
+        options_data = await asyncio.to_thread(_parse_options_html, html, parser_backend)
 
     if options_data:
         Path("options").mkdir(exist_ok=True)
-        with open(output_path, "w") as f:
-            json.dump(options_data, f, indent=2)
-        print(f"✅ Scraped and saved {len(options_data)} unusual options activities to {output_path}")
+        change = write_output(output_path, "records", options_data)
+        if change.changed:
+            print(f"✅ Scraped and saved {len(options_data)} unusual options activities to {output_path}")
+        if parquet and (change.changed or not parquet_path(output_path).exists()):
+            write_parquet(parquet_path(output_path), "unusual_options_activity", options_data)
+        if history:
+            history_store.append("unusual_options_activity", options_data)
     else:
         print("⚠️ No unusual options activity data extracted. This could be due to parsing errors or an empty table.")
 
     return options_data
 
-# --- Main execution block to combine results into one file ---
-if __name__ == "__main__":
+
+def scrape_unusual_options_activity(output_path=OPTIONS_OUTPUT_PATH, mode="harvest", **scrape_options):
+    # scrape_options: any keyword of scrape_unusual_options_activity_async().
+    return asyncio.run(_run_with_own_browser(scrape_unusual_options_activity_async, output_path, mode=mode, **scrape_options))
+
+# --- Intraday polling: keep the options page open and ingest only new rows ---
+# The first cycle is the usual full harvest and rewrites the output. After
+# that the page is reloaded every interval_s, sorted newest first by
+# POLL_SORT_HEADER, and read from the top in batches until a row older than
+# the newest "updated" date seen before the poll. That column holds only a
+# date, so the rows of that day tie and new ones can sit below known ones: a
+# batch with nothing new is no reason to stop. New rows are checked against a
+# RowKeyIndex and appended to the output in place, so a cycle costs about
+# the rows of the newest day.
+POLL_SORT_HEADER = "Updated"
+POLL_MAX_BATCHES = 50
+POLL_ROW_TIMEOUT_S = 5.0
+
+# [first row's, last row's] text in one column, to tell the sort direction.
+POLL_COLUMN_ENDS_JS = """
+([rowSelector, cellSelector, column]) => {
+    const rows = document.querySelectorAll(rowSelector);
+    if (rows.length < 2) {
+        return null;
+    }
+    const text = (row) => {
+        const cells = row.querySelectorAll(cellSelector);
+        return cells.length > column ? cells[column].innerText.trim() : null;
+    };
+    return [text(rows[0]), text(rows[rows.length - 1])];
+}
+"""
+
+HARVEST_RESET_JS = """
+(rowSelector) => {
+    for (const row of document.querySelectorAll(rowSelector)) {
+        row.removeAttribute('data-warren-harvested');
+    }
+}
+"""
+
+
+async def _sort_newest_first(page, schema, header=POLL_SORT_HEADER):
+    # True once the table is sorted by header, newest first.
+    key = output_key(header)
+    if key not in schema.keys:
+        return False
+    column = schema.keys.index(key) - 1
+    cell = page.locator(HEADER_ROW_SELECTOR).locator(INFO_CELL_SELECTOR, has_text=header).first
+    for _ in range(2):  # the header toggles between ascending and descending
+        try:
+            await cell.click(timeout=5000)
+            await page.wait_for_load_state("networkidle", timeout=10000)
+        except Exception as e:
+            print(f"⚠️ Could not sort by '{header}': {e}")
+            return False
+        ends = await page.evaluate(POLL_COLUMN_ENDS_JS, [DATA_ROW_SELECTOR, INFO_CELL_SELECTOR, column])
+        first, last = (updated_order(text) for text in ends) if ends else (None, None)
+        if first is not None and last is not None and first >= last:
+            return True
+    return False
+
+
+@span("options.poll_rows")
+async def _poll_new_rows(page, schema, index, parser_backend=None, sort_header=POLL_SORT_HEADER):
+    # Returns (new rows, rows read).
+    with span("options.refresh"):
+        await page.reload(timeout=90000)
+        await page.wait_for_selector(f"{MAIN_CONTENT_SELECTOR} {DATA_ROW_SELECTOR}", state="attached", timeout=30000)
+    newest_first = bool(sort_header) and await _sort_newest_first(page, schema, sort_header)
+    if not newest_first:
+        print("⚠️ Table is not sorted newest first; reading all of it.")
+    await page.evaluate(HARVEST_RESET_JS, DATA_ROW_SELECTOR)
+    seen = await page.evaluate(HARVEST_OBSERVER_JS, DATA_ROW_SELECTOR)
+
+    # Rows added below raise the watermark; the stop rule keeps the one from before the poll.
+    watermark = index.watermark
+    new_rows = []
+    read = 0
+    for _ in range(POLL_MAX_BATCHES):
+        batch = await page.evaluate(HARVEST_BATCH_JS, DATA_ROW_SELECTOR)
+        rows = await asyncio.to_thread(_parse_option_row_batch, batch, schema, read, parser_backend) if batch else []
+        read += len(batch)
+        stale = [index.is_stale(row, watermark) for row in rows]
+        new_rows.extend(row for row, old in zip(rows, stale) if not old and index.add(row))
+        if newest_first and any(stale):
+            break
+
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        try:
+            await page.wait_for_function(HARVEST_WAIT_JS, arg=seen, timeout=POLL_ROW_TIMEOUT_S * 1000)
+        except PlaywrightTimeout:
+            break  # end of the table
+        seen = await page.evaluate("() => window.__warrenHarvest.count")
+    return new_rows, read
+
+
+async def poll_unusual_options_activity_async(browser, output_path=OPTIONS_OUTPUT_PATH, interval_s=60.0, cycles=None,
+                                              request_filter=DEFAULT_REQUEST_FILTER, debug=DEFAULT_DEBUG_POLICY,
+                                              parser_backend=None, history=False, sort_header=POLL_SORT_HEADER):
+    # cycles: polls after the first full read (None: until stopped). Returns the RowKeyIndex.
+    artifacts = debug.session("options")
+    index = RowKeyIndex()
+    context, traffic = await open_context(browser, "Unusual Options Activity (polling)", request_filter)
+    try:
+        page = await _open_options_page(context, artifacts, None, traffic)
+        if page is None:
+            return index
+        schema = await _read_option_schema(page, parser_backend)
+
+        options_data = await _harvest_option_rows(page, parser_backend, schema)
+        for row in options_data:
+            index.add(row)
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        write_output(output_path, "records", options_data)
+        if history and options_data:
+            history_store.append("unusual_options_activity", options_data)
+        print(f"✅ Initial read: {len(options_data)} rows, {len(index)} distinct. Polling every {interval_s:.0f}s.")
+
+        cycle = 0
+        while cycles is None or cycle < cycles:
+            await asyncio.sleep(interval_s)
+            cycle += 1
+            with span("options.poll", cycle=cycle) as polling:
+                new_rows, read = await _poll_new_rows(page, schema, index, parser_backend, sort_header)
+                polling.set(new_rows=len(new_rows), rows_read=read)
+                if new_rows:
+                    append_records(output_path, new_rows)
+                    if history:
+                        history_store.append("unusual_options_activity", new_rows)
+            count("options.poll_new_rows", len(new_rows))
+            print(f"🔄 Poll {cycle}: {len(new_rows)} new rows appended ({read} read, {len(index)} known).")
+    finally:
+        await traffic.report()
+        await context.close()
+    return index
+
+
+# persistent: poll from the persistent profile (see swaggy_session.py) instead of a fresh browser.
+async def _run_poll(output_path, persistent=False, browser_profile=DEFAULT_PROFILE_DIR, cache_max_mb=DEFAULT_CACHE_MAX_MB,
+                    request_filter=DEFAULT_REQUEST_FILTER, **poll_options):
+    async with async_playwright() as p:
+        if persistent:
+            allowed_hosts = request_filter.allowed_hosts if request_filter else None
+            browser = await PersistentSession(p, browser_profile, allowed_hosts, cache_max_mb).start()
+            request_filter = None
+        else:
+            browser = await _launch_browser(p)
+        try:
+            return await poll_unusual_options_activity_async(browser, output_path, request_filter=request_filter,
+                                                             **poll_options)
+        finally:
+            await browser.close()
+
+
+def poll_unusual_options_activity(output_path=OPTIONS_OUTPUT_PATH, **poll_options):
+    # poll_options: any keyword of poll_unusual_options_activity_async(), plus persistent/browser_profile/cache_max_mb.
+    return asyncio.run(_run_poll(output_path, **poll_options))
+
+
+# --- Combined runner: one browser, both scrapes in parallel ---
+def _record_subdir(record_dir, name):
+    return Path(record_dir) / name if record_dir else None
+
+
+# The sentiment file itself is written afterwards by save_combined(), with the
+# options in the same document; sentiment_output_path names its Parquet copy.
+async def _scrape_both(browser, sentiment_output_path, options_output_path, options_mode, record_dir, **scrape_options):
+    results = await asyncio.gather(
+        scrape_swaggystocks_sentiment_async(browser, sentiment_output_path, save=False,
+                                            record_dir=_record_subdir(record_dir, "sentiment"), **scrape_options),
+        scrape_unusual_options_activity_async(browser, options_output_path, mode=options_mode,
+                                              record_dir=_record_subdir(record_dir, "options"), **scrape_options),
+        return_exceptions=True,
+    )
+
+    # One scrape failing must not throw away the other one's data.
+    sentiment_data, options_activity_data = results
+    if isinstance(sentiment_data, BaseException):
+        print(f"⛔ WallStreetBets Sentiment scrape failed: {sentiment_data}")
+        sentiment_data = []
+    if isinstance(options_activity_data, BaseException):
+        print(f"⛔ Unusual Options Activity scrape failed: {options_activity_data}")
+        options_activity_data = []
+
+    return sentiment_data, options_activity_data
+
+
+# scrape_options are passed to both scrapes: network, request_filter, debug, parser_backend, parquet, history.
+async def run_swaggy_scrapes_async(sentiment_output_path=SENTIMENT_OUTPUT_PATH, options_output_path=OPTIONS_OUTPUT_PATH, options_mode="harvest", record_dir=None,
+                                   **scrape_options):
+    async with async_playwright() as p:
+        browser = await _launch_browser(p)
+        try:
+            return await _scrape_both(browser, sentiment_output_path, options_output_path, options_mode, record_dir,
+                                      **scrape_options)
+        finally:
+            await browser.close()
+
+
+def run_swaggy_scrapes(sentiment_output_path=SENTIMENT_OUTPUT_PATH, options_output_path=OPTIONS_OUTPUT_PATH, options_mode="harvest", record_dir=None,
+                       **scrape_options):
+    return asyncio.run(run_swaggy_scrapes_async(sentiment_output_path, options_output_path, options_mode, record_dir,
+                                                **scrape_options))
+
+
+def run_swaggy_scrapes_sequential(sentiment_output_path=SENTIMENT_OUTPUT_PATH, options_output_path=OPTIONS_OUTPUT_PATH, options_mode="harvest", record_dir=None,
+                                  **scrape_options):
+    # The old path: two browsers, one after the other. Kept for timing comparisons.
     print("--- Starting WallStreetBets Ticker Sentiment Scrape ---")
-    sentiment_data = scrape_swaggystocks_sentiment()
+    sentiment_data = scrape_swaggystocks_sentiment(sentiment_output_path, save=False,
+                                                   record_dir=_record_subdir(record_dir, "sentiment"), **scrape_options)
 
     print("\n--- Starting Unusual Options Activity Scrape ---")
-    options_activity_data = scrape_unusual_options_activity()
-
+    options_activity_data = scrape_unusual_options_activity(options_output_path, options_mode,
+                                                            record_dir=_record_subdir(record_dir, "options"), **scrape_options)
+
+    return sentiment_data, options_activity_data
+
+# --- Persistent profile: one long-lived browser for repeated scrapes (see swaggy_session.py) ---
+# Scrapes every interval_s seconds until runs scrapes are done (forever if
+# runs is None), calling on_results(sentiment_data, options_activity_data)
+# after each. The request filter's hosts are enforced by the session, so
+# request_filter is not passed to the scrapes.
+async def serve_swaggy_scrapes_async(interval_s=0.0, runs=1, on_results=None, browser_profile=DEFAULT_PROFILE_DIR,
+                                     cache_max_mb=DEFAULT_CACHE_MAX_MB, warm_up=False, request_filter=DEFAULT_REQUEST_FILTER,
+                                     sentiment_output_path=SENTIMENT_OUTPUT_PATH, options_output_path=OPTIONS_OUTPUT_PATH,
+                                     options_mode="harvest", record_dir=None, **scrape_options):
+    allowed_hosts = request_filter.allowed_hosts if request_filter else None
+    results = [], []
+    async with async_playwright() as p:
+        session = await PersistentSession(p, browser_profile, allowed_hosts, cache_max_mb).start()
+        try:
+            # Only worth it before repeated scrapes: a single run warms the profile itself.
+            if warm_up or (session.fresh and runs != 1):
+                with span("swaggy.warm_up"):
+                    await session.warm_up((SENTIMENT_URL, OPTIONS_URL))
+            run = 0
+            while runs is None or run < runs:
+                started = time.perf_counter()
+                run += 1
+                with span("swaggy.run", run=run):
+                    results = await _scrape_both(session, sentiment_output_path, options_output_path, options_mode,
+                                                 record_dir, request_filter=None, **scrape_options)
+                if on_results:
+                    on_results(*results)
+                if runs is not None and run >= runs:
+                    break
+                with span("swaggy.trim"):
+                    await session.trim()
+                wait_s = max(0.0, interval_s - (time.perf_counter() - started))
+                print(f"⏸️ Run {run} done; next scrape in {wait_s:.0f}s.")
+                await asyncio.sleep(wait_s)
+        finally:
+            await session.close()
+    return results
+
+
+def serve_swaggy_scrapes(**options):
+    return asyncio.run(serve_swaggy_scrapes_async(**options))
+
+
+def save_combined(sentiment_data, options_activity_data, output_path=SENTIMENT_OUTPUT_PATH):
     # Define the single output file path
-    final_combined_output_path = Path("sentiment/swaggystocks_sentiment.json")
-    
+    final_combined_output_path = Path(output_path)
+
     # Ensure the parent directory exists
     final_combined_output_path.parent.mkdir(exist_ok=True, parents=True)
 
@@ -382,8 +872,106 @@ if __name__ == "__main__":
         print("❗ Unusual Options Activity data not collected for combined output.")
 
     if combined_results_dict:
-        with open(final_combined_output_path, "w") as f:
-            json.dump(combined_results_dict, f, indent=2)
-        print(f"\n✅ All collected data successfully saved to: {final_combined_output_path}")
+        if write_output(final_combined_output_path, "document", combined_results_dict).changed:
+            print(f"\n✅ All collected data successfully saved to: {final_combined_output_path}")
     else:
-        print("\n❌ No data collected from either scraper. Combined JSON file not created.")
\ No newline at end of file
+        print("\n❌ No data collected from either scraper. Combined JSON file not created.")
+
+
+# --- Main execution block to combine results into one file ---
+# main(argv) is the command line; pipeline.py calls it as a stage.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape SwaggyStocks sentiment and unusual options activity.")
+    parser.add_argument("--sequential", action="store_true",
+                        help="Run the two scrapes one after the other in separate browsers (old behaviour).")
+    parser.add_argument("--options-mode", choices=["harvest", "scroll"], default="harvest",
+                        help="harvest: parse rows in batches as they load (default). "
+                             "scroll: old fixed-sleep scroll loop followed by one full page.content().")
+    parser.add_argument("--network", action="store_true",
+                        help="Experimental, the API field mapping is not verified against recorded responses yet: "
+                             "use the dashboards' API responses instead of the rendered HTML when they match the "
+                             "rendered rows (see swaggy_network.py).")
+    parser.add_argument("--record-responses", metavar="DIR",
+                        help="Save every captured API response and the rendered page under DIR (check with "
+                             "benchmarks/bench_network.py); implies --network.")
+    parser.add_argument("--no-block", action="store_true",
+                        help="Load every asset (images, fonts, third-party scripts) instead of only what the data needs.")
+    parser.add_argument("--allow-host", action="append", default=[], metavar="HOST",
+                        help="Extra host to let through the request filter (repeatable).")
+    parser.add_argument("--debug-artifacts", choices=DEBUG_LEVELS, default="on-failure",
+                        help="When to save debug screenshots/HTML under sentiment/debug and options/debug.")
+    parser.add_argument("--debug-full-page", action="store_true",
+                        help="Full-page instead of viewport-only debug screenshots (slow on the long options page).")
+    parser.add_argument("--debug-png", action="store_true", help="Lossless PNG instead of JPEG debug screenshots.")
+    parser.add_argument("--debug-max-kb", type=int, default=2048, help="Size cap per debug artifact in KB.")
+    parser.add_argument("--debug-keep-runs", type=int, default=5, help="How many runs of debug artifacts to keep.")
+    parser.add_argument("--parser", choices=sorted(PARSER_BACKENDS), default=None,
+                        help="HTML extraction backend for the DOM fallback (default: lxml if installed, else soup).")
+    parser.add_argument("--parquet", action="store_true",
+                        help="Also write each dataset as typed Parquet next to its JSON (needs pyarrow).")
+    parser.add_argument("--no-history", action="store_true",
+                        help="Do not append this run to the partitioned history store (see history_store.py).")
+    parser.add_argument("--persistent", action="store_true",
+                        help="Reuse a persistent browser profile (HTTP cache, service worker, cookies) across runs.")
+    parser.add_argument("--browser-profile", default=DEFAULT_PROFILE_DIR, metavar="DIR",
+                        help="User-data directory of the persistent profile.")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_CACHE_MAX_MB,
+                        help="Size cap of the persistent profile's caches; older caches are evicted at launch.")
+    parser.add_argument("--warm-up", action="store_true",
+                        help="Load both dashboards once before scraping (done anyway for a new profile in --serve-interval).")
+    parser.add_argument("--serve-interval", type=float, metavar="MINUTES",
+                        help="Keep one persistent browser open and scrape every MINUTES (implies --persistent).")
+    parser.add_argument("--runs", type=int, default=None,
+                        help="With --serve-interval, stop after this many scrapes (default: run until stopped).")
+    parser.add_argument("--poll-interval", type=float, metavar="SECONDS",
+                        help="Scrape only the options table, then keep it open and append new rows every SECONDS.")
+    parser.add_argument("--poll-cycles", type=int, default=None,
+                        help="With --poll-interval, stop after this many polls (default: run until stopped).")
+    parser.add_argument("--poll-sort", default=POLL_SORT_HEADER, metavar="HEADER",
+                        help="Column to sort newest first before each poll ('' to keep the page's order).")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    request_filter = None
+    if not args.no_block:
+        request_filter = RequestFilter(allowed_hosts=DEFAULT_ALLOWED_HOSTS + tuple(args.allow_host))
+    scrape_options = dict(options_mode=args.options_mode, network=args.network or bool(args.record_responses),
+                          record_dir=args.record_responses,
+                          request_filter=request_filter, parser_backend=args.parser, parquet=args.parquet,
+                          history=not args.no_history,
+                          debug=DebugArtifactPolicy(level=args.debug_artifacts, full_page=args.debug_full_page,
+                                                    image_format="png" if args.debug_png else "jpeg",
+                                                    max_bytes=args.debug_max_kb * 1024, keep_runs=args.debug_keep_runs))
+
+    with stage("swaggy", args.metrics, args.profile):
+        started = time.perf_counter()
+        if args.poll_interval is not None:
+            print("--- Polling Unusual Options Activity ---")
+            poll_unusual_options_activity(interval_s=args.poll_interval, cycles=args.poll_cycles,
+                                          sort_header=args.poll_sort or None, persistent=args.persistent,
+                                          browser_profile=args.browser_profile, cache_max_mb=args.cache_max_mb,
+                                          request_filter=request_filter, debug=scrape_options["debug"],
+                                          parser_backend=args.parser, history=not args.no_history)
+            return
+
+        if args.persistent or args.serve_interval is not None:
+            print(f"--- Starting SwaggyStocks scrapes in the persistent profile {args.browser_profile} ---")
+            serve_swaggy_scrapes(interval_s=(args.serve_interval or 0) * 60,
+                                 runs=args.runs if args.serve_interval is not None else 1,
+                                 on_results=save_combined, browser_profile=args.browser_profile,
+                                 cache_max_mb=args.cache_max_mb, warm_up=args.warm_up, **scrape_options)
+            print(f"\n⏱️ Scrapes finished in {time.perf_counter() - started:.1f}s (persistent profile).")
+            return
+
+        if args.sequential:
+            sentiment_data, options_activity_data = run_swaggy_scrapes_sequential(**scrape_options)
+        else:
+            print("--- Starting WallStreetBets Sentiment + Unusual Options Activity Scrapes (shared browser) ---")
+            sentiment_data, options_activity_data = run_swaggy_scrapes(**scrape_options)
+        elapsed = time.perf_counter() - started
+        print(f"\n⏱️ Scrapes finished in {elapsed:.1f}s ({'sequential' if args.sequential else 'parallel'}).")
+
+        save_combined(sentiment_data, options_activity_data)
+
+if __name__ == "__main__":
+    main()
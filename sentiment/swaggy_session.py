@@ -0,0 +1,177 @@
+import shutil
+import time
+from pathlib import Path
+
+# A persistent Chromium profile shared by scrape runs.
+#
+# launch() normally starts Chromium with an empty profile, so the dashboards'
+# JS bundles, service worker and consent state are fetched again on every
+# run. PersistentSession keeps them in a user-data directory instead
+# (launch_persistent_context) and hands each scrape a lease: pages in the one
+# persistent context that are closed when the scrape is done, where a Browser
+# would hand out a whole new context. Both dashboards are on the same site,
+# so sharing cookies between them is harmless.
+#
+# Playwright turns off the HTTP cache for any page or context with a route
+# handler, so RequestFilter's routes cannot be used here. The host allowlist
+# is applied at launch through Chromium's host resolver instead (other hosts
+# fail to resolve). First-party images and fonts are no longer aborted; after
+# the first run they come from the cache.
+#
+# The profile's caches are bounded in two ways. --disk-cache-size limits the
+# HTTP cache while the browser runs, and evict_caches() removes whole cache
+# directories, least recently written first, before each launch until the
+# profile is under the cap. A long-lived session calls trim() between runs,
+# which restarts the browser (evicting on the way) once the caches are over
+# the cap. Cookies and local storage are never evicted.
+
+DEFAULT_PROFILE_DIR = "sentiment/browser_profile"
+DEFAULT_CACHE_MAX_MB = 256
+WARM_UP_TIMEOUT_MS = 90000
+
+# Chromium's cache directories inside a profile.
+CACHE_DIRS = (
+    "Default/Cache",
+    "Default/Code Cache",
+    "Default/GPUCache",
+    "Default/Service Worker/CacheStorage",
+    "Default/Service Worker/ScriptCache",
+    "GrShaderCache",
+    "ShaderCache",
+)
+
+
+def _tree_size(path):
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def _last_written(path):
+    return max((f.stat().st_mtime for f in path.rglob("*") if f.is_file()), default=path.stat().st_mtime)
+
+
+def cache_size(profile_dir):
+    return sum(_tree_size(path) for path in (Path(profile_dir) / d for d in CACHE_DIRS) if path.is_dir())
+
+
+def evict_caches(profile_dir, max_bytes):
+    # Returns the bytes removed. Only run while no browser is using the profile.
+    present = [path for path in (Path(profile_dir) / d for d in CACHE_DIRS) if path.is_dir()]
+    sizes = {path: _tree_size(path) for path in present}
+    total = sum(sizes.values())
+    removed = 0
+    for path in sorted(present, key=_last_written):
+        if total - removed <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        removed += sizes[path]
+    return removed
+
+
+def host_resolver_rules(allowed_hosts):
+    # Every host except the allowed ones (and their subdomains) fails to resolve.
+    excluded = ", ".join(f"EXCLUDE {host}, EXCLUDE *.{host}" for host in allowed_hosts)
+    return f"MAP * ~NOTFOUND, {excluded}" if excluded else "MAP * ~NOTFOUND"
+
+
+# The slice of a BrowserContext the scrapes use (new_page, route, on, close),
+# over pages of the shared persistent context. Routes and listeners are
+# installed per page, so concurrent leases don't see each other's requests.
+class SessionLease:
+    def __init__(self, context):
+        self.context = context
+        self.pages = []
+        self.routes = []
+        self.listeners = []
+
+    async def new_page(self):
+        page = await self.context.new_page()
+        for pattern, handler in self.routes:
+            await page.route(pattern, handler)
+        for event, callback in self.listeners:
+            page.on(event, callback)
+        self.pages.append(page)
+        return page
+
+    async def route(self, pattern, handler):
+        self.routes.append((pattern, handler))
+        for page in self.pages:
+            await page.route(pattern, handler)
+
+    def on(self, event, callback):
+        self.listeners.append((event, callback))
+        for page in self.pages:
+            page.on(event, callback)
+
+    async def close(self):
+        for page in self.pages:
+            try:
+                await page.close()
+            except Exception:
+                pass
+        self.pages = []
+
+
+class PersistentSession:
+    # Stands in for a Browser: new_context() returns a SessionLease.
+    def __init__(self, playwright, profile_dir=DEFAULT_PROFILE_DIR, allowed_hosts=None,
+                 cache_max_mb=DEFAULT_CACHE_MAX_MB, headless=True):
+        self.playwright = playwright
+        self.profile_dir = Path(profile_dir)
+        self.allowed_hosts = tuple(allowed_hosts) if allowed_hosts else None
+        self.cache_max_bytes = int(cache_max_mb * 1024 * 1024)
+        self.headless = headless
+        self.context = None
+        self.fresh = True
+
+    async def start(self):
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        removed = evict_caches(self.profile_dir, self.cache_max_bytes)
+        if removed:
+            print(f"🧹 Evicted {removed / 1024 / 1024:.0f} MB of browser cache from {self.profile_dir}")
+        self.fresh = cache_size(self.profile_dir) == 0
+        args = [f"--disk-cache-size={self.cache_max_bytes}"]
+        if self.allowed_hosts is not None:
+            args.append(f"--host-resolver-rules={host_resolver_rules(self.allowed_hosts)}")
+        started = time.perf_counter()
+        self.context = await self.playwright.chromium.launch_persistent_context(
+            str(self.profile_dir), headless=self.headless, args=args)
+        print(f"🗂️ Browser profile {self.profile_dir} opened in {time.perf_counter() - started:.1f}s "
+              f"({'empty' if self.fresh else f'{cache_size(self.profile_dir) / 1024 / 1024:.0f} MB cached'}).")
+        return self
+
+    async def new_context(self):
+        return SessionLease(self.context)
+
+    async def trim(self):
+        # Only between runs: no lease may be open. Returns True if the browser
+        # was restarted.
+        size = cache_size(self.profile_dir)
+        if size <= self.cache_max_bytes:
+            return False
+        print(f"🧹 Browser cache is {size / 1024 / 1024:.0f} MB, over the {self.cache_max_bytes / 1024 / 1024:.0f} MB cap; "
+              f"restarting the browser.")
+        await self.close()
+        await self.start()
+        return True
+
+    async def warm_up(self, urls):
+        # Loads each page once so its bundles, service worker and cookies are in
+        # the profile before the first timed scrape.
+        lease = SessionLease(self.context)
+        started = time.perf_counter()
+        try:
+            for url in urls:
+                page = await lease.new_page()
+                try:
+                    await page.goto(url, wait_until="networkidle", timeout=WARM_UP_TIMEOUT_MS)
+                except Exception as e:
+                    print(f"⚠️ Warm-up of {url} did not finish: {e}")
+        finally:
+            await lease.close()
+        self.fresh = False
+        print(f"🔥 Warmed up {len(urls)} page(s) in {time.perf_counter() - started:.1f}s.")
+
+    async def close(self):
+        if self.context is not None:
+            await self.context.close()
+            self.context = None
@@ -1,44 +1,269 @@
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-
-# File to upload
-FILE_NAME = "warrensoutputfile.json"
-MIME_TYPE = "application/json"
-
-# ID of your shared Google Drive folder
-FOLDER_ID = "1BUGp74aYgCIVBSWHQRtBCb4Gf4uiGkjw"
-
-# Load credentials from service account
-SCOPES = ['https://www.googleapis.com/auth/drive.file']
-SERVICE_ACCOUNT_FILE = "service_account.json"
-
-def upload_file_to_drive():
-    # Authenticate with service account
-    creds = service_account.Credentials.from_service_account_file(
-        SERVICE_ACCOUNT_FILE, scopes=SCOPES
-    )
-
-    # Build the Drive service
-    service = build('drive', 'v3', credentials=creds)
-
-    # Prepare file metadata
-    file_metadata = {
-        'name': FILE_NAME,
-        'parents': [FOLDER_ID]
-    }
-
-    # Prepare file for upload
-    media = MediaFileUpload(FILE_NAME, mimetype=MIME_TYPE)
-
-    # Upload the file
-    uploaded_file = service.files().create(
-        body=file_metadata,
-        media_body=media,
-        fields='id'
-    ).execute()
-
-    print(f"✅ File uploaded to Google Drive. File ID: {uploaded_file.get('id')}")
-
-if __name__ == '__main__':
-    upload_file_to_drive()
+import argparse
+import gzip
+import shutil
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    from google.oauth2 import service_account
+    from googleapiclient.discovery import build
+    from googleapiclient.http import MediaFileUpload
+except ImportError:  # only needed for real uploads; DriveUploader takes any service with the same API
+    service_account = None
+    build = None
+    MediaFileUpload = None
+
+from change_detection import file_sha256
+from json_io import iter_mapping, iter_records, load_json, root_type, write_json
+
+# File to upload
+FILE_NAME = "warrensoutputfile.json"
+MIME_TYPE = "application/json"
+
+# ID of your shared Google Drive folder
+FOLDER_ID = "1BUGp74aYgCIVBSWHQRtBCb4Gf4uiGkjw"
+
+# Load credentials from service account
+SCOPES = ['https://www.googleapis.com/auth/drive.file']
+SERVICE_ACCOUNT_FILE = "service_account.json"
+
+# Per uploaded name: Drive file id and digest of the last uploaded content.
+# The id makes later runs update the same file instead of creating another;
+# when the cache is missing the id is looked up by name in the folder.
+UPLOAD_STATE_FILE = ".drive_uploads.json"
+
+# Resumable uploads go in chunks; Drive wants multiples of 256 KB. A failed
+# chunk is retried on its own, so a dropped connection re-sends one chunk,
+# not the whole file.
+CHUNK_ALIGNMENT = 256 * 1024
+DEFAULT_CHUNK_SIZE = 8 * CHUNK_ALIGNMENT
+DEFAULT_RETRIES = 5
+DEFAULT_BACKOFF_S = 1.0
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# json: the file as it is; gzip: <name>.gz; parquet: <stem>.parquet with the
+# dataset's typed schema (see parquet_io.DATASETS).
+PAYLOADS = ("json", "gzip", "parquet")
+MAPPING_DATASETS = {"combined", "eu_snapshot"}
+KNOWN_DATASETS = {
+    "combined_output.json": "combined",
+    "sentiment/eu_snapshot.json": "eu_snapshot",
+    "sentiment/swaggystocks_sentiment.json": "wallstreetbets_sentiment",
+    "options/unusual_options_activity.json": "unusual_options_activity",
+}
+
+Upload = namedtuple("Upload", "path payload dataset")
+UploadResult = namedtuple("UploadResult", "name file_id status error")
+
+
+def make_upload(path, payload="json", dataset=None):
+    return Upload(str(path), payload, dataset or KNOWN_DATASETS.get(Path(path).as_posix()))
+
+
+def build_service(service_account_file=SERVICE_ACCOUNT_FILE):
+    if build is None:
+        raise ImportError("Drive uploads need google-api-python-client and google-auth "
+                          "(pip install google-api-python-client google-auth).")
+    creds = service_account.Credentials.from_service_account_file(service_account_file, scopes=SCOPES)
+    return build('drive', 'v3', credentials=creds, cache_discovery=False)
+
+
+def _media_file_upload(path, mimetype, chunksize):
+    return MediaFileUpload(path, mimetype=mimetype, chunksize=chunksize, resumable=True)
+
+
+def _status(error):
+    # HTTP status of a googleapiclient HttpError (or anything shaped like one).
+    status = getattr(getattr(error, "resp", None), "status", None)
+    return int(status) if status is not None else None
+
+
+def _retryable(error):
+    return _status(error) in RETRYABLE_STATUSES or isinstance(error, (ConnectionError, TimeoutError))
+
+
+def _dataset_records(path, dataset):
+    if dataset in MAPPING_DATASETS:
+        return ({"ticker": key, **value} for key, value in iter_mapping(path)
+                if not key.startswith("_") and isinstance(value, dict))
+    # The sentiment CLI output nests each dataset under its name.
+    return iter_records(path, f"{dataset}.item" if root_type(path) == "dict" else "item")
+
+
+@contextmanager
+def _payload(upload, workdir):
+    # Yields (name on Drive, local file to send, mimetype).
+    source = Path(upload.path)
+    if upload.payload == "json":
+        yield source.name, source, MIME_TYPE
+    elif upload.payload == "gzip":
+        target = Path(workdir) / f"{source.name}.gz"
+        with open(source, "rb") as src, open(target, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as dst:
+            shutil.copyfileobj(src, dst, CHUNK_ALIGNMENT)
+        yield target.name, target, "application/gzip"
+    elif upload.payload == "parquet":
+        from parquet_io import write_parquet
+        if upload.dataset is None:
+            raise ValueError(f"No Parquet dataset known for {source}; pass one explicitly.")
+        target = Path(workdir) / f"{source.stem}.parquet"
+        write_parquet(target, upload.dataset, _dataset_records(source, upload.dataset), metadata={"source": source.name})
+        yield target.name, target, "application/vnd.apache.parquet"
+    else:
+        raise ValueError(f"Unknown payload '{upload.payload}'. Use one of {PAYLOADS}.")
+
+
+class DriveUploader:
+    # service: a Drive v3 service (build_service()) or a fake with the same
+    # files().list/create/update API. media_factory(path, mimetype, chunksize)
+    # returns the upload body; defaults to a resumable MediaFileUpload.
+    def __init__(self, service, folder_id=FOLDER_ID, chunk_size=DEFAULT_CHUNK_SIZE, retries=DEFAULT_RETRIES,
+                 backoff_s=DEFAULT_BACKOFF_S, state_path=UPLOAD_STATE_FILE, media_factory=None, sleep=time.sleep):
+        if chunk_size <= 0 or chunk_size % CHUNK_ALIGNMENT:
+            raise ValueError(f"chunk_size must be a positive multiple of {CHUNK_ALIGNMENT} bytes.")
+        self.service = service
+        self.folder_id = folder_id
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.state_path = state_path
+        self.media_factory = media_factory or _media_file_upload
+        self.sleep = sleep
+        self.state = self._load_state()
+
+    # === Name -> id cache ===
+    def _load_state(self):
+        try:
+            state = load_json(self.state_path)
+        except (OSError, ValueError):
+            return {}
+        # Older state files stored only the digest.
+        return {name: entry if isinstance(entry, dict) else {"sha256": entry} for name, entry in state.items()}
+
+    def _save_state(self):
+        write_json(self.state_path, self.state)
+
+    def _with_retries(self, action, description):
+        for attempt in range(self.retries + 1):
+            try:
+                return action()
+            except Exception as e:
+                if not _retryable(e) or attempt == self.retries:
+                    raise
+                wait = self.backoff_s * 2 ** attempt
+                print(f"⚠️ {description} failed ({e}); retrying in {wait:.1f}s ({attempt + 1}/{self.retries})")
+                self.sleep(wait)
+
+    def file_id(self, name):
+        # Cached id, else the newest file with this name in the folder, else None.
+        entry = self.state.get(name, {})
+        if entry.get("id"):
+            return entry["id"]
+        escaped = name.replace("\\", "\\\\").replace("'", "\\'")
+        query = f"name = '{escaped}' and '{self.folder_id}' in parents and trashed = false"
+        listing = self._with_retries(
+            lambda: self.service.files().list(q=query, spaces="drive", orderBy="modifiedTime desc",
+                                              fields="files(id, name)", pageSize=1).execute(),
+            f"Looking up {name}")
+        files = listing.get("files", [])
+        if files:
+            self.state.setdefault(name, {})["id"] = files[0]["id"]
+            return files[0]["id"]
+        return None
+
+    # === Uploads ===
+    def _send(self, request, name):
+        # Drives a resumable request chunk by chunk; a failed chunk is retried
+        # from where the upload stopped.
+        response = None
+        failures = 0
+        while response is None:
+            try:
+                _, response = request.next_chunk()
+                failures = 0
+            except Exception as e:
+                if not _retryable(e) or failures == self.retries:
+                    raise
+                wait = self.backoff_s * 2 ** failures
+                failures += 1
+                print(f"⚠️ Chunk of {name} failed ({e}); resuming in {wait:.1f}s ({failures}/{self.retries})")
+                self.sleep(wait)
+        return response
+
+    def _create(self, name, media):
+        request = self.service.files().create(body={'name': name, 'parents': [self.folder_id]},
+                                              media_body=media, fields='id')
+        return self._send(request, name)["id"]
+
+    def _update(self, file_id, name, media):
+        request = self.service.files().update(fileId=file_id, media_body=media, fields='id')
+        return self._send(request, name)["id"]
+
+    def upload(self, upload, force=False):
+        with tempfile.TemporaryDirectory() as workdir, _payload(upload, workdir) as (name, local_path, mimetype):
+            digest = f"{upload.payload}:{file_sha256(upload.path)}"
+            entry = self.state.get(name, {})
+            if not force and entry.get("sha256") == digest and entry.get("id"):
+                print(f"⏭️ {name} unchanged since the last upload ({digest.split(':')[1][:12]}), skipping.")
+                return UploadResult(name, entry["id"], "unchanged", None)
+
+            file_id = self.file_id(name)
+            status = "updated"
+            if file_id is None:
+                file_id, status = self._create(name, self.media_factory(str(local_path), mimetype, self.chunk_size)), "created"
+            else:
+                try:
+                    file_id = self._update(file_id, name, self.media_factory(str(local_path), mimetype, self.chunk_size))
+                except Exception as e:
+                    if _status(e) != 404:
+                        raise
+                    # Deleted on Drive since it was cached.
+                    print(f"⚠️ Cached id of {name} no longer exists; creating a new file.")
+                    file_id, status = self._create(name, self.media_factory(str(local_path), mimetype, self.chunk_size)), "created"
+
+        self.state[name] = {"id": file_id, "sha256": digest}
+        self._save_state()
+        print(f"✅ {name} {status} on Google Drive. File ID: {file_id}")
+        return UploadResult(name, file_id, status, None)
+
+    def upload_all(self, uploads, force=False):
+        # One session for several outputs; a failed file does not stop the others.
+        results = []
+        for upload in uploads:
+            try:
+                results.append(self.upload(upload, force))
+            except Exception as e:
+                print(f"❌ Upload of {upload.path} failed: {e}")
+                results.append(UploadResult(Path(upload.path).name, None, "failed", str(e)))
+        counts = {}
+        for result in results:
+            counts[result.status] = counts.get(result.status, 0) + 1
+        print("📦 Drive upload: " + ", ".join(f"{count} {status}" for status, count in counts.items()))
+        return results
+
+
+def upload_file_to_drive(force=False):
+    uploader = DriveUploader(build_service())
+    return uploader.upload(make_upload(FILE_NAME), force).file_id
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Upload pipeline outputs to the shared Google Drive folder.")
+    parser.add_argument("files", nargs="*", default=[FILE_NAME], help=f"Files to upload (default: {FILE_NAME}).")
+    parser.add_argument("--payload", choices=PAYLOADS, default="json",
+                        help="Upload the file as it is, gzip-compressed, or as typed Parquet (needs pyarrow).")
+    parser.add_argument("--dataset", help="Parquet dataset for --payload parquet (default: from the file name).")
+    parser.add_argument("--chunk-size-kb", type=int, default=DEFAULT_CHUNK_SIZE // 1024,
+                        help=f"Resumable upload chunk size, a multiple of {CHUNK_ALIGNMENT // 1024} KB.")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+    parser.add_argument("--folder-id", default=FOLDER_ID)
+    parser.add_argument("--force", action="store_true", help="Upload even if the content is unchanged.")
+    args = parser.parse_args()
+
+    uploader = DriveUploader(build_service(), folder_id=args.folder_id, chunk_size=args.chunk_size_kb * 1024,
+                             retries=args.retries)
+    results = uploader.upload_all([make_upload(path, args.payload, args.dataset) for path in args.files], args.force)
+    sys.exit(1 if any(result.status == "failed" for result in results) else 0)